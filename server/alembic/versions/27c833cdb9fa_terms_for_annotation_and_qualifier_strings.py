@@ -0,0 +1,96 @@
+"""Terms for annotation and qualifier strings
+
+Keys and values of at most 64 characters of annotations and qualifiers
+move to the terms table and are referenced by ID, longer values stay in
+the value column.
+
+Revision ID: 27c833cdb9fa
+Revises: 4eafbfe9fa34
+Create Date: 2026-10-19 13:42:22.728557
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "27c833cdb9fa"
+down_revision = "4eafbfe9fa34"
+branch_labels = None
+depends_on = None
+
+# crud.MAX_TERM_LENGTH when this migration was written
+MAX_TERM_LENGTH = 64
+
+TABLES = ("annotations", "qualifiers")
+
+
+def upgrade():
+    op.create_table(
+        "terms",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("text", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("text"),
+    )
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column("key_id", sa.Integer(), nullable=True))
+            batch_op.add_column(sa.Column("value_id", sa.Integer(), nullable=True))
+
+    # Every key and short value becomes a term
+    op.execute(
+        "INSERT INTO terms (text) "
+        + " UNION ".join(
+            f"SELECT key FROM {table} UNION SELECT value FROM {table} "
+            f"WHERE length(value) <= {MAX_TERM_LENGTH}"
+            for table in TABLES
+        )
+    )
+    for table in TABLES:
+        op.execute(
+            f"UPDATE {table} SET "
+            f"key_id = (SELECT id FROM terms WHERE terms.text = {table}.key), "
+            f"value_id = (SELECT id FROM terms WHERE terms.text = {table}.value "
+            f"AND length({table}.value) <= {MAX_TERM_LENGTH})"
+        )
+        op.execute(f"UPDATE {table} SET value = NULL WHERE value_id IS NOT NULL")
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column("key_id", existing_type=sa.Integer(), nullable=False)
+            batch_op.create_index(
+                f"ix_{table}_key_value", ["key_id", "value_id"], unique=False
+            )
+            batch_op.create_foreign_key(
+                f"fk_{table}_key_id_terms", "terms", ["key_id"], ["id"]
+            )
+            batch_op.create_foreign_key(
+                f"fk_{table}_value_id_terms", "terms", ["value_id"], ["id"]
+            )
+            batch_op.drop_column("key")
+
+
+def downgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column("key", sa.VARCHAR(), nullable=True))
+
+        op.execute(
+            f"UPDATE {table} SET "
+            f"key = (SELECT text FROM terms WHERE terms.id = {table}.key_id)"
+        )
+        op.execute(
+            f"UPDATE {table} SET "
+            f"value = (SELECT text FROM terms WHERE terms.id = {table}.value_id) "
+            "WHERE value_id IS NOT NULL"
+        )
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column("key", existing_type=sa.VARCHAR(), nullable=False)
+            batch_op.drop_constraint(f"fk_{table}_value_id_terms", type_="foreignkey")
+            batch_op.drop_constraint(f"fk_{table}_key_id_terms", type_="foreignkey")
+            batch_op.drop_index(f"ix_{table}_key_value")
+            batch_op.drop_column("value_id")
+            batch_op.drop_column("key_id")
+
+    op.drop_table("terms")
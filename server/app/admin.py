@@ -3,7 +3,7 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
-from app import schemas, deps, crud, vectors
+from app import schemas, deps, crud, oidc, vectors
 
 router = APIRouter()
 
@@ -40,3 +40,11 @@ def get_all_constructs(
         for vec in cons
     ]
     return schemas.AllConstructs(label="constructs", data=cons_w_users)
+
+
+@router.get("/admin/providers", response_model=schemas.AllProviderStatuses)
+def get_provider_statuses(
+    _admin_user: schemas.User = Depends(deps.get_current_admin),
+):
+    "API endpoint for the circuit breaker states of the identity providers."
+    return schemas.AllProviderStatuses(label="providers", data=oidc.breaker.metrics())
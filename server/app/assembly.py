@@ -0,0 +1,215 @@
+"""
+Golden Gate assembly design.
+
+Parts are modelled as edges in an "overhang graph": a part with left
+overhang L and right overhang R is an edge L -> R. A level 1 assembly
+is a path of level 0 inserts from the right overhang of a backbone back
+to its left overhang, which closes the circle.
+"""
+
+from typing import (
+    Callable,
+    Dict,
+    FrozenSet,
+    Hashable,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+from collections import OrderedDict, defaultdict, deque
+
+# Enumeration stops after this many assemblies
+MAX_ASSEMBLIES = 10_000
+
+# ... or after extending this many partial assemblies
+MAX_STEPS = 1_000_000
+
+# Number of memoized enumerations
+CACHE_SIZE = 256
+
+
+class Part(NamedTuple):
+    "A backbone or level 0 vector reduced to its overhangs."
+    id: int
+    left: str
+    right: str
+
+
+class Constraints(NamedTuple):
+    "Restrictions on the assemblies to enumerate."
+    max_inserts: Optional[int] = None
+    include: FrozenSet[int] = frozenset()
+    exclude: FrozenSet[int] = frozenset()
+
+
+class Assemblies(NamedTuple):
+    "Enumerated assemblies (ordered insert IDs)."
+    assemblies: List[Tuple[int, ...]]
+    truncated: bool  # MAX_ASSEMBLIES or MAX_STEPS was reached
+
+
+def _distances(start: str, following: Dict[str, List[str]]) -> Dict[str, int]:
+    "Fewest steps needed to go from start to each overhang (BFS)."
+    distances = {start: 0}
+    queue = deque([start])
+    while queue:
+        overhang = queue.popleft()
+        for target in following.get(overhang, ()):
+            if target not in distances:
+                distances[target] = distances[overhang] + 1
+                queue.append(target)
+
+    return distances
+
+
+def enumerate_assemblies(
+    backbone: Part,
+    inserts: Iterable[Part],
+    constraints: Constraints = Constraints(),
+    limit: int = MAX_ASSEMBLIES,
+    max_steps: int = MAX_STEPS,
+) -> Assemblies:
+    """
+    All ordered sets of inserts that close the circle of a backbone.
+    Every overhang is used at most once: repeated overhangs would
+    mis-ligate. Branches that cannot reach the backbone (within
+    `max_inserts`) or a required insert they have not used yet are pruned.
+    Raises a ValueError if a required insert cannot be part of any assembly.
+    """
+    candidates = [part for part in inserts if part.id not in constraints.exclude]
+    forward: Dict[str, List[str]] = defaultdict(list)
+    backward: Dict[str, List[str]] = defaultdict(list)
+    for part in candidates:
+        forward[part.left].append(part.right)
+        backward[part.right].append(part.left)
+    # Overhangs reachable from the backbone, and distances to close it
+    reachable = _distances(backbone.right, forward)
+    distances = _distances(backbone.left, backward)
+
+    outgoing: Dict[str, List[Part]] = defaultdict(list)
+    for part in sorted(candidates, key=lambda part: part.id):
+        if part.left in reachable and part.right in distances:
+            outgoing[part.left].append(part)
+
+    required = {
+        part.left: part.id for part in candidates if part.id in constraints.include
+    }
+    if unknown := constraints.include - {part.id for part in candidates}:
+        raise ValueError(f"Unknown or excluded inserts: {sorted(unknown)}")
+    if len(required) < len(constraints.include):
+        raise ValueError("Required inserts start with the same overhang")
+    usable = {part.id for parts in outgoing.values() for part in parts}
+    if unusable := set(required.values()) - usable:
+        raise ValueError(
+            f"Required inserts cannot be reached from the backbone or cannot "
+            f"close it: {sorted(unusable)}"
+        )
+
+    # Overhangs reachable from each overhang, to prune branches that passed
+    # a required insert without using it
+    ahead = {
+        overhang: set(_distances(overhang, forward))
+        for overhang in (reachable if required else ())
+    }
+
+    max_inserts = constraints.max_inserts
+    found: List[Tuple[int, ...]] = []
+    path: List[int] = []
+    used = {backbone.left, backbone.right}
+    pending = dict(required)  # required inserts not on the path yet
+    steps = 0
+
+    def visit(overhang: str) -> bool:
+        "Depth first search, returns False once a limit is reached."
+        nonlocal steps
+        if overhang == backbone.left:
+            if path and not pending:
+                found.append(tuple(path))
+            return len(found) < limit
+
+        for part in outgoing[overhang]:
+            if (
+                max_inserts is not None
+                and len(path) + 1 + distances[part.right] > max_inserts
+            ):
+                continue
+            if required.get(part.left, part.id) != part.id:
+                continue
+            if part.right in used and part.right != backbone.left:
+                continue
+            if any(
+                left != part.left and left not in ahead[part.right] for left in pending
+            ):
+                continue
+
+            if (steps := steps + 1) > max_steps:
+                return False
+            used.add(part.right)
+            path.append(part.id)
+            pending.pop(part.left, None)
+            keep_going = visit(part.right)
+            if required.get(part.left) == part.id:
+                pending[part.left] = part.id
+            path.pop()
+            if part.right != backbone.left:
+                used.discard(part.right)
+            if not keep_going:
+                return False
+
+        return True
+
+    complete = visit(backbone.right) if backbone.right in distances else True
+
+    return Assemblies(assemblies=found, truncated=not complete or len(found) >= limit)
+
+
+def validate_order(backbone: Part, inserts: List[Part]) -> None:
+    """
+    Checks that ordered inserts ligate into a backbone: adjacent overhangs
+    must match, the last insert must close the circle and no overhang may be
+    used twice. Raises a ValueError describing the first problem found.
+    """
+    if not inserts:
+        raise ValueError("An assembly needs at least one insert")
+
+    expected = backbone.right
+    for (position, part) in enumerate(inserts, start=1):
+        if part.left != expected:
+            raise ValueError(
+                f"Insert {position} (id={part.id}) starts with overhang "
+                f"{part.left} but {expected} is expected"
+            )
+        expected = part.right
+
+    if expected != backbone.left:
+        raise ValueError(
+            f"The last insert (id={inserts[-1].id}) ends with overhang {expected} "
+            f"which does not close backbone {backbone.id} ({backbone.left})"
+        )
+
+    overhangs = [backbone.right] + [part.right for part in inserts]
+    if len(set(overhangs)) != len(overhangs):
+        duplicate = next(oh for oh in overhangs if overhangs.count(oh) > 1)
+        raise ValueError(f"Overhang {duplicate} is used more than once")
+
+
+_cache: "OrderedDict[Hashable, Assemblies]" = OrderedDict()
+
+
+def memoized(key: Hashable, compute: Callable[[], Assemblies]) -> Assemblies:
+    """
+    Least recently used cache of enumerations.
+    Callers include the catalog version (crud.get_catalog_version) in the
+    key so that results are recomputed once parts or access change.
+    """
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+
+    result = _cache[key] = compute()
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+
+    return result
@@ -0,0 +1,66 @@
+"""
+asyncio variants of the crud functions used by async endpoints.
+They run on an AsyncSession (deps.get_async_db), so that waiting for the
+database does not block other requests.
+"""
+
+from typing import List, Optional
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import model, schemas
+from app.crud import user_cache
+
+# Users
+
+
+async def get_user_by_identity(
+    database: AsyncSession, issuer: str, subject: str
+) -> Optional[model.User]:
+    "Get a user with a specific issuer and subject."
+    result = await database.execute(
+        select(model.User)
+        .filter(model.User.iss == issuer, model.User.sub == subject)
+        .limit(1)
+    )
+    return result.scalars().first()
+
+
+async def create_user(database: AsyncSession, user: schemas.UserCreate) -> model.User:
+    "Create a new user."
+    new_user = model.User(**user.dict(), created=datetime.now())
+
+    try:
+        database.add(new_user)
+        await database.commit()
+    except SQLAlchemyError:
+        await database.rollback()
+        raise
+
+    await database.refresh(new_user)
+    user_cache.pop(new_user.id)
+    return new_user
+
+
+# Auth
+
+
+async def get_identity_providers(
+    database: AsyncSession,
+) -> List[model.IdentityProvider]:
+    "Get all available identity providers."
+    result = await database.execute(select(model.IdentityProvider))
+    return result.scalars().all()
+
+
+async def get_provider_by_id(
+    database: AsyncSession, provider_id: Optional[int]
+) -> Optional[model.IdentityProvider]:
+    "Get an identity provider given an identifier."
+    if provider_id is None:
+        return None
+
+    return await database.get(model.IdentityProvider, provider_id)
@@ -1,27 +1,29 @@
 " API endpoints dealing with authentication and authorization. "
 
-from typing import List
+from typing import Any, Coroutine, List, TypeVar
 import asyncio
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from jose.exceptions import ExpiredSignatureError, JWTClaimsError, JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import httpx
 import jose
 
-from app import crud, deps, oidc, schemas
+from app import async_crud, deps, oidc, schemas
 
 router = APIRouter()
 
+T = TypeVar("T")
+
 
 @router.get("/login", response_model=List[schemas.LoginUrl])
 async def get_login_url(
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     httpc: httpx.AsyncClient = Depends(deps.get_http_client),
 ):
-    providers = crud.get_identity_providers(db)
+    providers = await async_crud.get_identity_providers(db)
     configs = await asyncio.gather(
-        *[oidc.configuration(httpc, provider.issuer) for provider in providers]
+        *[oidc.discovery.get(httpc, provider.issuer) for provider in providers]
     )
     return [
         schemas.LoginUrl(
@@ -37,12 +39,22 @@ async def get_login_url(
     ]
 
 
+async def _from_provider(issuer: str, call: Coroutine[Any, Any, T]) -> T:
+    "Await a call to an identity provider, through its circuit breaker."
+    try:
+        return await oidc.breaker.call(issuer, call)
+    except oidc.ProviderUnavailable as err:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(err)
+        ) from err
+
+
 @router.post(
     "/authorize", summary="Get an API access token", response_model=schemas.Token
 )
 async def verify_authorization(
     body: schemas.AuthorizationResponse,
-    database: Session = Depends(deps.get_db),
+    database: AsyncSession = Depends(deps.get_async_db),
     http_client: httpx.AsyncClient = Depends(deps.get_http_client),
 ) -> schemas.Token:
     "Submit the 'code' from the authorization service to get an API access token."
@@ -51,13 +63,15 @@ async def verify_authorization(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Could not decode state"
         )
 
-    if (provider := crud.get_provider_by_id(database, state.get("provider"))) is None:
+    if (
+        provider := await async_crud.get_provider_by_id(database, state.get("provider"))
+    ) is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"No provider with id={state.get('provider')}",
         )
 
-    if (config := await oidc.configuration(http_client, provider.issuer)) is None:
+    if (config := await oidc.discovery.get(http_client, provider.issuer)) is None:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Could not query identity provider",
@@ -71,34 +85,48 @@ async def verify_authorization(
         .build()
     )
 
-    if "error" in (response := await oidc.token(http_client, config, token_request)):
+    if "error" in (
+        response := await _from_provider(
+            provider.issuer, oidc.token(http_client, config, token_request)
+        )
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=response.get("error_description"),
         )
 
     try:
+        header = jose.jwt.get_unverified_header(response["id_token"])
         id_token = jose.jwt.decode(
             response["id_token"],
-            await oidc.jwks(http_client, config),
+            await _from_provider(
+                provider.issuer,
+                oidc.signing_keys.get(http_client, config, header.get("kid")),
+            ),
             audience=provider.clientid,
             access_token=response["access_token"],
         )
     except (JWTError, JWTClaimsError, ExpiredSignatureError) as err:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(err))
 
-    userinfo = await oidc.userinfo(
-        http_client, config, access_token=response["access_token"]
+    # The ID token usually carries the profile already
+    userinfo = (
+        {}
+        if "name" in id_token
+        else await _from_provider(
+            provider.issuer,
+            oidc.userinfo(http_client, config, access_token=response["access_token"]),
+        )
     )
     user = schemas.UserCreate(**{**id_token, **userinfo, "role": "user"})
 
     if (
-        db_user := crud.get_user_by_identity(
+        db_user := await async_crud.get_user_by_identity(
             database, issuer=user.iss, subject=user.sub
         )
     ) is None:
         # Create a new user in the database
-        db_user = crud.create_user(database, user=user)
+        db_user = await async_crud.create_user(database, user=user)
 
     authed_user = schemas.User.from_orm(db_user)
     access_token = oidc.create_access_token(data=authed_user)
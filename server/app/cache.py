@@ -0,0 +1,89 @@
+"""
+In-process caches.
+
+Entries of a TTLCache are fresh for `ttl` seconds after being stored.
+Expired entries are still returned by `entry`, so that callers can serve
+stale values while they are refreshed, until `max_stale` more seconds
+have passed. The least recently stored entries are dropped beyond
+`maxsize` entries.
+"""
+
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    NamedTuple,
+    Optional,
+    TypeVar,
+)
+import time
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class Entry(NamedTuple):
+    "A cached value and the (clock) times it was stored and expires at."
+    value: Any
+    stored: float
+    expires: float
+
+
+class TTLCache(Generic[K, V]):
+    "Values kept for a time to live, and served stale for a while after."
+
+    def __init__(
+        self,
+        ttl: float,
+        max_stale: float = 0.0,
+        maxsize: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.maxsize = maxsize
+        self.clock = clock
+        self._entries: Dict[K, Entry] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def entry(self, key: K) -> Optional[Entry]:
+        "The entry of a key, if it is fresh or stale for less than max_stale."
+        if (found := self._entries.get(key)) is None:
+            return None
+        if self.clock() >= found.expires + self.max_stale:
+            del self._entries[key]
+            return None
+        return found
+
+    def get(self, key: K) -> Optional[V]:
+        "The value of a key if it is fresh."
+        if (found := self.entry(key)) is None or not self.is_fresh(found):
+            return None
+        return found.value
+
+    def is_fresh(self, entry: Entry) -> bool:
+        "The entry has not expired yet."
+        return self.clock() < entry.expires
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        "Stores a value, fresh for ttl seconds (the cache's ttl by default)."
+        now = self.clock()
+        self._entries.pop(key, None)
+        self._entries[key] = Entry(value, now, now + (self.ttl if ttl is None else ttl))
+        if self.maxsize is not None:
+            while len(self._entries) > self.maxsize:
+                del self._entries[next(iter(self._entries))]
+
+    def pop(self, key: K) -> Optional[V]:
+        "Removes a key, returning its value if it was cached."
+        if (found := self._entries.pop(key, None)) is None:
+            return None
+        return found.value
+
+    def clear(self) -> None:
+        "Removes all entries."
+        self._entries.clear()
@@ -10,13 +10,78 @@ class Settings(BaseSettings):
 
     DATABASE_URL: str = "sqlite:///ggw.sqlite?check_same_thread=false"
 
+    # Connection pools of the database engines (the asyncio engine has its
+    # own): connections kept open and opened beyond them under load, seconds
+    # to wait for one, whether to check them before use, and seconds after
+    # which they are replaced. Not used for in-memory SQLite databases.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 30 * 60
+    # Milliseconds after which PostgreSQL cancels a statement (0 for never)
+    DB_STATEMENT_TIMEOUT: int = 0
+    # Log every statement, and statements taking at least this many
+    # milliseconds as warnings (0 for none)
+    DB_ECHO: bool = False
+    DB_SLOW_QUERY_MS: int = 500
+
     API_SECRET: str = secrets.token_urlsafe(32)
     API_JWT_ALGORITHM: str = "HS256"
     API_TOKEN_EXPIRE: int = 7 * 24 * 60  # 7 days in minutes
+    # Verified API tokens kept, so that they are not decoded again
+    TOKEN_CACHE_SIZE: int = 10_000
 
     AUTH_REDIRECT_URI: str = "http://localhost:49999/oidc_login"
 
+    # Seconds a call to an identity provider may take, and the consecutive
+    # failed calls after which a provider is skipped for a cooldown (seconds)
+    OIDC_TIMEOUT: float = 5.0
+    OIDC_BREAKER_THRESHOLD: int = 3
+    OIDC_BREAKER_COOLDOWN: int = 30
+
+    # Seconds the OpenID configurations of providers are used without being
+    # fetched again, and then for how long they are used while refreshed
+    OIDC_DISCOVERY_TTL: int = 60 * 60
+    OIDC_DISCOVERY_MAX_STALE: int = 24 * 60 * 60
+
+    # Seconds the signing keys of providers are used without being fetched
+    # again, and the least seconds between fetches for unknown key IDs
+    OIDC_JWKS_TTL: int = 24 * 60 * 60
+    OIDC_JWKS_MIN_REFETCH: int = 60
+
+    # Outbound HTTP connections (to identity providers) shared by all
+    # requests: pool sizes, seconds idle connections are kept alive,
+    # timeouts in seconds, and HTTP/2 if the h2 package is installed
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_TIMEOUT: float = 10.0
+    HTTP2: bool = True
+
+    # Seconds users are cached for by ID without reading them from the
+    # database (at most until the token expires), and how many are cached.
+    # Roles are only changed outside the server (in the database or with
+    # ggwc), so this is the only bound on how long such changes take to apply.
+    USER_CACHE_TTL: int = 60
+    USER_CACHE_SIZE: int = 10_000
+
     MAX_TEMP_FILE_SIZE: int = 10 * 1024 * 1024
 
+    # Estimated share of k-mers above which vectors are reported as duplicates
+    DUPLICATE_THRESHOLD: float = 0.9
+
+    # Also store the features of new vectors as one blob per vector, read
+    # instead of the features and qualifiers tables (kept for queries)
+    FEATURE_BLOBS: bool = False
+
+    # Largest generated GenBank file (in characters) kept in the export
+    # cache: the text is held in memory while it is streamed to be cached
+    GENBANK_CACHE_MAX_SIZE: int = 1024 * 1024
+
+    # Base of the URIs of exported SBOL objects
+    SBOL_NAMESPACE: str = "http://ggw.example.org"
+
 
 settings = Settings()
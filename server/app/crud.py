@@ -1,13 +1,21 @@
 " Provides low-level Create, Read, Update, and Delete functions for API resources. "
 
-from typing import List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
+import logging
+import time
 
-from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session, selectinload, undefer
 from sqlalchemy.exc import SQLAlchemyError
 
-from app import model, schemas
-from app.level import VectorLevel
+from app import minhash, model, restriction, schemas, search
+from app.cache import TTLCache
+from app.config import settings
+from app.features import FeatureTable, encode_features
+from app.level import VectorLevel, is_circular
+
+logger = logging.getLogger(__name__)
 
 # Users
 
@@ -17,6 +25,32 @@ def get_user(database: Session, user_id: int) -> Optional[model.User]:
     return database.query(model.User).filter(model.User.id == user_id).first()
 
 
+# Users by ID, as checked by deps.get_current_user on every request
+user_cache: TTLCache[int, schemas.User] = TTLCache(
+    settings.USER_CACHE_TTL, maxsize=settings.USER_CACHE_SIZE
+)
+
+
+def get_cached_user(
+    database: Session, user_id: int, expires: float
+) -> Optional[schemas.User]:
+    """
+    Read a user from the cache, or from the database if it is not cached.
+    Users are cached for settings.USER_CACHE_TTL seconds at most, and not
+    after `expires` (the expiry time of the access token, in seconds since
+    the epoch).
+    """
+    if (user := user_cache.get(user_id)) is not None:
+        return user
+
+    if (db_user := get_user(database, user_id)) is None:
+        return None
+    user = schemas.User.from_orm(db_user)
+    if (ttl := min(user_cache.ttl, expires - time.time())) > 0:
+        user_cache.set(user_id, user, ttl=ttl)
+    return user
+
+
 def get_users(database: Session, offset: int = 0, limit: int = 10) -> List[model.User]:
     """
     Get all users with pagination.
@@ -26,7 +60,7 @@ def get_users(database: Session, offset: int = 0, limit: int = 10) -> List[model
     return database.query(model.User).offset(offset).limit(limit).all()
 
 
-def is_admin(user: model.User) -> bool:
+def is_admin(user: schemas.User) -> bool:
     "Check if a user is an admin."
     return user.role == "admin"
 
@@ -55,6 +89,7 @@ def create_user(database: Session, user: schemas.UserCreate) -> model.User:
         database.commit()
 
     database.refresh(new_user)
+    user_cache.pop(new_user.id)
     return new_user
 
 
@@ -99,8 +134,15 @@ def add_vector(
     vector: schemas.VectorIn,
     genbank: schemas.GenbankData,
     user: schemas.User,
+    features: Optional[FeatureTable] = None,
 ) -> Optional[model.Vector]:
-    "Add a vector to the database"
+    """
+    Add a vector to the database.
+    Its features are genbank.features unless a FeatureTable is given.
+    """
+    if features is None:
+        features = FeatureTable.from_features(genbank.features)
+    records = features.records()
     new_vector = model.Vector(
         location=vector.location,
         name=vector.name,
@@ -119,55 +161,63 @@ def add_vector(
         experiment=vector.experiment,
         date=datetime.strptime(vector.date, "%Y-%m-%d"),
         sequence=genbank.sequence,
+        left_overhang=genbank.left_overhang,
+        right_overhang=genbank.right_overhang,
+        sketch=minhash.sketch(genbank.sequence, circular=is_circular(vector.level)),
         genbank=vector.genbank,
+        features_blob=(encode_features(features) if settings.FEATURE_BLOBS else None),
+        # References (and annotations, below) are inserted in the same flush
+        references=[
+            model.VectorReference(authors=ref.authors, title=ref.title)
+            for ref in genbank.references
+        ],
     )
     try:
+        # Keys and short values of annotations and qualifiers are shared terms
+        terms = intern_terms(
+            database,
+            [(ann.key, ann.value) for ann in genbank.annotations]
+            + [
+                (qual.key, qual.value)
+                for (*_, qualifiers) in records
+                for qual in qualifiers
+            ],
+        )
+        new_vector.annotations = [
+            model.Annotation(**term_columns(terms, ann.key, ann.value))
+            for ann in genbank.annotations
+        ]
         database.add(new_vector)
         database.flush()
-        database.refresh(new_vector)
 
         # Adding the User-Vector Mapping to the database
         database.add(model.UserVectorMapping(user=user.id, vector=new_vector.id))
 
-        # Adding the annotations to the database
-        database.add_all(
-            [
-                model.Annotation(key=ann.key, value=ann.value, vector=new_vector.id)
-                for ann in genbank.annotations
-            ]
-        )
-
-        # Adding the features and qualifiers to the database
-        for feat in genbank.features:
-            new_feature = model.Feature(
-                type=feat.type,
-                start_pos=feat.start_pos,
-                end_pos=feat.end_pos,
-                strand=feat.strand,
+        # Adding the features to the database (flushed for their IDs), then
+        # their qualifiers in one multi-row insert
+        new_features = [
+            model.Feature(
+                type=type_,
+                start_pos=start,
+                end_pos=end,
+                strand=strand,
                 vector=new_vector.id,
             )
-            database.add(new_feature)
-            database.flush()
-            database.refresh(new_feature)
-
-            database.add_all(
-                [
-                    model.Qualifier(
-                        key=qual.key, value=qual.value, feature=new_feature.id
-                    )
-                    for qual in feat.qualifiers
-                ]
-            )
-        # Adding the references to the database
-        database.add_all(
+            for (type_, start, end, strand, _) in records
+        ]
+        database.add_all(new_features)
+        database.flush()
+        _bulk_insert(
+            database,
+            model.Qualifier,
             [
-                model.VectorReference(
-                    authors=ref.authors,
-                    title=ref.title,
-                    vector=new_vector.id,
-                )
-                for ref in genbank.references
-            ]
+                {
+                    **term_columns(terms, qual.key, qual.value),
+                    "feature": new_feature.id,
+                }
+                for (new_feature, (*_, qualifiers)) in zip(new_features, records)
+                for qual in qualifiers
+            ],
         )
 
         database.add_all(
@@ -177,6 +227,11 @@ def add_vector(
             ]
         )
 
+        _bulk_insert(database, model.RestrictionSite, restriction_sites_for(new_vector))
+        _bulk_insert(database, model.SequenceKmer, sequence_kmers_for(new_vector))
+        _bulk_insert(database, model.SketchBand, sketch_bands_for(new_vector))
+        bump_catalog_version(database)
+
     except SQLAlchemyError as err:
         print(f"Error: {err}")
         database.rollback()
@@ -186,6 +241,69 @@ def add_vector(
         return new_vector
 
 
+# Longest values stored as terms, longer ones (sequences, translations,
+# notes, ...) are rarely shared
+MAX_TERM_LENGTH = 64
+
+# Largest number of terms looked up per query (bound parameters)
+_TERMS_PER_QUERY = 500
+
+
+def is_term_value(value: Optional[str]) -> bool:
+    "Annotation and qualifier values short enough to be stored as terms."
+    return value is not None and len(value) <= MAX_TERM_LENGTH
+
+
+def intern_terms(
+    database: Session, pairs: Iterable[Tuple[str, Optional[str]]]
+) -> Dict[str, int]:
+    """
+    IDs of the terms of (key, value) pairs of annotations or qualifiers:
+    all keys and the values short enough. Missing terms are added (but
+    not committed).
+    """
+    wanted = set()
+    for (key, value) in pairs:
+        wanted.add(key)
+        if value is not None and is_term_value(value):
+            wanted.add(value)
+
+    def lookup(texts: List[str]) -> Dict[str, int]:
+        found = {}
+        for start in range(0, len(texts), _TERMS_PER_QUERY):
+            found.update(
+                database.query(model.Term.text, model.Term.id)
+                .filter(
+                    model.Term.text.in_(  # type: ignore[attr-defined]
+                        texts[start : start + _TERMS_PER_QUERY]
+                    )
+                )
+                .all()
+            )
+        return found
+
+    terms = lookup(sorted(wanted))
+    if missing := sorted(wanted - terms.keys()):
+        _bulk_insert(database, model.Term, [{"text": text} for text in missing])
+        terms.update(lookup(missing))
+    return terms
+
+
+def term_columns(
+    terms: Dict[str, int], key: str, value: Optional[str]
+) -> Dict[str, Any]:
+    "Columns of an annotation or qualifier, given the IDs of its terms."
+    if value is not None and is_term_value(value):
+        return {"key_id": terms[key], "value_id": terms[value], "inline_value": None}
+    return {"key_id": terms[key], "value_id": None, "inline_value": value}
+
+
+def _bulk_insert(database: Session, table: Any, rows: List[Dict[str, Any]]) -> None:
+    "Insert many rows in one statement (executemany), bypassing the ORM."
+    if rows:
+        database.execute(insert(table), rows)
+
+
 def get_vectors_for_user(database: Session, user: schemas.User) -> List[model.Vector]:
     "Query all Vector from the database that a given user has access to."
     return database.query(model.Vector).filter(model.Vector.users.any(id=user.id)).all()
@@ -219,6 +337,166 @@ def get_vector_by_id(
     )
 
 
+def get_vectors_by_ids(
+    database: Session, ids: List[int], user: schemas.User, with_features: bool = False
+) -> List[model.Vector]:
+    """
+    Returns the vectors with the given IDs that a user has access to,
+    in a single query. Inaccessible or unknown IDs are left out.
+    With `with_features`, their features and qualifiers are loaded eagerly
+    (in two more queries, whatever the number of vectors).
+    """
+    query = (
+        database.query(model.Vector)
+        .filter(model.Vector.id.in_(ids))  # type: ignore[attr-defined]
+        .filter(model.Vector.users.any(id=user.id))
+    )
+    if with_features:
+        query = query.options(_features_loader())
+
+    return query.all()
+
+
+def _features_loader() -> Any:
+    """
+    Loader option for the features of vectors read with features.vector_features:
+    their blobs when features are stored as blobs, their rows otherwise.
+    """
+    if settings.FEATURE_BLOBS:
+        return undefer(model.Vector.features_blob)
+    return selectinload(model.Vector.features).selectinload(model.Feature.qualifiers)
+
+
+def get_vector_ids(
+    database: Session,
+    user: schemas.User,
+    ids: Optional[List[int]] = None,
+    level: Optional[VectorLevel] = None,
+    group: Optional[str] = None,
+) -> List[int]:
+    """
+    IDs of the vectors a given user has access to, optionally restricted
+    to the given IDs, level and group. Ordered by ID.
+    """
+    query = database.query(model.Vector.id).filter(model.Vector.users.any(id=user.id))
+    if ids is not None:
+        query = query.filter(model.Vector.id.in_(ids))  # type: ignore[attr-defined]
+    if level is not None:
+        query = query.filter(model.Vector.level == level)
+    if group is not None:
+        query = query.filter(model.Vector.group == group)
+
+    return [vector_id for (vector_id,) in query.order_by(model.Vector.id)]
+
+
+def get_vectors_for_export(
+    database: Session, ids: List[int], sequence_only: bool = False
+) -> List[model.Vector]:
+    """
+    Returns the vectors with the given IDs (in that order) with everything
+    needed to write their files loaded up front (unless only the sequence
+    is needed).
+    """
+    query = database.query(model.Vector).filter(
+        model.Vector.id.in_(ids)  # type: ignore[attr-defined]
+    )
+    if not sequence_only:
+        query = query.options(
+            undefer(model.Vector.export_cache),
+            selectinload(model.Vector.annotations),
+            selectinload(model.Vector.references),
+            _features_loader(),
+        )
+
+    vectors = query.all()
+    order = {vector_id: index for (index, vector_id) in enumerate(ids)}
+    return sorted(vectors, key=lambda vector: order[vector.id])
+
+
+def get_compatible_vectors(
+    database: Session,
+    user: schemas.User,
+    left: Optional[str] = None,
+    right: Optional[str] = None,
+) -> List[model.Vector]:
+    """
+    Query the parts (backbones and level 0 vectors) a given user has access to
+    with the given left and/or right overhang.
+    """
+    query = database.query(model.Vector).filter(
+        model.Vector.level.in_(  # type: ignore[attr-defined]
+            [VectorLevel.BACKBONE, VectorLevel.LEVEL0]
+        ),
+        model.Vector.users.any(id=user.id),
+    )
+    if left is not None:
+        query = query.filter(model.Vector.left_overhang == left.upper())
+    if right is not None:
+        query = query.filter(model.Vector.right_overhang == right.upper())
+
+    return query.all()
+
+
+def get_parts(
+    database: Session, user: schemas.User, level: VectorLevel
+) -> List[Tuple[int, str, str]]:
+    """
+    Returns (id, left overhang, right overhang) of every vector of a given
+    level a user has access to and for which the overhangs are known.
+    """
+    return (
+        database.query(
+            model.Vector.id, model.Vector.left_overhang, model.Vector.right_overhang
+        )
+        .filter(
+            model.Vector.level == level,
+            model.Vector.left_overhang.isnot(None),  # type: ignore[union-attr]
+            model.Vector.right_overhang.isnot(None),  # type: ignore[union-attr]
+            model.Vector.users.any(id=user.id),
+        )
+        .all()
+    )
+
+
+def get_catalog_version(database: Session) -> int:
+    "A number that changes whenever vectors, their overhangs or access change."
+    return (
+        database.query(model.Catalog.version).filter(model.Catalog.id == 1).scalar()
+        or 0
+    )
+
+
+def bump_catalog_version(database: Session) -> None:
+    "Increment the catalog version, in the transaction of the caller."
+    if not (
+        database.query(model.Catalog)
+        .filter(model.Catalog.id == 1)
+        .update(
+            {model.Catalog.version: model.Catalog.version + 1},
+            synchronize_session=False,
+        )
+    ):
+        database.add(model.Catalog(id=1, version=1))
+
+
+def set_vector_overhangs(
+    database: Session, vector: model.Vector, overhangs: Tuple[str, str]
+) -> model.Vector:
+    "Update the (derived) overhangs of an existing vector."
+    (vector.left_overhang, vector.right_overhang) = overhangs
+    try:
+        database.add(vector)
+        touch_vector(database, vector)
+        bump_catalog_version(database)
+    except SQLAlchemyError:
+        database.rollback()
+        raise
+    else:
+        database.commit()
+
+    return vector
+
+
 def get_vector_by_name_level_location(
     database: Session, name: str, level: VectorLevel, location: int
 ) -> model.Vector:
@@ -274,6 +552,26 @@ def get_features_from_vector(database: Session, vector_id: int) -> List[model.Fe
     return database.query(model.Feature).filter(model.Feature.vector == vector_id).all()
 
 
+def get_features_in_range(
+    database: Session, vector_id: int, start: int, end: Optional[int] = None
+) -> List[model.Feature]:
+    """
+    Returns the features of a vector overlapping positions [start, end),
+    (end=None means up to the end of the sequence) ordered by position.
+    """
+    query = database.query(model.Feature).filter(
+        model.Feature.vector == vector_id, model.Feature.end_pos > start
+    )
+    if end is not None:
+        query = query.filter(model.Feature.start_pos < end)
+
+    return (
+        query.options(selectinload(model.Feature.qualifiers))
+        .order_by(model.Feature.start_pos, model.Feature.id)
+        .all()
+    )
+
+
 def get_qualifiers_from_feature(
     database: Session, feature_id: int
 ) -> List[model.Qualifier]:
@@ -286,3 +584,310 @@ def get_qualifiers_from_feature(
         .filter(model.Qualifier.feature == feature_id)
         .all()
     )
+
+
+def set_features_blob(database: Session, vector: model.Vector) -> None:
+    "Stores the features of a vector (from its rows) as a blob."
+    vector.features_blob = encode_features(vector.features)
+    try:
+        touch_vector(database, vector)
+        database.commit()
+    except SQLAlchemyError:
+        database.rollback()
+        raise
+
+
+# GenBank export cache
+
+
+def touch_vector(database: Session, vector: model.Vector) -> None:
+    """
+    Marks a vector and the vectors built from it as changed (by incrementing
+    their revision), so that their cached GenBank files are regenerated.
+    Callers commit.
+    """
+    vector.revision = model.Vector.revision + 1
+    database.query(model.Vector).filter(
+        model.Vector.id.in_(  # type: ignore[attr-defined]
+            select(model.VectorHierarchy.parent).where(
+                model.VectorHierarchy.child == vector.id
+            )
+        )
+    ).update(
+        {model.Vector.revision: model.Vector.revision + 1}, synchronize_session=False
+    )
+
+
+def get_cached_genbank(vector: model.Vector) -> Optional[str]:
+    "The GenBank text generated for the current revision of a vector, if any."
+    if vector.export_revision != vector.revision:
+        return None
+    return vector.export_cache
+
+
+def cache_genbank(database: Session, vector: model.Vector, genbank: str) -> None:
+    """
+    Stores the GenBank text generated for the current revision of a vector.
+    Best effort: errors are logged, the file is generated again next time.
+    """
+    vector.export_cache = genbank
+    vector.export_revision = vector.revision
+    try:
+        database.commit()
+    except SQLAlchemyError as err:
+        database.rollback()
+        logger.warning(
+            "Could not cache the GenBank file of vector %s: %s", vector.id, err
+        )
+
+
+# Restriction sites
+
+
+def restriction_sites_for(vector: model.Vector) -> List[Dict[str, Any]]:
+    """
+    Computes the restriction sites (for the whole enzyme panel)
+    in the sequence of a vector, as rows of the restriction_sites table.
+    """
+    return [
+        {
+            "vector": vector.id,
+            "enzyme": site.enzyme,
+            "position": site.position,
+            "strand": site.strand,
+        }
+        for site in restriction.find_sites(
+            vector.sequence, circular=is_circular(vector.level)
+        )
+    ]
+
+
+def reindex_restriction_sites(database: Session, vector: model.Vector) -> int:
+    """
+    Recomputes the restriction sites of an existing vector.
+    Returns the number of sites found.
+    """
+    sites = restriction_sites_for(vector)
+    try:
+        database.query(model.RestrictionSite).filter(
+            model.RestrictionSite.vector == vector.id
+        ).delete()
+        _bulk_insert(database, model.RestrictionSite, sites)
+    except SQLAlchemyError:
+        database.rollback()
+        raise
+    else:
+        database.commit()
+
+    return len(sites)
+
+
+def get_restriction_sites_from_vector(
+    database: Session, vector_id: int
+) -> List[model.RestrictionSite]:
+    """
+    Returns the restriction sites from a given vector ID, ordered by position.
+    """
+    return (
+        database.query(model.RestrictionSite)
+        .filter(model.RestrictionSite.vector == vector_id)
+        .order_by(model.RestrictionSite.position, model.RestrictionSite.enzyme)
+        .all()
+    )
+
+
+def get_vectors_by_restriction_sites(
+    database: Session,
+    user: schemas.User,
+    enzymes: List[str],
+    present: bool = True,
+    level: Optional[VectorLevel] = None,
+) -> List[model.Vector]:
+    """
+    Query the vectors a given user has access to that contain a site for
+    any of the given enzymes (present=True) or for none of them (present=False).
+    """
+    has_site = (
+        database.query(model.RestrictionSite)
+        .filter(
+            model.RestrictionSite.vector == model.Vector.id,
+            model.RestrictionSite.enzyme.in_(enzymes),  # type: ignore[attr-defined]
+        )
+        .exists()
+    )
+
+    query = database.query(model.Vector).filter(
+        model.Vector.users.any(id=user.id), has_site if present else ~has_site
+    )
+    if level is not None:
+        query = query.filter(model.Vector.level == level)
+
+    return query.all()
+
+
+# Sequence search
+
+
+def sequence_kmers_for(vector: model.Vector) -> List[Dict[str, Any]]:
+    """
+    Computes the k-mers in the sequence of a vector,
+    as rows of the sequence_kmers table.
+    """
+    (kmers, positions) = search.index_kmers(
+        vector.sequence, circular=is_circular(vector.level)
+    )
+    return [
+        {"kmer": kmer, "vector": vector.id, "position": position}
+        for (kmer, position) in zip(kmers.tolist(), positions.tolist())
+    ]
+
+
+def reindex_sequence_kmers(database: Session, vector: model.Vector) -> int:
+    """
+    Recomputes the sequence search index of an existing vector.
+    Returns the number of k-mers indexed.
+    """
+    kmers = sequence_kmers_for(vector)
+    try:
+        database.query(model.SequenceKmer).filter(
+            model.SequenceKmer.vector == vector.id
+        ).delete()
+        _bulk_insert(database, model.SequenceKmer, kmers)
+    except SQLAlchemyError:
+        database.rollback()
+        raise
+    else:
+        database.commit()
+
+    return len(kmers)
+
+
+def search_sequence(
+    database: Session, user: schemas.User, query: str, limit: Optional[int] = None
+) -> List[search.Match]:
+    """
+    Find the occurrences of a sequence, on both strands, in the vectors
+    a given user has access to. Ordered by vector and position.
+    """
+    found: List[Tuple[int, int, str, Optional[int]]] = []
+    for (pattern, strand) in search.patterns(query):
+        postings = [
+            database.query(
+                model.SequenceKmer.vector,
+                model.SequenceKmer.position,
+                func.length(model.Vector.sequence),
+            )
+            .join(model.Vector, model.Vector.id == model.SequenceKmer.vector)
+            .filter(model.SequenceKmer.kmer == kmer, model.Vector.users.any(id=user.id))
+            .all()
+            for (_, kmer) in search.probes(pattern)
+        ]
+        found.extend(
+            (vector_id, start, pattern, strand)
+            for (vector_id, start) in search.candidates(pattern, postings)
+        )
+
+    vectors = {
+        vector.id: vector
+        for vector in database.query(model.Vector)
+        .filter(
+            model.Vector.id.in_(  # type: ignore[attr-defined]
+                {vector_id for (vector_id, *_) in found}
+            )
+        )
+        .all()
+    }
+    matches = sorted(
+        search.Match(vector=vector_id, position=start, strand=strand)
+        for (vector_id, start, pattern, strand) in found
+        if search.matches_at(
+            vectors[vector_id].sequence,
+            pattern,
+            start,
+            circular=is_circular(vectors[vector_id].level),
+        )
+    )
+    return matches[:limit]
+
+
+# Near-duplicate detection
+
+
+def sketch_bands_for(vector: model.Vector) -> List[Dict[str, Any]]:
+    "The LSH band keys of the sketch of a vector, as rows of the sketch_bands table."
+    if vector.sketch is None:
+        return []
+    return [
+        {"key": key, "vector": vector.id}
+        for key in set(minhash.band_keys(vector.sketch))
+    ]
+
+
+def set_vector_sketch(database: Session, vector: model.Vector) -> None:
+    "Recomputes the MinHash sketch (and its band keys) of an existing vector."
+    vector.sketch = minhash.sketch(vector.sequence, circular=is_circular(vector.level))
+    try:
+        database.query(model.SketchBand).filter(
+            model.SketchBand.vector == vector.id
+        ).delete()
+        _bulk_insert(database, model.SketchBand, sketch_bands_for(vector))
+        database.commit()
+    except SQLAlchemyError:
+        database.rollback()
+        raise
+
+
+def get_similar_vectors(
+    database: Session, user: schemas.User, vector: model.Vector, threshold: float
+) -> List[Tuple[model.Vector, float]]:
+    """
+    Query the other vectors of the same level a given user has access to
+    whose estimated k-mer similarity with a vector is at least `threshold`.
+    Most similar first. Only the vectors sharing an LSH band with the vector
+    (see minhash.band_keys) are compared.
+    """
+    if vector.sketch is None:
+        return []
+
+    candidates = select(model.SketchBand.vector).where(
+        model.SketchBand.key.in_(  # type: ignore[attr-defined]
+            minhash.band_keys(vector.sketch)
+        )
+    )
+    sketches = (
+        database.query(model.Vector.id, model.Vector.sketch)
+        .filter(
+            model.Vector.id.in_(candidates),  # type: ignore[attr-defined]
+            model.Vector.users.any(id=user.id),
+            model.Vector.level == vector.level,
+            model.Vector.id != vector.id,
+        )
+        .all()
+    )
+    if not sketches:
+        return []
+
+    scores = minhash.similarities(vector.sketch, [sketch for (_, sketch) in sketches])
+    similar = {
+        vector_id: float(score)
+        for ((vector_id, _), score) in zip(sketches, scores.tolist())
+        if score >= threshold
+    }
+    return sorted(
+        (
+            (found, similar[found.id])
+            for found in database.query(model.Vector)
+            .filter(model.Vector.id.in_(similar))  # type: ignore[attr-defined]
+            .all()
+        ),
+        key=lambda pair: (-pair[1], pair[0].id),
+    )
+
+
+def get_sketches(database: Session) -> List[Tuple[int, VectorLevel, bytes]]:
+    "The (id, level, sketch) of every sketched vector."
+    return (
+        database.query(model.Vector.id, model.Vector.level, model.Vector.sketch)
+        .filter(model.Vector.sketch.isnot(None))  # type: ignore[union-attr]
+        .all()
+    )
@@ -1,12 +1,106 @@
 " Database connection "
 
-from sqlalchemy import create_engine
+from typing import Any, Dict
+import logging
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from app.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
+logger = logging.getLogger(__name__)
+
+# asyncio drivers of the supported backends (asyncpg: the "postgresql" extra)
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def async_url(url: str) -> URL:
+    "The URL of a database, with the asyncio driver of its backend."
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS[parsed.get_backend_name()]
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}")
+
+
+def engine_options(url: str, asyncio: bool = False) -> Dict[str, Any]:
+    "Engine arguments for the backend of a database URL, from the DB_ settings."
+    parsed = make_url(url)
+    options: Dict[str, Any] = {"echo": settings.DB_ECHO}
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (
+        None,
+        "",
+        ":memory:",
+    ):
+        # One connection per thread (or a single one) holds the database
+        return options
+
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    if parsed.get_backend_name() == "sqlite":
+        # SQLite opens a connection (and aiosqlite a thread) per session
+        # otherwise, and has no statement timeout
+        options["poolclass"] = AsyncAdaptedQueuePool if asyncio else QueuePool
+        if not asyncio:
+            # Pooled connections move between threads
+            options["connect_args"] = {"check_same_thread": False}
+    elif parsed.get_backend_name() == "postgresql" and settings.DB_STATEMENT_TIMEOUT:
+        timeout = str(settings.DB_STATEMENT_TIMEOUT)
+        options["connect_args"] = (
+            {"server_settings": {"statement_timeout": timeout}}
+            if asyncio
+            else {"options": f"-c statement_timeout={timeout}"}
+        )
+    return options
+
+
+def log_slow_queries(engine: Engine, threshold: float) -> None:
+    "Log the statements of an engine that take threshold milliseconds or more."
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start(_conn, _cursor, _statement, _parameters, context, _executemany):
+        context.query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop(_conn, _cursor, statement, parameters, context, _executemany):
+        elapsed = (time.perf_counter() - context.query_start) * 1000
+        if elapsed >= threshold:
+            logger.warning(
+                "Slow query (%.0f ms): %s %r", elapsed, statement, parameters
+            )
+
+
+def create_database_engine(url: str) -> Engine:
+    "An engine connecting to a database, configured for its backend."
+    engine = create_engine(url, **engine_options(url))
+    if settings.DB_SLOW_QUERY_MS:
+        log_slow_queries(engine, settings.DB_SLOW_QUERY_MS)
+    return engine
+
+
+def create_async_database_engine(url: str) -> AsyncEngine:
+    "An engine connecting to a database with the asyncio driver of its backend."
+    engine = create_async_engine(async_url(url), **engine_options(url, asyncio=True))
+    if settings.DB_SLOW_QUERY_MS:
+        log_slow_queries(engine.sync_engine, settings.DB_SLOW_QUERY_MS)
+    return engine
+
+
+engine = create_database_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Used by async endpoints, so that queries do not block the event loop
+async_engine = create_async_database_engine(settings.DATABASE_URL)
+AsyncSessionLocal = sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
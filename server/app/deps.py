@@ -1,17 +1,22 @@
 " Provides Depends() objects for all API endpoints. "
 
-from typing import AsyncGenerator, Generator
-from datetime import datetime, timezone
+from typing import AsyncGenerator, Generator, NamedTuple
+import hashlib
+import hmac
+import importlib.util
+import time
 
 import httpx
-from fastapi import Depends, Header, HTTPException, status
+from fastapi import Depends, Header, HTTPException, Request, status
 from fastapi.security.utils import get_authorization_scheme_param
 from jose import jwt
 from jose.exceptions import JWTError
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
-from app import crud, model, schemas
-from app.database import SessionLocal
+from app import crud, schemas
+from app.cache import TTLCache
+from app.database import AsyncSessionLocal, SessionLocal
 from app.config import settings
 
 
@@ -24,18 +29,72 @@ def get_db() -> Generator:
         database.close()
 
 
-async def get_http_client() -> AsyncGenerator:
-    "Provide access to an HTTP client"
+async def get_async_db() -> AsyncGenerator:
+    "Provide asyncio access to the database, for async endpoints."
+    async with AsyncSessionLocal() as database:
+        yield database
+
+
+def create_http_client() -> httpx.AsyncClient:
+    "An HTTP client pooling connections as configured, for the application's lifetime."
+    return httpx.AsyncClient(
+        http2=settings.HTTP2 and importlib.util.find_spec("h2") is not None,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT
+        ),
+    )
+
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    "Provide access to the HTTP client shared by all requests"
+    return request.app.state.http_client
+
+
+class VerifiedToken(NamedTuple):
+    "An API token, its expiry time (seconds since the epoch) and its user."
+    token: str
+    expires: float
+    user: schemas.User
+
+
+# API tokens verified until they expire, by their SHA-256 digest
+token_cache: TTLCache[bytes, VerifiedToken] = TTLCache(
+    settings.API_TOKEN_EXPIRE * 60, maxsize=settings.TOKEN_CACHE_SIZE
+)
+
+
+def verify_token(token: str) -> VerifiedToken:
+    """
+    Decode and verify an API token, or raise a JWTError.
+    Tokens are verified once and then found by digest, until they expire.
+    """
+    digest = hashlib.sha256(token.encode()).digest()
+    if (cached := token_cache.get(digest)) is not None and hmac.compare_digest(
+        cached.token, token
+    ):
+        return cached
+
+    payload = jwt.decode(token, settings.API_SECRET, settings.API_JWT_ALGORITHM)
+    if not isinstance(expires := payload.get("exp"), (int, float)):
+        raise JWTError("Token without expiry time")
     try:
-        client = httpx.AsyncClient()
-        yield client
-    finally:
-        await client.aclose()
+        verified = VerifiedToken(token, expires, schemas.User(**payload))
+    except ValidationError as err:
+        raise JWTError("Invalid token claims") from err
+
+    if (ttl := expires - time.time()) > 0:
+        token_cache.set(digest, verified, ttl=ttl)
+    return verified
 
 
 def get_current_user(
     database: Session = Depends(get_db), authorization: str = Header(None)
-) -> model.User:
+) -> schemas.User:
     "Provide access to the User currently accessing the API."
     unknown_user = HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
@@ -53,29 +112,30 @@ def get_current_user(
         raise credentials_error
 
     try:
-        payload = jwt.decode(token, settings.API_SECRET, settings.API_JWT_ALGORITHM)
+        verified = verify_token(token)
     except JWTError as err:
         raise HTTPException(  # pylint: disable=raise-missing-from
             status_code=status.HTTP_401_UNAUTHORIZED, detail=str(err)
         )
 
-    expiry = datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
-    current_time = datetime.now(tz=timezone.utc)
-    if expiry < current_time:
+    if verified.expires < time.time():
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Credentials expired"
         )
 
-    user = schemas.User(**payload)
-    if not (db_user := crud.get_user(database, user_id=user.id)):
+    if not (
+        cached := crud.get_cached_user(
+            database, user_id=verified.user.id, expires=verified.expires
+        )
+    ):
         raise unknown_user
 
-    return db_user
+    return cached
 
 
 def get_current_admin(
-    current_user: model.User = Depends(get_current_user),
-) -> model.User:
+    current_user: schemas.User = Depends(get_current_user),
+) -> schemas.User:
     "Provide access to the Admin currently accessing the API."
     if not crud.is_admin(current_user):
         raise HTTPException(
@@ -0,0 +1,370 @@
+"""
+Bulk export of vectors.
+
+Vectors are read from the database in batches and their files are
+written one after the other, so the memory used does not grow with the
+number of vectors exported.
+
+Export formats are registered in SERIALIZERS. A serializer writes the
+record of a single vector as chunks of text; documents with several
+records are made of the serializer's header, the records separated by
+its separator, and its footer.
+"""
+
+from typing import (
+    IO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    cast,
+)
+from xml.sax.saxutils import escape, quoteattr
+import json
+import re
+import zipfile
+
+from sqlalchemy.orm import Session
+
+from app import crud, model
+from app.config import settings
+from app.features import vector_features
+from app.genbank import write_genbank
+from app.level import VectorLevel, is_circular
+
+# Vectors loaded (with their features, annotations, ...) per query
+BATCH_SIZE = 50
+
+Records = Callable[[model.Vector], Iterator[str]]
+
+
+class Serializer(NamedTuple):
+    "An export format."
+    name: str
+    media_type: str
+    extension: str
+    records: Records
+    header: str = ""
+    separator: str = ""
+    footer: str = ""
+    sequence_only: bool = False  # features etc. are not needed
+
+
+SERIALIZERS: Dict[str, Serializer] = {}
+
+
+def serializer(
+    name: str,
+    media_type: str,
+    extension: str,
+    header: str = "",
+    separator: str = "",
+    footer: str = "",
+    sequence_only: bool = False,
+) -> Callable[[Records], Records]:
+    "Registers the decorated function as the writer of an export format."
+
+    def register(records: Records) -> Records:
+        SERIALIZERS[name] = Serializer(
+            name=name,
+            media_type=media_type,
+            extension=extension,
+            records=records,
+            header=header,
+            separator=separator,
+            footer=footer,
+            sequence_only=sequence_only,
+        )
+        return records
+
+    return register
+
+
+def negotiate(accept: Optional[str]) -> Optional[Serializer]:
+    """
+    The serializer for the preferred media type of an Accept header.
+    GenBank is used when anything is accepted, None if nothing matches.
+    """
+    if not accept:
+        return SERIALIZERS["genbank"]
+
+    ranges = []
+    for (index, media_range) in enumerate(accept.split(",")):
+        (media_type, *params) = [part.strip() for part in media_range.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            ranges.append((-quality, index, media_type.lower()))
+
+    for (_, _, media_type) in sorted(ranges):
+        if media_type in ("*/*", "text/*"):
+            return SERIALIZERS["genbank"]
+        for found in SERIALIZERS.values():
+            if found.media_type == media_type:
+                return found
+
+    return None
+
+
+def batched_vectors(
+    database: Session, ids: List[int], sequence_only: bool = False
+) -> Iterator[model.Vector]:
+    "The vectors with the given IDs, in order, loaded BATCH_SIZE at a time."
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield from crud.get_vectors_for_export(
+            database, ids[start : start + BATCH_SIZE], sequence_only=sequence_only
+        )
+
+
+def _label(vector: model.Vector) -> str:
+    "Name of a vector usable as an identifier."
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", vector.name)
+
+
+@serializer("genbank", media_type="text/plain", extension="gbk")
+def genbank_records(vector: model.Vector) -> Iterator[str]:
+    """
+    GenBank text of a vector: submitted files are used as they are, level 1
+    files come from the export cache or are generated.
+    """
+    if vector.level != VectorLevel.LEVEL1 and vector.genbank:
+        text = vector.genbank
+    elif (cached := crud.get_cached_genbank(vector)) is not None:
+        text = cached
+    else:
+        yield from write_genbank(vector)
+        return
+
+    yield text if text.endswith("\n") else text + "\n"
+
+
+@serializer("fasta", media_type="text/x-fasta", extension="fasta", sequence_only=True)
+def fasta_records(vector: model.Vector) -> Iterator[str]:
+    "FASTA record of a vector, 60 bases per line."
+    yield (
+        f">{_label(vector)} id={vector.id} level={vector.level.name} "
+        f"length={len(vector.sequence)}\n"
+    )
+    for start in range(0, len(vector.sequence), 60_000):
+        block = vector.sequence[start : start + 60_000]
+        yield "".join(
+            block[line : line + 60] + "\n" for line in range(0, len(block), 60)
+        )
+
+
+@serializer(
+    "json",
+    media_type="application/json",
+    extension="json",
+    header="[",
+    separator=",",
+    footer="]\n",
+)
+def json_records(vector: model.Vector) -> Iterator[str]:
+    "JSON object of a vector, using the field names of the API schemas."
+    yield json.dumps(
+        {
+            "id": vector.id,
+            "name": vector.name,
+            "level": vector.level.value,
+            "location": vector.location,
+            "group": vector.group,
+            "left_overhang": vector.left_overhang,
+            "right_overhang": vector.right_overhang,
+            "sequence": vector.sequence,
+            "annotations": [
+                {"key": ann.key, "value": ann.value} for ann in vector.annotations
+            ],
+            "references": [
+                {"authors": ref.authors, "title": ref.title}
+                for ref in vector.references
+            ],
+            "features": [
+                {
+                    "type": feature.type,
+                    "start_pos": feature.start_pos,
+                    "end_pos": feature.end_pos,
+                    "strand": feature.strand,
+                    "qualifiers": [
+                        {"key": qual.key, "value": qual.value}
+                        for qual in feature.qualifiers
+                    ],
+                }
+                for feature in vector_features(vector)
+            ],
+        },
+        separators=(",", ":"),
+    )
+
+
+# Sequence Ontology terms of common GenBank feature types
+_SO_ROLES = {
+    "CDS": "SO:0000316",
+    "promoter": "SO:0000167",
+    "terminator": "SO:0000141",
+    "rep_origin": "SO:0000296",
+    "primer_bind": "SO:0005850",
+    "primer": "SO:0000112",
+    "RBS": "SO:0000139",
+    "polyA_signal": "SO:0000551",
+    "protein_bind": "SO:0000410",
+    "misc_recomb": "SO:0000298",
+    "lncRNA": "SO:0001877",
+    "gene": "SO:0000704",
+}
+
+_SBOL_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" '
+    'xmlns:dcterms="http://purl.org/dc/terms/" '
+    'xmlns:prov="http://www.w3.org/ns/prov#" '
+    'xmlns:sbol="http://sbols.org/v2#">\n'
+)
+
+
+def _sbol_identity(uri: str, display_id: str) -> str:
+    "Properties shared by all SBOL objects (uri is without version)."
+    return (
+        f"<sbol:persistentIdentity rdf:resource={quoteattr(uri)}/>"
+        f"<sbol:displayId>{display_id}</sbol:displayId>"
+        "<sbol:version>1</sbol:version>"
+    )
+
+
+def _sbol_location(uri: str, feature: model.Feature) -> str:
+    "A Range, or a Cut for zero-length features."
+    orientation = "reverseComplement" if feature.strand == -1 else "inline"
+    if feature.start_pos < feature.end_pos:
+        (kind, display_id) = ("Range", "range")
+        position = (
+            f"<sbol:start>{feature.start_pos + 1}</sbol:start>"
+            f"<sbol:end>{feature.end_pos}</sbol:end>"
+        )
+    else:
+        (kind, display_id) = ("Cut", "cut")
+        position = f"<sbol:at>{feature.end_pos}</sbol:at>"
+
+    return (
+        f'<sbol:{kind} rdf:about="{uri}/{display_id}/1">'
+        + _sbol_identity(f"{uri}/{display_id}", display_id)
+        + position
+        + f'<sbol:orientation rdf:resource="http://sbols.org/v2#{orientation}"/>'
+        f"</sbol:{kind}>"
+    )
+
+
+def _sbol_annotation(uri: str, index: int, feature: model.Feature) -> str:
+    "An SBOL SequenceAnnotation for a feature of a ComponentDefinition."
+    display_id = f"annotation{index}"
+    annotation = f"{uri}/{display_id}"
+    labels = [qual.value for qual in feature.qualifiers if qual.key == "label"]
+    role = _SO_ROLES.get(feature.type, "SO:0000001")
+    return (
+        "<sbol:sequenceAnnotation>"
+        f'<sbol:SequenceAnnotation rdf:about="{annotation}/1">'
+        + _sbol_identity(annotation, display_id)
+        + f"<dcterms:title>{escape(labels[0] if labels else feature.type)}"
+        "</dcterms:title>"
+        f"<sbol:location>{_sbol_location(annotation, feature)}</sbol:location>"
+        f'<sbol:role rdf:resource="http://identifiers.org/so/{role}"/>'
+        "</sbol:SequenceAnnotation></sbol:sequenceAnnotation>\n"
+    )
+
+
+@serializer(
+    "sbol",
+    media_type="application/rdf+xml",
+    extension="xml",
+    header=_SBOL_HEADER,
+    footer="</rdf:RDF>\n",
+)
+def sbol_records(vector: model.Vector) -> Iterator[str]:
+    "SBOL 2 ComponentDefinition and Sequence of a vector."
+    display_id = f"vector_{vector.id}"
+    uri = f"{settings.SBOL_NAMESPACE.rstrip('/')}/{display_id}"
+    topology = "SO:0000988" if is_circular(vector.level) else "SO:0000987"
+    yield (
+        f'<sbol:ComponentDefinition rdf:about="{uri}/1">'
+        + _sbol_identity(uri, display_id)
+        + f"<dcterms:title>{escape(vector.name)}</dcterms:title>"
+        '<sbol:type rdf:resource="http://www.biopax.org/release/'
+        'biopax-level3.owl#DnaRegion"/>'
+        f'<sbol:type rdf:resource="http://identifiers.org/so/{topology}"/>'
+        '<sbol:role rdf:resource="http://identifiers.org/so/SO:0000155"/>'
+        f'<sbol:sequence rdf:resource="{uri}_sequence/1"/>\n'
+    )
+    for (index, feature) in enumerate(vector_features(vector)):
+        yield _sbol_annotation(uri, index, feature)
+    yield "</sbol:ComponentDefinition>\n"
+
+    yield (
+        f'<sbol:Sequence rdf:about="{uri}_sequence/1">'
+        + _sbol_identity(f"{uri}_sequence", f"{display_id}_sequence")
+        + f"<sbol:elements>{escape(vector.sequence.lower())}</sbol:elements>"
+        '<sbol:encoding rdf:resource="http://www.chem.qmul.ac.uk/iubmb/misc/'
+        'naseq.html"/>'
+        "</sbol:Sequence>\n"
+    )
+
+
+def file_name(vector: model.Vector, extension: str = "gbk") -> str:
+    "Name of the file of a vector within an archive."
+    return f"{vector.id}_{_label(vector)}.{extension}"
+
+
+def document(
+    vectors: Iterable[model.Vector], fmt: Serializer = SERIALIZERS["genbank"]
+) -> Iterator[bytes]:
+    "A single document with the records of all vectors."
+    yield fmt.header.encode()
+    for (index, vector) in enumerate(vectors):
+        if index:
+            yield fmt.separator.encode()
+        for chunk in fmt.records(vector):
+            yield chunk.encode()
+    yield fmt.footer.encode()
+
+
+class _Chunks:
+    "Unseekable file object collecting what is written to it."
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        "Nothing to flush, written data is kept until drained."
+
+    def drain(self) -> bytes:
+        "Everything written since the last drain."
+        (data, self._chunks) = (b"".join(self._chunks), [])
+        return data
+
+
+def zip_archive(
+    vectors: Iterable[model.Vector], fmt: Serializer = SERIALIZERS["genbank"]
+) -> Iterator[bytes]:
+    "A ZIP archive with one file (document) per vector, produced as it is written."
+    output = _Chunks()
+    with zipfile.ZipFile(
+        cast(IO[bytes], output), mode="w", compression=zipfile.ZIP_DEFLATED
+    ) as archive:
+        for vector in vectors:
+            with archive.open(file_name(vector, fmt.extension), mode="w") as entry:
+                for chunk in document([vector], fmt):
+                    entry.write(chunk)
+                    if data := output.drain():
+                        yield data
+
+    yield output.drain()
@@ -0,0 +1,352 @@
+"""
+Columnar representation of sequence features.
+
+Positions, strands and types are kept in NumPy arrays so that digest
+filtering, rotation of circular backbones and the shifts applied when
+concatenating parts are single array operations. Qualifiers are not
+touched by these operations and are only referenced by row.
+
+The features of a vector can also be stored as a single blob (see
+encode_features), read in one step instead of one row per feature and
+qualifier.
+"""
+
+from typing import (
+    Any,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+import json
+
+import numpy as np
+from Bio.SeqRecord import SeqRecord
+
+from app.config import settings
+from app.level import VectorLevel
+from app.schemas import Feature, Qualifier
+
+# Stored in the strand column for features without a strand
+NO_STRAND = int(np.iinfo(np.int8).min)
+
+# A feature as plain values: type, start, end, strand and qualifiers
+Record = Tuple[Optional[str], int, int, Optional[int], List[Any]]
+
+
+class QualifierPair(NamedTuple):
+    "A qualifier read from a features blob, without validation."
+    key: str
+    value: Optional[str]
+
+
+def _type_codes(
+    types: Iterable[Optional[str]],
+) -> Tuple[List[Optional[str]], np.ndarray]:
+    "The distinct types (sorted, None last) and the index of each type in them."
+    types = list(types)
+    names: List[Optional[str]] = []
+    names.extend(sorted({name for name in types if name is not None}))
+    if None in types:
+        names.append(None)
+    codes = {name: code for (code, name) in enumerate(names)}
+    return (
+        names,
+        np.fromiter((codes[name] for name in types), dtype=np.int32, count=len(types)),
+    )
+
+
+class FeatureTable:
+    "Features of a single sequence, one row per feature."
+
+    def __init__(
+        self,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        strands: np.ndarray,
+        type_codes: np.ndarray,
+        types: List[Optional[str]],
+        qualifiers: List[List[Any]],
+        rows: Optional[np.ndarray] = None,
+    ):
+        self.starts = starts
+        self.ends = ends
+        self.strands = strands
+        self.type_codes = type_codes  # index into `types`
+        self.types = types
+        self.qualifiers = qualifiers  # indexed by `rows`, with key and value
+        self.rows = np.arange(len(starts)) if rows is None else rows
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @classmethod
+    def from_columns(
+        cls,
+        starts: Sequence[int],
+        ends: Sequence[int],
+        strands: Sequence[Optional[int]],
+        types: Sequence[Optional[str]],
+        qualifiers: List[List[Any]],
+    ) -> "FeatureTable":
+        "Build a table from one sequence per column."
+        (names, codes) = _type_codes(types)
+        return cls(
+            starts=np.asarray(starts, dtype=np.int64),
+            ends=np.asarray(ends, dtype=np.int64),
+            strands=np.asarray(
+                [NO_STRAND if strand is None else strand for strand in strands],
+                dtype=np.int8,
+            ),
+            type_codes=codes,
+            types=names,
+            qualifiers=qualifiers,
+        )
+
+    @classmethod
+    def from_features(cls, features: Sequence[Any]) -> "FeatureTable":
+        "Build a table from schemas.Feature or model.Feature objects."
+        return cls.from_columns(
+            starts=[feature.start_pos for feature in features],
+            ends=[feature.end_pos for feature in features],
+            strands=[feature.strand for feature in features],
+            types=[feature.type for feature in features],
+            qualifiers=[list(feature.qualifiers) for feature in features],
+        )
+
+    @classmethod
+    def from_vector(cls, vector: Any) -> "FeatureTable":
+        """
+        The features of a model.Vector: decoded from its features blob if it
+        has one (see encode_features), from its feature rows otherwise.
+        """
+        if (blob := _features_blob(vector)) is None:
+            return cls.from_features(vector.features)
+
+        stored = json.loads(blob)
+        rows = stored["features"]
+        return cls(
+            starts=np.fromiter((row[1] for row in rows), np.int64, len(rows)),
+            ends=np.fromiter((row[2] for row in rows), np.int64, len(rows)),
+            strands=np.fromiter(
+                (NO_STRAND if row[3] is None else row[3] for row in rows),
+                np.int8,
+                len(rows),
+            ),
+            type_codes=np.fromiter((row[0] for row in rows), np.int32, len(rows)),
+            types=stored["types"],
+            qualifiers=[
+                [QualifierPair(*pair) for pair in zip(row[4][::2], row[4][1::2])]
+                for row in rows
+            ],
+        )
+
+    @classmethod
+    def from_seqrecord(cls, record: SeqRecord) -> "FeatureTable":
+        "The features of a record parsed by BioPython."
+        features = record.features
+        return cls.from_columns(
+            starts=[int(feature.location.start) for feature in features],
+            ends=[int(feature.location.end) for feature in features],
+            strands=[feature.location.strand for feature in features],
+            types=[feature.type for feature in features],
+            qualifiers=[
+                [
+                    Qualifier(key=key, value=str(value))
+                    for (key, value) in feature.qualifiers.items()
+                ]
+                for feature in features
+            ],
+        )
+
+    @classmethod
+    def concat(
+        cls, tables: Sequence["FeatureTable"], offsets: Iterable[int]
+    ) -> "FeatureTable":
+        "Concatenate tables, shifting the positions of each by its offset."
+        tables = list(tables)
+        shifts = [
+            np.full(len(table), offset, dtype=np.int64)
+            for (table, offset) in zip(tables, offsets)
+        ]
+        shift = np.concatenate(shifts) if shifts else np.zeros(0, dtype=np.int64)
+
+        (types, recodes) = _type_codes(name for table in tables for name in table.types)
+        qualifiers: List[List[Any]] = []
+        (rows, type_codes) = ([], [])
+        for table in tables:
+            rows.append(table.rows + len(qualifiers))
+            qualifiers.extend(table.qualifiers)
+            (recode, recodes) = np.split(recodes, [len(table.types)])
+            type_codes.append(recode[table.type_codes])
+
+        def joined(columns: List[np.ndarray], dtype: Any) -> np.ndarray:
+            return np.concatenate(columns) if columns else np.zeros(0, dtype=dtype)
+
+        return cls(
+            starts=joined([table.starts for table in tables], np.int64) + shift,
+            ends=joined([table.ends for table in tables], np.int64) + shift,
+            strands=joined([table.strands for table in tables], np.int8),
+            type_codes=joined(type_codes, np.int32),
+            types=types,
+            qualifiers=qualifiers,
+            rows=joined(rows, np.int64),
+        )
+
+    def take(self, positions: np.ndarray) -> "FeatureTable":
+        "A table with only the given rows."
+        return FeatureTable(
+            starts=self.starts[positions],
+            ends=self.ends[positions],
+            strands=self.strands[positions],
+            type_codes=self.type_codes[positions],
+            types=self.types,
+            qualifiers=self.qualifiers,
+            rows=self.rows[positions],
+        )
+
+    def shifted(self, shift: Union[int, np.ndarray]) -> "FeatureTable":
+        "A table with all positions moved by shift (a scalar or one per row)."
+        return FeatureTable(
+            starts=self.starts + shift,
+            ends=self.ends + shift,
+            strands=self.strands,
+            type_codes=self.type_codes,
+            types=self.types,
+            qualifiers=self.qualifiers,
+            rows=self.rows,
+        )
+
+    def repositioned(
+        self, bsa_left: int, bsa_right: int, sequence_length: int, level: VectorLevel
+    ) -> "FeatureTable":
+        """
+        Positions relative to the digested fragment after a BsaI digest.
+        Backbone fragments wrap around the origin, so features after the cut
+        out region move to the front and the others follow them.
+        """
+        start = min(bsa_left, bsa_right)
+        end = max(bsa_left, bsa_right)
+
+        if level == VectorLevel.LEVEL0:
+            return self.shifted(-start)
+        if level == VectorLevel.BACKBONE:
+            return self.shifted(
+                np.where(self.starts >= end, -end, sequence_length - end)
+            )
+
+        raise ValueError(
+            f"Error in adjusting feature positions. Incorrect VectorLevel: '{level}'"
+        )
+
+    def records(self) -> List[Record]:
+        "The type, start, end, strand and qualifiers of each row."
+        return [
+            (
+                self.types[code],
+                start,
+                end,
+                None if strand == NO_STRAND else strand,
+                self.qualifiers[row],
+            )
+            for (start, end, strand, code, row) in zip(
+                self.starts.tolist(),
+                self.ends.tolist(),
+                self.strands.tolist(),
+                self.type_codes.tolist(),
+                self.rows.tolist(),
+            )
+        ]
+
+    def to_features(self) -> List[Feature]:
+        "The rows as schemas.Feature objects."
+        return [
+            Feature(
+                type=type_,
+                qualifiers=qualifiers,
+                start_pos=start,
+                end_pos=end,
+                strand=strand,
+            )
+            for (type_, start, end, strand, qualifiers) in self.records()
+        ]
+
+
+# Fields set when decoding stored features without validation
+_FEATURE_FIELDS = {"type", "qualifiers", "start_pos", "end_pos", "strand"}
+_QUALIFIER_FIELDS = {"key", "value"}
+
+
+def encode_features(features: Any) -> bytes:
+    """
+    The features (a FeatureTable, or schemas.Feature or model.Feature objects)
+    of a vector as a JSON blob: the list of their types and a list with the
+    type (index), start, end, strand and flattened qualifier keys and values
+    of each.
+    """
+    table = (
+        features
+        if isinstance(features, FeatureTable)
+        else FeatureTable.from_features(features)
+    )
+    rows = [
+        [
+            code,
+            start,
+            end,
+            None if strand == NO_STRAND else strand,
+            [part for qual in table.qualifiers[row] for part in (qual.key, qual.value)],
+        ]
+        for (start, end, strand, code, row) in zip(
+            table.starts.tolist(),
+            table.ends.tolist(),
+            table.strands.tolist(),
+            table.type_codes.tolist(),
+            table.rows.tolist(),
+        )
+    ]
+    return json.dumps(
+        {"types": table.types, "features": rows}, separators=(",", ":")
+    ).encode()
+
+
+def decode_features(blob: bytes) -> List[Feature]:
+    "The features of a blob written by encode_features."
+    stored = json.loads(blob)
+    types = stored["types"]
+    # The blob was written from validated features
+    return [
+        Feature.construct(
+            _FEATURE_FIELDS,
+            type=types[code],
+            qualifiers=[
+                Qualifier.construct(_QUALIFIER_FIELDS, key=key, value=value)
+                for (key, value) in zip(parts[::2], parts[1::2])
+            ],
+            start_pos=start,
+            end_pos=end,
+            strand=strand,
+        )
+        for (code, start, end, strand, parts) in stored["features"]
+    ]
+
+
+def _features_blob(vector: Any) -> Optional[bytes]:
+    """
+    The features blob of a model.Vector, only read when settings.FEATURE_BLOBS
+    is on: the blob column is deferred and loaded up front only then.
+    """
+    return vector.features_blob if settings.FEATURE_BLOBS else None
+
+
+def vector_features(vector: Any) -> Sequence[Any]:
+    """
+    The features of a model.Vector: decoded from its features blob if it
+    has one, from the features and qualifiers tables otherwise.
+    """
+    if (blob := _features_blob(vector)) is not None:
+        return decode_features(blob)
+    return vector.features
@@ -1,22 +1,21 @@
-from typing import Tuple, Callable, Any
+from typing import Dict, Iterator, List, Optional, Tuple
 import datetime
 import io
+import re
 
+import numpy as np
 from Bio import SeqIO
 from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
 import Bio.SeqFeature
 from fastapi import Depends
 from sqlalchemy.orm import Session
 
 
+from app.features import FeatureTable, vector_features
+from app.intervals import IntervalIndex
 from app.level import VectorLevel
-from app.schemas import (
-    GenbankData,
-    Annotation,
-    Feature,
-    VectorReference,
-    Qualifier,
-)
+from app.schemas import Annotation, GenbankData, Feature, VectorReference
 
 from app import model, deps
 
@@ -47,24 +46,42 @@ def digest_sequence(level: VectorLevel, sequence: str) -> Tuple[int, int, str]:
     return (pos_bsa1_left, pos_bsa1_right, str(digested_sequence))
 
 
-def filter_features(left: int, right: int, level: VectorLevel) -> Callable[[Any], bool]:
-    def my_filter(feature: Any) -> bool:
-        if level == VectorLevel.BACKBONE:
-            start = min(left, right)
-            end = max(left, right)
-            return (
-                feature.location.nofuzzy_start > end
-                or feature.location.nofuzzy_end < start
-            )
-        elif level == VectorLevel.LEVEL0:
-            return (
-                feature.location.nofuzzy_start >= left
-                and feature.location.nofuzzy_end <= right
-            )
-        else:
-            return False
+OVERHANG_LENGTH = 4
+
+
+def digest_overhangs(level: VectorLevel, sequence: str) -> Tuple[str, str]:
+    """
+    The BsaI overhangs at both ends of the digested fragment of a backbone or
+    level 0 vector: the left one is the start of the fragment, the right one
+    is the overhang just after it, which will be the start of the next part
+    in an assembly.
+    """
+    (left, right, digested) = digest_sequence(level, sequence)
+
+    start = right if level == VectorLevel.BACKBONE and left < right else left
+    end = (start + len(digested)) % len(sequence)
+    circular = str(sequence + sequence[:OVERHANG_LENGTH]).upper()
+
+    return (
+        circular[start : start + OVERHANG_LENGTH],
+        circular[end : end + OVERHANG_LENGTH],
+    )
+
 
-    return my_filter
+def digest_features(
+    left: int, right: int, level: VectorLevel, index: IntervalIndex
+) -> np.ndarray:
+    """
+    Positions of the features that remain after a BsaI digest:
+    the features outside the cut out region of a backbone and the
+    features inside the digested fragment of a level 0 vector.
+    """
+    if level == VectorLevel.BACKBONE:
+        return index.outside(min(left, right), max(left, right))
+    if level == VectorLevel.LEVEL0:
+        return index.within(left, right)
+
+    return np.zeros(0, dtype=np.int64)
 
 
 def reposition_features(
@@ -76,35 +93,34 @@ def reposition_features(
 ) -> Feature:
     """
     Function that repositions the features after performing a BsaI digest.
+    See `FeatureTable.repositioned` to reposition many features at once.
     """
-    new_feature_start_pos = 0
-    new_feature_end_pos = 0
+    return (
+        FeatureTable.from_features([feature])
+        .repositioned(bsa_left, bsa_right, sequence_length, level)
+        .to_features()[0]
+    )
 
-    start = min(bsa_left, bsa_right)
-    end = max(bsa_left, bsa_right)
 
-    if level == VectorLevel.LEVEL0:
-        new_feature_start_pos = feature.start_pos - start
-        new_feature_end_pos = feature.end_pos - start
-    elif level == VectorLevel.BACKBONE:
-        if feature.start_pos >= end:
-            new_feature_start_pos = feature.start_pos - end
-            new_feature_end_pos = feature.end_pos - end
+def record_annotations(
+    record: SeqRecord,
+) -> Tuple[List[Annotation], List[VectorReference]]:
+    "The annotations and the references of a record parsed by BioPython."
+    annotations = []
+    references = []
+    for (key, value) in record.annotations.items():
+        # All annotations are strings, integers or list of them but references
+        # are a special case. References are objects that can be deconstructed
+        # to an author and a title, both strings.
+        if key == "references":
+            references = [
+                VectorReference(authors=reference.authors, title=reference.title)
+                for reference in value
+            ]
         else:
-            new_feature_start_pos = feature.start_pos + (sequence_length - end)
-            new_feature_end_pos = feature.end_pos + (sequence_length - end)
-    else:
-        raise ValueError(
-            f"Error in adjusting feature positions. Incorrect VectorLevel: '{level}'"
-        )
+            annotations.append(Annotation(key=key, value=str(value)))
 
-    return Feature(
-        type=feature.type,
-        qualifiers=feature.qualifiers,
-        start_pos=new_feature_start_pos,
-        end_pos=new_feature_end_pos,
-        strand=feature.strand,
-    )
+    return (annotations, references)
 
 
 def convert_gbk_to_vector(genbank_file, level: VectorLevel) -> GenbankData:
@@ -113,49 +129,22 @@ def convert_gbk_to_vector(genbank_file, level: VectorLevel) -> GenbankData:
     """
     # Reading the genbank file
     record = SeqIO.read(genbank_file, "genbank")
-
-    (start, end, sequence) = digest_sequence(level, record.seq)
-
-    # Getting the annotations
-    annotations = []
-    references = []
-    for key, val in record.annotations.items():
-        # All annotations are strings, integers or list of them but references are a special case.
-        # References are objects that can be deconstructed to an author and a title, both strings.
-        if key == "references":
-            for reference in record.annotations["references"]:
-                references.append(
-                    VectorReference(authors=reference.authors, title=reference.title)
-                )
-        else:
-            annotations.append(Annotation(key=key, value=str(val)))
-
-    # Getting the features:
-    # print(f"(Start, end, level) = {(start, end, level)}")
-    features = []
-    for feature in filter(filter_features(start, end, level), record.features):
-        new_qualifiers = [
-            Qualifier(key=key, value=str(value))
-            for key, value in feature.qualifiers.items()
-        ]
-        # print(
-        #     f"No fuzzy start:{feature.location.nofuzzy_start}\tNo fuzzy end:{feature.location.nofuzzy_end}"
-        # )
-        features.append(
-            reposition_features(
-                bsa_left=start,
-                bsa_right=end,
-                sequence_length=len(sequence),
-                level=level,
-                feature=Feature(
-                    type=feature.type,
-                    qualifiers=new_qualifiers,
-                    start_pos=feature.location.nofuzzy_start,
-                    end_pos=feature.location.nofuzzy_end,
-                    strand=feature.location.strand,
-                ),
-            )
+    full_sequence = str(record.seq)
+
+    (start, end, sequence) = digest_sequence(level, full_sequence)
+    (left_overhang, right_overhang) = digest_overhangs(level, full_sequence)
+    (annotations, references) = record_annotations(record)
+
+    # Only keeping (and repositioning) the features left after the digest
+    table = FeatureTable.from_seqrecord(record)
+    kept = digest_features(start, end, level, IntervalIndex(table.starts, table.ends))
+    features = (
+        table.take(kept)
+        .repositioned(
+            bsa_left=start, bsa_right=end, sequence_length=len(sequence), level=level
         )
+        .to_features()
+    )
 
     assert isinstance(sequence, str)
 
@@ -164,6 +153,8 @@ def convert_gbk_to_vector(genbank_file, level: VectorLevel) -> GenbankData:
         annotations=annotations,
         features=features,
         references=references,
+        left_overhang=left_overhang,
+        right_overhang=right_overhang,
     )
 
 
@@ -213,13 +204,9 @@ def serialize_to_genbank(vector: model.Vector) -> str:
 
     # Features
     feature_list = []
-    for vector_feature in vector.features:
+    for vector_feature in vector_features(vector):
         feature_qualifiers = vector_feature.qualifiers
 
-        print(
-            f"Feature id {vector_feature.id} location (start:{vector_feature.start_pos}, end:{vector_feature.end_pos})"
-        )
-
         feat = Bio.SeqFeature.SeqFeature(
             type=vector_feature.type,
             location=Bio.SeqFeature.FeatureLocation(
@@ -243,6 +230,282 @@ def serialize_to_genbank(vector: model.Vector) -> str:
         return outf.getvalue()
 
 
+# Native GenBank writer, producing the same text as serialize_to_genbank
+# (the GenBankWriter of the pinned BioPython, 1.81) without building a SeqRecord
+
+_MAX_WIDTH = 80
+_HEADER_WIDTH = 12
+_QUALIFIER_INDENT = 21
+_LETTERS_PER_LINE = 60
+
+# Qualifiers written without quotes
+_FTQUAL_NO_QUOTE = (
+    "anticodon",
+    "citation",
+    "codon_start",
+    "compare",
+    "direction",
+    "estimated_length",
+    "mod_base",
+    "number",
+    "rpt_type",
+    "rpt_unit_range",
+    "tag_peptide",
+    "transl_except",
+    "transl_table",
+)
+
+_DIVISIONS = (
+    "PRI ROD MAM VRT INV PLN BCT VRL PHG SYN UNA EST PAT STS GSS HTG HTC ENV CON TSA"
+).split()
+_EMBL_DIVISIONS = {
+    "FUN": "PLN",
+    "HUM": "PRI",
+    "MUS": "ROD",
+    "PRO": "BCT",
+    "UNC": "UNK",
+    "XXX": "UNK",
+}
+_MONTHS = "JAN FEB MAR APR MAY JUN JUL AUG SEP OCT NOV DEC".split()
+
+
+def _single_line(tag: str, text: str) -> str:
+    return f"{tag.ljust(_HEADER_WIDTH)}{text.replace(chr(10), ' ')}\n"
+
+
+def _multi_line(tag: str, text: str) -> str:
+    "Words of text wrapped over as many header lines as needed."
+    max_len = _MAX_WIDTH - _HEADER_WIDTH
+    text = text.strip()
+    if len(text) <= max_len:
+        return _single_line(tag, text)
+
+    lines: List[str] = []
+    words = text.split()
+    while words:
+        line = words.pop(0) if lines else ""
+        while words and len(line) + 1 + len(words[0]) <= max_len:
+            line = (line + " " + words.pop(0)).strip()
+        lines.append(line)
+
+    return _single_line(tag, lines[0]) + "".join(
+        _single_line("", line) for line in lines[1:]
+    )
+
+
+def _genbank_date(date: Optional[str]) -> str:
+    default = "01-JAN-1980"
+    if date is None or len(date) != 11:
+        return default
+    try:
+        datetime.datetime(int(date[-4:]), _MONTHS.index(date[3:6]) + 1, int(date[0:2]))
+    except ValueError:
+        return default
+    return date
+
+
+def _locus_line(locus: str, length: int, annotations: Dict[str, str]) -> str:
+    if len(locus.split()) > 1:
+        raise ValueError(f"Invalid whitespace in {locus!r} for LOCUS line")
+
+    mol_type = annotations["molecule_type"]
+    if len(mol_type) > 7:
+        mol_type = mol_type.replace("unassigned ", "").replace("genomic ", "")
+        if len(mol_type) > 7:
+            mol_type = "DNA"
+    if mol_type in ["protein", "PROTEIN"]:
+        mol_type = ""
+    units = "bp" if mol_type else "aa"
+
+    topology = annotations.get("topology", "")
+    topology = topology.ljust(8) if topology and len(topology) <= 8 else " " * 8
+
+    division = annotations.get("data_file_division", "UNK")
+    if division not in _DIVISIONS:
+        division = _EMBL_DIVISIONS.get(division, "UNK")
+
+    if len(locus) > 16 and len(str(length)) > (11 - (len(locus) - 16)):
+        name_length = f"{locus} {length}"
+    else:
+        name_length = locus + str(length).rjust(28)[len(locus) :]
+
+    return (
+        f"LOCUS       {name_length} {units}    {mol_type.ljust(7)} {topology} "
+        f"{division} {_genbank_date(annotations.get('date'))}\n"
+    )
+
+
+def _location(start: int, end: int, strand: Optional[int], length: int) -> str:
+    if start == end:
+        location = f"{length}^1" if end == length else f"{end}^{end + 1}"
+    elif start + 1 == end:
+        location = str(end)
+    else:
+        location = f"{start + 1}..{end}"
+    return f"complement({location})" if strand == -1 else location
+
+
+def _qualifier(key: str, value: Optional[str]) -> str:
+    "A feature qualifier, wrapped at spaces where possible."
+    indent = " " * _QUALIFIER_INDENT
+    if value is None:
+        return f"{indent}/{key}\n"
+
+    value = value.replace('"', '""')
+    line = (
+        f"{indent}/{key}={value}"
+        if key in _FTQUAL_NO_QUOTE
+        else f'{indent}/{key}="{value}"'
+    )
+    lines = []
+    while len(line) > _MAX_WIDTH and line.lstrip():
+        index = next(
+            (
+                index
+                for index in range(
+                    min(len(line) - 1, _MAX_WIDTH), _QUALIFIER_INDENT + 1, -1
+                )
+                if line[index] == " "
+            ),
+            _MAX_WIDTH,
+        )
+        lines.append(line[:index] + "\n")
+        line = indent + line[index:].lstrip()
+    if line.lstrip() or not lines:
+        lines.append(line + "\n")
+
+    return "".join(lines)
+
+
+def _feature(feature: model.Feature, length: int) -> str:
+    if not feature.type:
+        raise ValueError("Feature without a type")
+
+    # Repeated keys keep the position of their first occurrence
+    qualifiers: Dict[str, Optional[str]] = {}
+    for qual in feature.qualifiers:
+        qualifiers[qual.key] = qual.value
+
+    location = _location(feature.start_pos, feature.end_pos, feature.strand, length)
+    return (
+        f"     {feature.type.replace(' ', '_')}                "[:_QUALIFIER_INDENT]
+        + location
+        + "\n"
+        + "".join(_qualifier(key, value) for (key, value) in qualifiers.items())
+    )
+
+
+def _header(vector: model.Vector) -> str:
+    "LOCUS line up to (not including) the FEATURES table."
+    annotations = {"molecule_type": "circular dsDNA"}
+    annotations.update((ann.key, ann.value) for ann in vector.annotations)
+    if "structured_comment" in annotations:
+        raise ValueError("Structured comments are not supported")
+
+    locus = "MP-G1-" + str(vector.location) + "_" + vector.name.replace(" ", "_")
+    header = [_locus_line(locus, len(vector.sequence), annotations)]
+
+    accession = annotations.get("accession", "<unknown id>")
+    header.append(_multi_line("DEFINITION", "synthetic circular DNA."))
+    header.append(_single_line("ACCESSION", accession))
+    if (gi := annotations.get("gi", ".")) != ".":
+        header.append(_single_line("VERSION", f"{accession}  GI:{gi}"))
+    else:
+        header.append(_single_line("VERSION", accession))
+
+    # Annotations are stored as strings: lists are joined letter by letter,
+    # as BioPython does with such values
+    keywords = "; ".join(annotations.get("keywords", "."))
+    header.append(
+        _multi_line("KEYWORDS", keywords + ("" if keywords.endswith(".") else "."))
+    )
+    if "segment" in annotations:
+        header.append(_single_line("SEGMENT", annotations["segment"]))
+    header.append(_multi_line("SOURCE", annotations.get("source", ".")))
+    organism = annotations.get("organism", ".")
+    if len(organism) > _MAX_WIDTH - _HEADER_WIDTH:
+        organism = organism[: _MAX_WIDTH - _HEADER_WIDTH - 4] + "..."
+    header.append(_single_line("  ORGANISM", organism))
+    taxonomy = "; ".join(annotations.get("taxonomy", "."))
+    header.append(_multi_line("", taxonomy + ("" if taxonomy.endswith(".") else ".")))
+    if "db_source" in annotations:
+        header.append(_single_line("DBSOURCE", annotations["db_source"]))
+
+    journal = (
+        f"Generated {datetime.datetime.now().strftime('%a %d %b %Y')} by GG2 Assembler"
+    )
+    for (number, ref) in enumerate(vector.references, start=1):
+        header.append(_single_line("REFERENCE", str(number)))
+        if ref.authors:
+            header.append(_multi_line("  AUTHORS", ref.authors))
+        if ref.title:
+            header.append(_multi_line("  TITLE", ref.title))
+        header.append(_multi_line("  JOURNAL", journal))
+
+    if "comment" in annotations:
+        header.extend(
+            _multi_line("COMMENT" if index == 0 else "", line)
+            for (index, line) in enumerate(annotations["comment"].split("\n"))
+        )
+
+    return "".join(header)
+
+
+def write_genbank(vector: model.Vector, lines_per_chunk: int = 1000) -> Iterator[str]:
+    """
+    GenBank text of a model.Vector, in chunks: the header, one chunk per
+    feature and the sequence `lines_per_chunk` lines at a time.
+    Produces the same text as serialize_to_genbank.
+    """
+    yield _header(vector)
+
+    yield "FEATURES             Location/Qualifiers\n"
+    length = len(vector.sequence)
+    for feature in vector_features(vector):
+        yield _feature(feature, length)
+
+    yield "ORIGIN\n"
+    step = _LETTERS_PER_LINE * lines_per_chunk
+    for chunk_start in range(0, length, step):
+        data = vector.sequence[chunk_start : chunk_start + step].lower()
+        yield "".join(
+            str(chunk_start + line + 1).rjust(9)
+            + "".join(
+                f" {data[word:word + 10]}"
+                for word in range(line, min(line + _LETTERS_PER_LINE, len(data)), 10)
+            )
+            + "\n"
+            for line in range(0, len(data), _LETTERS_PER_LINE)
+        )
+    yield "//\n"
+
+
+def origin_sequence(genbank: str) -> str:
+    """
+    Extracts the sequence from the ORIGIN section of (single record) GenBank
+    formatted text without parsing the rest of the file.
+    """
+    if (origin := re.search(r"^ORIGIN.*$", genbank, flags=re.MULTILINE)) is None:
+        return ""
+
+    end = genbank.find("\n//", origin.end())
+    return re.sub(
+        r"[^A-Za-z]", "", genbank[origin.end() : None if end < 0 else end]
+    ).upper()
+
+
+def plasmid_sequence(vector: model.Vector) -> str:
+    """
+    The complete (circular) plasmid sequence of a vector.
+    Backbones and level 0 vectors only store their digested fragment in
+    `sequence` so the full plasmid is taken from the submitted GenBank file.
+    """
+    if vector.level != VectorLevel.LEVEL1 and vector.genbank:
+        return origin_sequence(vector.genbank)
+
+    return vector.sequence
+
+
 def make_Reference(authors: str, title: str) -> Bio.SeqFeature.Reference:
     """
     Extra constructor to initialize a Reference
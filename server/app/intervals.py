@@ -0,0 +1,57 @@
+"""
+Interval index over feature locations.
+
+Features are kept sorted by start position so that range queries only
+test the features whose start lies in the range (within) or before it
+(outside), found by binary search.
+"""
+
+import numpy as np
+import numpy.typing as npt
+
+
+class IntervalIndex:
+    """
+    Static index over half-open intervals [start, end).
+    Queries return the (sorted) positions of the matching intervals in the
+    sequences the index was built from.
+    """
+
+    def __init__(self, starts: npt.ArrayLike, ends: npt.ArrayLike):
+        starts_arr = np.asarray(starts, dtype=np.int64)
+        ends_arr = np.asarray(ends, dtype=np.int64)
+        self._order = np.argsort(starts_arr, kind="stable")
+        self._starts = starts_arr[self._order]
+        self._ends = ends_arr[self._order]
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def _window(self, low: int, high: int) -> slice:
+        "Sorted positions of the intervals starting in [low, high)."
+        return slice(
+            np.searchsorted(self._starts, low, side="left"),
+            np.searchsorted(self._starts, high, side="left"),
+        )
+
+    def _positions(self, window: slice, mask: np.ndarray) -> np.ndarray:
+        "Original positions of the masked intervals in a window."
+        return np.sort(self._order[window][mask])
+
+    def within(self, start: int, end: int) -> np.ndarray:
+        "Intervals with start >= `start` and end <= `end`."
+        window = self._window(start, end + 1)
+        return self._positions(window, self._ends[window] <= end)
+
+    def outside(self, start: int, end: int) -> np.ndarray:
+        "Intervals with end < `start` or start > `end`."
+        before = self._window(np.iinfo(np.int64).min, start)
+        after = self._window(end + 1, np.iinfo(np.int64).max)
+        return np.sort(
+            np.concatenate(
+                [
+                    self._order[before][self._ends[before] < start],
+                    self._order[after],
+                ]
+            )
+        )
@@ -10,3 +10,12 @@ class VectorLevel(enum.Enum):
     BACKBONE = enum.auto()
     LEVEL0 = enum.auto()
     LEVEL1 = enum.auto()
+
+
+def is_circular(level: VectorLevel) -> bool:
+    """
+    Whether the stored sequence of a vector is circular.
+    Backbones and level 0 vectors are stored as their (linear) digested
+    fragment while level 1 vectors are the complete assembled plasmid.
+    """
+    return level == VectorLevel.LEVEL1
@@ -0,0 +1,88 @@
+"""
+MinHash sketches of vector sequences for near-duplicate detection.
+
+A sketch keeps, for each of NUM_HASHES hash functions, the smallest hash
+of the canonical k-mers of a sequence. The fraction of equal entries in
+two sketches estimates the Jaccard similarity of their k-mer sets.
+Canonical k-mers (the smaller of a k-mer and its reverse complement)
+make sketches independent of the strand a part was submitted on.
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from collections import defaultdict
+from itertools import combinations
+
+import numpy as np
+
+from app.search import kmer_codes
+from app.sequence import circular_view, reverse_complement
+
+K = 16
+NUM_HASHES = 128
+
+# Locality sensitive hashing: sketches sharing all rows of any band are
+# compared (see band_keys). BANDS * ROWS == NUM_HASHES
+BANDS = 32
+ROWS = 4
+
+DTYPE = np.dtype("<u4")
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    "splitmix64 finalizer, a cheap and well distributed 64-bit hash."
+    values = values + np.uint64(0x9E3779B97F4A7C15)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+_SEEDS = _mix(np.arange(NUM_HASHES, dtype=np.uint64))
+
+
+def canonical_kmers(sequence: str, circular: bool = False) -> np.ndarray:
+    "The distinct canonical k-mer codes of a sequence."
+    if circular:
+        sequence = circular_view(sequence, K - 1)
+    forward = kmer_codes(sequence, k=K)
+    reverse = kmer_codes(reverse_complement(sequence), k=K)[::-1]
+    codes = np.minimum(forward, reverse)
+    return np.unique(codes[(forward >= 0) & (reverse >= 0)])
+
+
+def sketch(sequence: str, circular: bool = False) -> Optional[bytes]:
+    "The MinHash sketch of a sequence, None if it has no unambiguous k-mer."
+    kmers = canonical_kmers(sequence, circular).astype(np.uint64)
+    if not len(kmers):
+        return None
+
+    hashes = _mix(kmers[np.newaxis, :] ^ _SEEDS[:, np.newaxis])
+    return hashes.min(axis=1).astype(DTYPE).tobytes()
+
+
+def similarities(query: bytes, sketches: Iterable[bytes]) -> np.ndarray:
+    "Estimated Jaccard similarity of a sketch with each of the others."
+    matrix = np.frombuffer(b"".join(sketches), dtype=DTYPE).reshape(-1, NUM_HASHES)
+    return (matrix == np.frombuffer(query, dtype=DTYPE)).mean(axis=1)
+
+
+def band_keys(signature: bytes) -> List[int]:
+    """
+    One key per LSH band of a sketch (non-negative 63-bit integers, to be
+    stored in SQL BIGINT columns): sketches sharing all rows of a band
+    share its key.
+    """
+    rows = np.frombuffer(signature, dtype=DTYPE).reshape(BANDS, ROWS)
+    keys = _mix(np.arange(BANDS, dtype=np.uint64))
+    for column in range(ROWS):
+        keys = _mix(keys ^ rows[:, column].astype(np.uint64))
+    return (keys >> np.uint64(1)).astype(np.int64).tolist()
+
+
+def candidate_pairs(sketches: Dict[int, bytes]) -> Set[Tuple[int, int]]:
+    "Pairs of IDs whose sketches collide in at least one LSH band."
+    buckets: Dict[int, List[int]] = defaultdict(list)
+    for (vector_id, signature) in sketches.items():
+        for key in band_keys(signature):
+            buckets[key].append(vector_id)
+
+    return {pair for ids in buckets.values() for pair in combinations(sorted(ids), 2)}
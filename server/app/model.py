@@ -5,6 +5,7 @@ from typing import Optional, List
 from datetime import datetime
 
 from sqlalchemy import (
+    BigInteger,
     Column,
     DateTime,
     Integer,
@@ -12,8 +13,10 @@ from sqlalchemy import (
     UniqueConstraint,
     ForeignKey,
     Enum,
+    Index,
+    LargeBinary,
 )
-from sqlalchemy.orm import relationship, Mapped
+from sqlalchemy.orm import deferred, relationship, Mapped
 
 from app.database import Base
 from app.level import VectorLevel
@@ -73,11 +76,27 @@ class IdentityProvider(Base):
     secret: str = Column(String, nullable=False)
 
 
+class Catalog(Base):
+    """
+    A single row with the version of the catalog, incremented by every
+    change to the vectors, their overhangs or who can access them.
+    Results derived from the whole catalog are cached by version.
+    """
+
+    __tablename__ = "catalog"
+
+    id: int = Column(Integer, primary_key=True)
+    version: int = Column(Integer, nullable=False, default=0)
+
+
 class Vector(Base):
     "Sequence blocks for building a golden gateway construct."
     __tablename__ = "vectors"
-    # Unique MP-GX-numbering constraint
-    __table_args__ = (UniqueConstraint("level", "location", name="lvl_loc"),)
+    __table_args__ = (
+        # Unique MP-GX-numbering constraint
+        UniqueConstraint("level", "location", name="lvl_loc"),
+        Index("ix_vectors_overhangs", "left_overhang", "right_overhang"),
+    )
 
     id: int = Column(Integer, primary_key=True, index=True)
 
@@ -98,10 +117,29 @@ class Vector(Base):
     # "Digested" sequence (where this applies)
     sequence: str = Column(String, nullable=False)
 
+    # BsaI overhangs at the ends of the digested sequence (backbone+level0)
+    left_overhang: Optional[str] = Column(String, nullable=True)
+    right_overhang: Optional[str] = Column(String, nullable=True, index=True)
+
+    # MinHash sketch of the sequence, for near-duplicate detection
+    sketch: Optional[bytes] = Column(LargeBinary, nullable=True)
+
     # Raw content of a genbank file
     # user-submitted for backbone+level0, generated for level(1+)
     genbank: str = Column(String, nullable=True)
 
+    # Incremented by every change to the exported content (sequence,
+    # features, annotations, references) to invalidate the export cache
+    revision: int = Column(Integer, nullable=False, default=1, server_default="1")
+
+    # Generated GenBank text (level 1+) and the revision it was generated from
+    export_cache: Optional[str] = deferred(Column(String, nullable=True))
+    export_revision: Optional[int] = Column(Integer, nullable=True)
+
+    # Features and qualifiers as a single blob (see app.features), written
+    # when settings.FEATURE_BLOBS is on
+    features_blob: Optional[bytes] = deferred(Column(LargeBinary, nullable=True))
+
     # Annotations are stored in another table
     annotations: Mapped[List["Annotation"]] = relationship(
         "Annotation", uselist=True, collection_class=list
@@ -136,14 +174,56 @@ class Vector(Base):
         return f"Vector({vars(self)})"
 
 
-class Annotation(Base):
+class Term(Base):
+    """
+    A string shared by many annotations and qualifiers (keys and short
+    values), stored once and referenced by ID.
+    """
+
+    __tablename__ = "terms"
+
+    id: int = Column(Integer, primary_key=True)
+    text: str = Column(String, nullable=False, unique=True)
+
+
+class _KeyValue:
+    """
+    Key and value of annotations and qualifiers. Keys are terms, values are
+    terms unless they are too long to be shared (see crud.intern_terms).
+    """
+
+    key_term: Term
+    value_term: Optional[Term]
+    inline_value: Optional[str]
+
+    @property
+    def key(self) -> str:
+        "The key."
+        return self.key_term.text
+
+    @property
+    def value(self) -> Optional[str]:
+        "The value."
+        if self.value_term is not None:
+            return self.value_term.text
+        return self.inline_value
+
+
+class Annotation(_KeyValue, Base):
     "Annotations relating to a Vector."
     __tablename__ = "annotations"
 
     id: int = Column(Integer, primary_key=True, index=True)
-    key: str = Column(String, nullable=False)
-    value: str = Column(String)
+    key_id: int = Column(Integer, ForeignKey("terms.id"), nullable=False)
+    value_id: Optional[int] = Column(Integer, ForeignKey("terms.id"), nullable=True)
+    inline_value: Optional[str] = Column("value", String, key="inline_value")
     vector = Column(Integer, ForeignKey("vectors.id"), nullable=False)
+    key_term: Mapped[Term] = relationship(
+        Term, foreign_keys=[key_id], lazy="joined", innerjoin=True
+    )
+    value_term: Mapped[Optional[Term]] = relationship(
+        Term, foreign_keys=[value_id], lazy="joined"
+    )
 
     def __str__(self) -> str:
         return f"Annotation({self.id=}, {self.key=}, {self.value=}, {self.vector=})"
@@ -152,6 +232,10 @@ class Annotation(Base):
 class Feature(Base):
     "Features relating to a Vector."
     __tablename__ = "features"
+    # Range queries over the features of a vector
+    __table_args__ = (
+        Index("ix_features_vector_range", "vector", "start_pos", "end_pos"),
+    )
 
     id: int = Column(Integer, primary_key=True, index=True, nullable=False)
     type: str = Column(String)
@@ -184,14 +268,62 @@ class VectorReference(Base):
         return f"VectorReference({self.id=}, {self.authors=}, {self.title=}, {self.vector=})"
 
 
-class Qualifier(Base):
+class Qualifier(_KeyValue, Base):
     "Qualifier relating to a vector."
     __tablename__ = "qualifiers"
 
     id: int = Column(Integer, primary_key=True, index=True, nullable=False)
-    key: str = Column(String, nullable=False)
-    value: str = Column(String)
+    key_id: int = Column(Integer, ForeignKey("terms.id"), nullable=False)
+    value_id: Optional[int] = Column(Integer, ForeignKey("terms.id"), nullable=True)
+    inline_value: Optional[str] = Column("value", String, key="inline_value")
     feature = Column(Integer, ForeignKey("features.id"), nullable=False)
+    key_term: Mapped[Term] = relationship(
+        Term, foreign_keys=[key_id], lazy="joined", innerjoin=True
+    )
+    value_term: Mapped[Optional[Term]] = relationship(
+        Term, foreign_keys=[value_id], lazy="joined"
+    )
 
     def __str__(self) -> str:
         return f"Qualifier({self.id=}, {self.key=}, {self.value=}, {self.feature=})"
+
+
+class RestrictionSite(Base):
+    "Restriction enzyme recognition site found in the sequence of a Vector."
+    __tablename__ = "restriction_sites"
+    __table_args__ = (Index("ix_restriction_sites_enzyme_vector", "enzyme", "vector"),)
+
+    id: int = Column(Integer, primary_key=True, index=True)
+    vector = Column(Integer, ForeignKey("vectors.id"), nullable=False, index=True)
+    enzyme: str = Column(String, nullable=False)
+    position: int = Column(Integer, nullable=False)
+    strand: Optional[int] = Column(Integer, nullable=True)
+
+    def __str__(self) -> str:
+        return (
+            f"RestrictionSite({self.id=}, {self.vector=}, {self.enzyme=}, "
+            f"{self.position=}, {self.strand=})"
+        )
+
+
+class SequenceKmer(Base):
+    "Position of a k-mer in the sequence of a Vector (sequence search index)."
+    __tablename__ = "sequence_kmers"
+
+    kmer: int = Column(Integer, primary_key=True, autoincrement=False)
+    vector = Column(Integer, ForeignKey("vectors.id"), primary_key=True, index=True)
+    position: int = Column(Integer, primary_key=True, autoincrement=False)
+
+    def __str__(self) -> str:
+        return f"SequenceKmer({self.kmer=}, {self.vector=}, {self.position=})"
+
+
+class SketchBand(Base):
+    "An LSH band key of the MinHash sketch of a Vector (see minhash.band_keys)."
+    __tablename__ = "sketch_bands"
+
+    key: int = Column(BigInteger, primary_key=True, autoincrement=False)
+    vector = Column(Integer, ForeignKey("vectors.id"), primary_key=True, index=True)
+
+    def __str__(self) -> str:
+        return f"SketchBand({self.key=}, {self.vector=})"
@@ -1,20 +1,25 @@
 " Abstractions over OpenID Connect APIs "
 
-from typing import Any, Dict, Optional, TypedDict
+from typing import Any, Callable, Coroutine, Dict, List, Optional, TypedDict, TypeVar
 from datetime import datetime, timedelta, timezone
+import asyncio
 import base64
 from binascii import Error as Base64DecodeError
 import json
+import math
 from json.decoder import JSONDecodeError
+import time
 from urllib.parse import urlencode
 
 import httpx
 import jose
 
 from app import schemas
+from app.cache import TTLCache
 from app.config import settings
 
 ResponseType = Dict[Any, Any]
+T = TypeVar("T")
 
 
 class TokenRequestBuilder:
@@ -82,6 +87,171 @@ async def configuration(
     return None
 
 
+class ProviderUnavailable(Exception):
+    "An identity provider failed or timed out, or its circuit is open."
+
+
+class Circuit:
+    "The circuit breaker state of the calls to one provider."
+
+    def __init__(self):
+        self.failures = 0  # consecutive
+        self.opened_at: Optional[float] = None
+        self.trial = False  # a half-open call is in flight
+        self.opened = 0
+        self.skipped = 0
+
+
+class CircuitBreaker:
+    """
+    Timeouts and circuit breakers for the calls to identity providers.
+
+    Every call is given at most timeout seconds. After threshold consecutive
+    failed or timed out calls to a provider its circuit opens: calls to it
+    fail immediately for cooldown seconds. One call is then let through
+    (half-open), which closes the circuit if it succeeds or opens it again.
+    Providers that respond, even with errors, do not open their circuits.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self,
+        threshold: int,
+        cooldown: float,
+        timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.timeout = timeout
+        self.clock = clock
+        self._circuits: Dict[str, Circuit] = {}
+
+    def state(self, provider: str) -> str:
+        "The state of the circuit of a provider."
+        if (circuit := self._circuits.get(provider)) is None or (
+            circuit.opened_at is None
+        ):
+            return self.CLOSED
+        if self.clock() < circuit.opened_at + self.cooldown:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    async def call(self, provider: str, call: Coroutine[Any, Any, T]) -> T:
+        "Await a call to a provider, or raise ProviderUnavailable."
+        circuit = self._circuits.setdefault(provider, Circuit())
+        state = self.state(provider)
+        if state == self.OPEN or (state == self.HALF_OPEN and circuit.trial):
+            call.close()
+            circuit.skipped += 1
+            raise ProviderUnavailable(f"{provider} is unavailable")
+
+        circuit.trial = state == self.HALF_OPEN
+        try:
+            result = await asyncio.wait_for(call, self.timeout)
+        except (httpx.HTTPError, asyncio.TimeoutError, ValueError) as err:
+            circuit.failures += 1
+            if circuit.trial or (
+                circuit.opened_at is None and circuit.failures >= self.threshold
+            ):
+                circuit.opened_at = self.clock()
+                circuit.opened += 1
+            raise ProviderUnavailable(f"{provider} is unavailable") from err
+        finally:
+            circuit.trial = False
+
+        circuit.failures = 0
+        circuit.opened_at = None
+        return result
+
+    def metrics(self) -> List[Dict[str, Any]]:
+        "The state, consecutive failures, and counts of openings and skipped calls."
+        return [
+            {
+                "issuer": provider,
+                "state": self.state(provider),
+                "failures": circuit.failures,
+                "opened": circuit.opened,
+                "skipped": circuit.skipped,
+            }
+            for (provider, circuit) in self._circuits.items()
+        ]
+
+
+breaker = CircuitBreaker(
+    threshold=settings.OIDC_BREAKER_THRESHOLD,
+    cooldown=settings.OIDC_BREAKER_COOLDOWN,
+    timeout=settings.OIDC_TIMEOUT,
+)
+
+
+class DiscoveryCache:
+    """
+    Process-wide cache of the well-known configurations of providers.
+
+    Fresh configurations are served without any request. Expired ones are
+    served while a background task fetches them again (stale-while-
+    revalidate), for at most max_stale seconds. Only missing configurations
+    are waited for, and None is returned for providers that cannot be
+    reached (through circuits). Background fetches use the client of the
+    request that started them, the application's shared client
+    (deps.get_http_client), rather than opening connections of their own.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_stale: float,
+        clock: Callable[[], float] = time.monotonic,
+        circuits: CircuitBreaker = breaker,
+    ):
+        self._circuits = circuits
+        self._configs: TTLCache[str, ResponseType] = TTLCache(
+            ttl, max_stale=max_stale, clock=clock
+        )
+        self._refreshes: Dict[str, asyncio.Task] = {}
+
+    async def get(
+        self, client: httpx.AsyncClient, provider: str
+    ) -> Optional[ResponseType]:
+        "The configuration of a provider, fetched with client if not cached."
+        if (entry := self._configs.entry(provider)) is None:
+            return await self._fetch(client, provider)
+
+        if not self._configs.is_fresh(entry) and provider not in self._refreshes:
+            task = asyncio.get_running_loop().create_task(
+                self._refresh(client, provider)
+            )
+            self._refreshes[provider] = task
+            task.add_done_callback(lambda _: self._refreshes.pop(provider, None))
+        return entry.value
+
+    async def _fetch(
+        self, client: httpx.AsyncClient, provider: str
+    ) -> Optional[ResponseType]:
+        try:
+            config = await self._circuits.call(
+                provider, configuration(client, provider)
+            )
+        except ProviderUnavailable:
+            return None
+        if config is not None:
+            self._configs.set(provider, config)
+        return config
+
+    async def _refresh(self, client: httpx.AsyncClient, provider: str) -> None:
+        "Fetch a configuration again, the stale one is kept on errors."
+        await self._fetch(client, provider)
+
+
+discovery = DiscoveryCache(
+    ttl=settings.OIDC_DISCOVERY_TTL, max_stale=settings.OIDC_DISCOVERY_MAX_STALE
+)
+
+
 async def jwks(client: httpx.AsyncClient, config: Dict[str, str]) -> ResponseType:
     "Fetch Json Web Key information."
     response = await client.get(config["jwks_uri"])
@@ -93,6 +263,65 @@ async def jwks(client: httpx.AsyncClient, config: Dict[str, str]) -> ResponseTyp
     return {}
 
 
+class KeyCache:
+    """
+    Process-wide cache of the Json Web Keys of providers, by key ID (kid).
+
+    Key sets are fetched again when they expire, or when a token is signed
+    with a key that is not in the cached set (the provider rotated its
+    keys). Those refetches happen at most once every min_refetch seconds
+    per provider, so tokens with made up key IDs cannot flood it.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        min_refetch: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._keys: TTLCache[str, Dict[Optional[str], ResponseType]] = TTLCache(
+            ttl, clock=clock
+        )
+        self._min_refetch = min_refetch
+        self._fetched: Dict[str, float] = {}
+        self._clock = clock
+
+    async def get(
+        self, client: httpx.AsyncClient, config: Dict[str, str], kid: Optional[str]
+    ) -> ResponseType:
+        "A key set with the key of ID kid, or every key of the provider if unknown."
+        uri = config["jwks_uri"]
+        keys = self._keys.get(uri)
+        if keys is None or (
+            kid not in keys
+            and self._clock() - self._fetched.get(uri, -math.inf) >= self._min_refetch
+        ):
+            keys = await self._fetch(client, uri)
+
+        if kid in keys:
+            return {"keys": [keys[kid]]}
+        return {"keys": list(keys.values())}
+
+    async def _fetch(
+        self, client: httpx.AsyncClient, uri: str
+    ) -> Dict[Optional[str], ResponseType]:
+        self._fetched[uri] = self._clock()
+        keys = {
+            key.get("kid"): key
+            for key in (await jwks(client, {"jwks_uri": uri})).get("keys", [])
+            if isinstance(key, dict)
+        }
+        # Empty sets are not kept, the next login fetches them again
+        if keys:
+            self._keys.set(uri, keys)
+        return keys
+
+
+signing_keys = KeyCache(
+    ttl=settings.OIDC_JWKS_TTL, min_refetch=settings.OIDC_JWKS_MIN_REFETCH
+)
+
+
 async def token(
     client: httpx.AsyncClient,
     config: Dict[str, str],
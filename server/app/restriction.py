@@ -0,0 +1,167 @@
+"""
+Restriction enzyme panel and site finding.
+
+Sites are computed once when a vector is added and stored in the
+`restriction_sites` table so they can be queried across the catalog.
+"""
+
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import re
+
+import numpy as np
+
+from app.sequence import circular_view, reverse_complement
+
+
+class Enzyme(NamedTuple):
+    """
+    A restriction enzyme with an unambiguous recognition site.
+    `cut` and `cut_complement` are the positions (relative to the start of
+    the recognition site, on the strand it is read from) after which the top
+    and bottom strands are cut.
+    """
+
+    name: str
+    site: str
+    cut: int
+    cut_complement: int
+
+    @property
+    def palindromic(self) -> bool:
+        "The site reads the same on both strands."
+        return self.site == reverse_complement(self.site)
+
+
+class Site(NamedTuple):
+    "An occurrence of an enzyme recognition site in a sequence."
+    enzyme: str
+    position: int  # 0-based start of the site on the forward strand
+    strand: Optional[int]  # 1, -1 or None for palindromic sites
+
+
+# Type IIS enzymes used for Golden Gate cloning, followed by common
+# diagnostic enzymes used to check constructs.
+ENZYMES: Dict[str, Enzyme] = {
+    enzyme.name: enzyme
+    for enzyme in [
+        Enzyme("BsaI", "GGTCTC", 7, 11),
+        Enzyme("BsmBI", "CGTCTC", 7, 11),
+        Enzyme("BbsI", "GAAGAC", 8, 12),
+        Enzyme("SapI", "GCTCTTC", 8, 11),
+        Enzyme("AarI", "CACCTGC", 11, 15),
+        Enzyme("BamHI", "GGATCC", 1, 5),
+        Enzyme("EcoRI", "GAATTC", 1, 5),
+        Enzyme("EcoRV", "GATATC", 3, 3),
+        Enzyme("HindIII", "AAGCTT", 1, 5),
+        Enzyme("KpnI", "GGTACC", 5, 1),
+        Enzyme("NcoI", "CCATGG", 1, 5),
+        Enzyme("NheI", "GCTAGC", 1, 5),
+        Enzyme("NotI", "GCGGCCGC", 2, 6),
+        Enzyme("PstI", "CTGCAG", 5, 1),
+        Enzyme("SacI", "GAGCTC", 5, 1),
+        Enzyme("SpeI", "ACTAGT", 1, 5),
+        Enzyme("XbaI", "TCTAGA", 1, 5),
+        Enzyme("XhoI", "CTCGAG", 1, 5),
+    ]
+}
+
+
+def _occurrences(pattern: str, sequence: str) -> Iterator[int]:
+    "Start positions of (possibly overlapping) occurrences of pattern."
+    return (match.start() for match in re.finditer(f"(?={pattern})", sequence))
+
+
+def find_sites(
+    sequence: str, enzymes: Optional[List[Enzyme]] = None, circular: bool = False
+) -> List[Site]:
+    """
+    Find all recognition sites of the given enzymes (default: the whole panel)
+    on both strands of a sequence.
+    For circular sequences, sites spanning the origin are reported too.
+    """
+    sequence = sequence.upper()
+    length = len(sequence)
+    sites: List[Site] = []
+
+    for enzyme in ENZYMES.values() if enzymes is None else enzymes:
+        searched = (
+            circular_view(sequence, len(enzyme.site) - 1) if circular else sequence
+        )
+        strands: List[Tuple[str, Optional[int]]] = (
+            [(enzyme.site, None)]
+            if enzyme.palindromic
+            else [(enzyme.site, 1), (reverse_complement(enzyme.site), -1)]
+        )
+        for (pattern, strand) in strands:
+            sites.extend(
+                Site(enzyme=enzyme.name, position=pos, strand=strand)
+                for pos in _occurrences(pattern, searched)
+                if pos < length
+            )
+
+    return sorted(sites, key=lambda site: (site.position, site.enzyme))
+
+
+def _cut_positions(sequence: str, enzyme: Enzyme) -> np.ndarray:
+    """
+    Top strand cut positions (may lie outside [0, len(sequence)) for sites
+    near the origin) of an enzyme in a circular sequence.
+    """
+    sites = find_sites(sequence, enzymes=[enzyme], circular=True)
+    positions = np.fromiter((site.position for site in sites), dtype=np.int64)
+    reverse = np.fromiter((site.strand == -1 for site in sites), dtype=bool)
+    return np.where(
+        reverse,
+        positions + len(enzyme.site) - enzyme.cut_complement,
+        positions + enzyme.cut,
+    )
+
+
+# Number of memoized digests
+DIGEST_CACHE_SIZE = 1024
+
+# Digests by SHA-1 of the sequence and (sorted) enzyme names: the cache
+# does not keep sequences alive
+_digests: "OrderedDict[Tuple[bytes, Tuple[str, ...]], Tuple[int, ...]]" = OrderedDict()
+
+
+def _fragments(sequence: str, enzymes: Tuple[str, ...]) -> Tuple[int, ...]:
+    "Fragment lengths, largest first, see `virtual_digest`."
+    length = len(sequence)
+    if length == 0:
+        return ()
+
+    cuts = np.unique(
+        np.concatenate(
+            [np.zeros(0, dtype=np.int64)]
+            + [_cut_positions(sequence, ENZYMES[name]) for name in enzymes]
+        )
+        % length
+    )
+    if cuts.size == 0:
+        return (length,)
+
+    lengths = np.diff(np.append(cuts, cuts[0] + length))
+    return tuple(int(size) for size in np.sort(lengths)[::-1])
+
+
+def virtual_digest(sequence: str, enzymes: Iterable[str]) -> Tuple[int, ...]:
+    """
+    Fragment lengths, largest first (as they appear on a gel), of a circular
+    sequence digested with the given enzymes (names from `ENZYMES`).
+    An uncut plasmid gives a single fragment of the full length.
+    """
+    sequence = sequence.upper()
+    names = tuple(sorted(set(enzymes)))
+    key = (hashlib.sha1(sequence.encode()).digest(), names)
+    if key in _digests:
+        _digests.move_to_end(key)
+        return _digests[key]
+
+    result = _digests[key] = _fragments(sequence, names)
+    if len(_digests) > DIGEST_CACHE_SIZE:
+        _digests.popitem(last=False)
+
+    return result
@@ -116,6 +116,21 @@ class AllConstructs(BaseModel):
     data: List[VectorAdmin]
 
 
+class ProviderStatus(BaseModel):
+    "Circuit breaker state of the calls to an identity provider"
+    issuer: str
+    state: Literal["closed", "open", "half-open"]
+    failures: int  # Consecutive failed calls
+    opened: int  # Times the circuit opened
+    skipped: int  # Calls skipped while open
+
+
+class AllProviderStatuses(BaseModel):
+    "Listing of the identity providers called since startup"
+    label: Literal["providers"]
+    data: List[ProviderStatus]
+
+
 # Adding data
 
 
@@ -160,11 +175,11 @@ class Feature(BaseModel):
     provide more information
     """
 
-    type: str
+    type: Optional[str]
     qualifiers: List[Qualifier]
     start_pos: int
     end_pos: int
-    strand: int
+    strand: Optional[int]
 
     class Config:
         """Orm mode configuration"""
@@ -197,6 +212,8 @@ class GenbankData(BaseModel):
     annotations: List[Annotation]
     features: List[Feature]
     references: List[VectorReference]
+    left_overhang: Optional[str] = None
+    right_overhang: Optional[str] = None
 
 
 class VectorBase(BaseModel):
@@ -261,6 +278,7 @@ class VectorOut(Vector):
     sequence_length: int
     children: List[VectorOut]
     date: datetime
+    warnings: List[str] = []
 
 
 class VectorAdmin(VectorOut):
@@ -269,4 +287,83 @@ class VectorAdmin(VectorOut):
     users: List[User]
 
 
+# Restriction sites
+
+
+class RestrictionSite(BaseModel):
+    """
+    A restriction enzyme recognition site within the sequence of a vector.
+    `position` is the 0-based start of the site on the forward strand.
+    """
+
+    enzyme: str
+    position: int
+    strand: Optional[int]
+
+    class Config:
+        """Orm mode configuration"""
+
+        orm_mode = True
+
+
+class DigestRequest(BaseModel):
+    "Virtual digest of several vectors with the same set of enzymes."
+    vectors: List[int]
+    enzymes: List[str]
+
+
+class Digest(BaseModel):
+    "Expected fragment lengths (largest first) of a digested vector."
+    vector: int
+    enzymes: List[str]
+    fragments: List[int]
+
+
+# Sequence search
+
+
+class SequenceMatch(BaseModel):
+    """
+    An occurrence of a searched sequence within the sequence of a vector.
+    `position` is the 0-based start of the match on the forward strand.
+    """
+
+    vector: int
+    position: int
+    strand: Optional[int]
+
+
+# Export
+
+
+class ExportRequest(BaseModel):
+    """
+    Vectors to export: the given IDs, or every vector matching the filter
+    (level and/or group). Exported as a single multi-record GenBank file,
+    or as a ZIP archive with one file per vector.
+    """
+
+    vectors: Optional[List[int]] = None
+    level: Optional[VectorLevel] = None
+    group: Optional[str] = None
+    archive: bool = False
+
+
+# Assembly design
+
+
+class Assemblies(BaseModel):
+    """
+    A page of the level 1 assemblies possible with a backbone.
+    Each assembly lists the IDs of its level 0 inserts in order.
+    `total` counts all assemblies found, which is capped when `truncated`.
+    """
+
+    backbone: int
+    total: int
+    truncated: bool
+    offset: int
+    assemblies: List[List[int]]
+
+
 AllConstructs.update_forward_refs()
@@ -0,0 +1,105 @@
+"""
+Sequence search over the catalog.
+
+Every k-mer (of the forward strand) of every vector sequence is stored in
+the `sequence_kmers` table together with its position. A query is looked
+up through the postings of its first and last k-mer, which gives a small
+set of candidate start positions that are then verified against the
+sequences. The reverse strand is searched by looking up the reverse
+complement of the query.
+"""
+
+from typing import Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.sequence import circular_view, reverse_complement
+
+# Length of the indexed k-mers, which is also the shortest query
+K = 12
+
+# 2-bit code of each base, -1 for ambiguous bases
+_CODES = np.full(256, -1, dtype=np.int64)
+for (_code, _base) in enumerate("ACGT"):
+    _CODES[ord(_base)] = _CODES[ord(_base.lower())] = _code
+
+
+class Match(NamedTuple):
+    "An occurrence of a query in the sequence of a vector."
+    vector: int
+    position: int  # 0-based start of the match on the forward strand
+    strand: Optional[int]  # 1, -1 or None for palindromic queries
+
+
+def kmer_codes(sequence: str, k: int = K) -> np.ndarray:
+    "Code of the k-mer starting at each position, -1 if it has ambiguous bases."
+    bases = _CODES[np.frombuffer(sequence.encode("ascii", "replace"), dtype=np.uint8)]
+    if len(bases) < k:
+        return np.zeros(0, dtype=np.int64)
+
+    windows = sliding_window_view(bases, k)
+    codes = windows @ (4 ** np.arange(k - 1, -1, -1, dtype=np.int64))
+    codes[(windows < 0).any(axis=1)] = -1
+    return codes
+
+
+def index_kmers(sequence: str, circular: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The (k-mer code, position) pairs to index for a sequence.
+    K-mers spanning the origin of circular sequences are included.
+    """
+    if circular and len(sequence) >= K:
+        codes = kmer_codes(circular_view(sequence, K - 1))[: len(sequence)]
+    else:
+        codes = kmer_codes(sequence)
+
+    positions = np.flatnonzero(codes >= 0)
+    return (codes[positions], positions)
+
+
+def is_valid_query(query: str) -> bool:
+    "Queries are unambiguous DNA sequences of at least K bases."
+    return len(query) >= K and not set(query.upper()) - set("ACGT")
+
+
+def patterns(query: str) -> List[Tuple[str, Optional[int]]]:
+    "The patterns to look for on the forward strand, with their strand."
+    forward = query.upper()
+    reverse = reverse_complement(forward)
+    if forward == reverse:
+        return [(forward, None)]
+    return [(forward, 1), (reverse, -1)]
+
+
+def probes(pattern: str) -> List[Tuple[int, int]]:
+    "The (offset, k-mer code) pairs used to find candidates for a pattern."
+    codes = kmer_codes(pattern)
+    offsets = sorted({0, len(pattern) - K})
+    return [(offset, int(codes[offset])) for offset in offsets]
+
+
+def candidates(
+    pattern: str, postings: Iterable[Iterable[Tuple[int, int, int]]]
+) -> List[Tuple[int, int]]:
+    """
+    Candidate (vector, start) pairs of a pattern, given for each of its
+    probes the (vector, position, sequence length) postings of the probe.
+    Starts before the origin wrap around (for circular sequences).
+    """
+    found: Optional[Set[Tuple[int, int]]] = None
+    for ((offset, _), hits) in zip(probes(pattern), postings):
+        starts = {
+            (vector, (position - offset) % length)
+            for (vector, position, length) in hits
+        }
+        found = starts if found is None else found & starts
+
+    return sorted(found or ())
+
+
+def matches_at(sequence: str, pattern: str, start: int, circular: bool) -> bool:
+    "The pattern occurs at start (wrapping around the origin if circular)."
+    if circular:
+        sequence = circular_view(sequence, len(pattern) - 1)
+    return sequence[start : start + len(pattern)].upper() == pattern
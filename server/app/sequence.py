@@ -0,0 +1,16 @@
+" Small helpers for working with DNA sequences stored as plain strings. "
+
+_COMPLEMENT = str.maketrans("ACGTRYKMBVDHNacgtrykmbvdhn", "TGCAYRMKVBHDNtgcayrmkvbhdn")
+
+
+def reverse_complement(sequence: str) -> str:
+    "Reverse complement of a (IUPAC) DNA sequence."
+    return sequence.translate(_COMPLEMENT)[::-1]
+
+
+def circular_view(sequence: str, overlap: int) -> str:
+    """
+    Extend a circular sequence with its first `overlap` bases so that
+    matches spanning the origin can be found with plain string searches.
+    """
+    return sequence + sequence[: min(overlap, len(sequence))]
@@ -2,18 +2,22 @@
 API endpoints for dealing with Golden Gate 2 constructs (vectors).
 """
 
-from typing import List, Optional
+from typing import Iterator, List, Optional
+from functools import partial
+from itertools import accumulate, chain
 import io
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import PlainTextResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from sqlalchemy.orm import Session
 
-from app import deps, schemas, crud
+from app import assembly, deps, export, schemas, crud, restriction, search
+from app.config import settings
 from app.level import VectorLevel
-from app.genbank import convert_gbk_to_vector, serialize_to_genbank
-from app.model import Feature, Vector
+from app.genbank import convert_gbk_to_vector, plasmid_sequence, write_genbank
+from app.features import FeatureTable
+from app.model import Vector
 
 router = APIRouter()
 
@@ -43,7 +47,6 @@ def vector_to_world(vector: Vector) -> schemas.VectorOut:
         sequence_length=len(vector.sequence),
         children=inserts_out + ([] if backbone_out is None else [backbone_out]),
         annotations=vector.annotations,
-        features=vector.features,
         references=vector.references,
         bsmb1_overhang=vector.bsmb1_overhang,
         gateway_site=vector.gateway_site,
@@ -76,6 +79,237 @@ def get_vectors(
     ]
 
 
+@router.get("/vectors/restriction/", response_model=List[schemas.VectorOut])
+def get_vectors_by_restriction_sites(
+    enzyme: List[str] = Query(...),
+    present: bool = True,
+    level: Optional[int] = Query(None, ge=1, le=len(VectorLevel)),
+    database: Session = Depends(deps.get_db),
+    current_user: schemas.User = Depends(deps.get_current_user),
+) -> List[schemas.VectorOut]:
+    """
+    Returns the vectors accessible by this user that contain a restriction
+    site for any of the given enzymes, or (with present=false) that are free
+    of all of them. E.g. `?enzyme=BsaI&enzyme=BsmBI&level=2` lists the
+    level 0 vectors with an internal BsaI or BsmBI site.
+    """
+    if unknown := [name for name in enzyme if name not in restriction.ENZYMES]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown enzyme(s): {', '.join(unknown)}",
+        )
+
+    return [
+        vector_to_world(vec)
+        for vec in crud.get_vectors_by_restriction_sites(
+            database=database,
+            user=current_user,
+            enzymes=enzyme,
+            present=present,
+            level=None if level is None else VectorLevel(level),
+        )
+    ]
+
+
+@router.get("/vectors/{vector_id}/sites", response_model=List[schemas.RestrictionSite])
+def get_restriction_sites(
+    vector_id: int,
+    database: Session = Depends(deps.get_db),
+    current_user: schemas.User = Depends(deps.get_current_user),
+) -> List[schemas.RestrictionSite]:
+    """Returns the restriction sites found in the sequence of a vector."""
+    if (
+        crud.get_vector_by_id(database=database, id=vector_id, user=current_user)
+        is None
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Unknown vector"
+        )
+
+    return [
+        schemas.RestrictionSite.from_orm(site)
+        for site in crud.get_restriction_sites_from_vector(
+            database, vector_id=vector_id
+        )
+    ]
+
+
+@router.get("/search/sequence", response_model=List[schemas.SequenceMatch])
+def search_sequence(
+    q: str = Query(..., min_length=search.K),
+    limit: int = Query(1000, ge=1),
+    database: Session = Depends(deps.get_db),
+    current_user: schemas.User = Depends(deps.get_current_user),
+) -> List[schemas.SequenceMatch]:
+    """
+    Returns the occurrences of a DNA sequence (e.g. a primer) in the vectors
+    accessible by this user, on both strands and across the origin of
+    circular constructs.
+    """
+    if not search.is_valid_query(q):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"'q' must be a sequence of A, C, G and T of at least {search.K} bases",
+        )
+
+    return [
+        schemas.SequenceMatch(**match._asdict())
+        for match in crud.search_sequence(
+            database=database, user=current_user, query=q, limit=limit
+        )
+    ]
+
+
+@router.get("/compatible", response_model=List[schemas.VectorOut])
+def get_compatible_vectors(
+    left: Optional[str] = Query(None, min_length=4, max_length=4),
+    right: Optional[str] = Query(None, min_length=4, max_length=4),
+    database: Session = Depends(deps.get_db),
+    current_user: schemas.User = Depends(deps.get_current_user),
+) -> List[schemas.VectorOut]:
+    """
+    Returns the backbones and level 0 vectors accessible by this user whose
+    digested fragment starts with the `left` and/or is followed by the
+    `right` 4-nt BsaI overhang.
+    """
+    if left is None and right is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one of 'left' or 'right' is required",
+        )
+
+    return [
+        vector_to_world(vec)
+        for vec in crud.get_compatible_vectors(
+            database=database, user=current_user, left=left, right=right
+        )
+    ]
+
+
+@router.get("/assemblies/{backbone_id}", response_model=schemas.Assemblies)
+def get_assemblies(
+    backbone_id: int,
+    max_inserts: Optional[int] = Query(None, ge=1),
+    include: List[int] = Query([]),
+    exclude: List[int] = Query([]),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=1000),
+    database: Session = Depends(deps.get_db),
+    current_user: schemas.User = Depends(deps.get_current_user),
+) -> schemas.Assemblies:
+    """
+    Enumerates the ordered sets of level 0 inserts (accessible by this user)
+    that close the circle of a backbone, optionally requiring (`include`) or
+    forbidding (`exclude`) inserts and limiting their number.
+    """
+    backbone = crud.get_vector_by_id(
+        database=database, id=backbone_id, user=current_user
+    )
+    if backbone is None or backbone.level != VectorLevel.BACKBONE:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Unknown backbone"
+        )
+    if (backbone_part := _as_part(backbone)) is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The overhangs of this backbone are unknown",
+        )
+
+    constraints = assembly.Constraints(
+        max_inserts=max_inserts, include=frozenset(include), exclude=frozenset(exclude)
+    )
+    try:
+        found = assembly.memoized(
+            (
+                current_user.id,
+                backbone_id,
+                constraints,
+                crud.get_catalog_version(database),
+            ),
+            partial(_assemblies, database, current_user, backbone_part, constraints),
+        )
+    except ValueError as err:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(err)
+        ) from err
+
+    return schemas.Assemblies(
+        backbone=backbone_id,
+        total=len(found.assemblies),
+        truncated=found.truncated,
+        offset=offset,
+        assemblies=found.assemblies[offset : offset + limit],
+    )
+
+
+@router.get("/vectors/{vector_id}/features", response_model=List[schemas.Feature])
+def get_features(
+    vector_id: int,
+    start: int = Query(0, ge=0),
+    end: Optional[int] = Query(None, ge=0),
+    database: Session = Depends(deps.get_db),
+    current_user: schemas.User = Depends(deps.get_current_user),
+) -> List[schemas.Feature]:
+    """
+    Returns the features of a vector that overlap positions [start, end),
+    e.g. for zoomed in map views.
+    """
+    if (
+        crud.get_vector_by_id(database=database, id=vector_id, user=current_user)
+        is None
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Unknown vector"
+        )
+
+    return [
+        schemas.Feature.from_orm(feature)
+        for feature in crud.get_features_in_range(
+            database, vector_id=vector_id, start=start, end=end
+        )
+    ]
+
+
+@router.post("/digest/", response_model=List[schemas.Digest])
+def digest_vectors(
+    request: schemas.DigestRequest,
+    database: Session = Depends(deps.get_db),
+    current_user: schemas.User = Depends(deps.get_current_user),
+) -> List[schemas.Digest]:
+    """
+    Virtual restriction digest of (circular) plasmids for gel planning.
+    Returns the expected fragment lengths per vector, in the requested order.
+    """
+    if unknown := [name for name in request.enzymes if name not in restriction.ENZYMES]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown enzyme(s): {', '.join(unknown)}",
+        )
+
+    found = {
+        vec.id: vec
+        for vec in crud.get_vectors_by_ids(
+            database=database, ids=request.vectors, user=current_user
+        )
+    }
+    if missing := [str(vec_id) for vec_id in request.vectors if vec_id not in found]:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown vector(s): {', '.join(missing)}",
+        )
+
+    return [
+        schemas.Digest(
+            vector=vec_id,
+            enzymes=request.enzymes,
+            fragments=restriction.virtual_digest(
+                plasmid_sequence(found[vec_id]), request.enzymes
+            ),
+        )
+        for vec_id in request.vectors
+    ]
+
+
 @router.post("/submit/genbank/", response_model=schemas.VectorOut)
 def add_vector(
     new_vec: schemas.VectorIn,
@@ -107,13 +341,92 @@ def add_vector(
             user=current_user,
         )
     ) is not None:
-        return vector_to_world(inserted)
+        created = vector_to_world(inserted)
+        created.warnings = [
+            f"Similar to existing vector '{similar.name}' (id={similar.id}): "
+            f"{score:.0%} of k-mers shared"
+            for (similar, score) in crud.get_similar_vectors(
+                database,
+                user=current_user,
+                vector=inserted,
+                threshold=settings.DUPLICATE_THRESHOLD,
+            )
+        ]
+        return created
 
     raise HTTPException(
         status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid vector"
     )
 
 
+def _assemblies(
+    database: Session,
+    user: schemas.User,
+    backbone: assembly.Part,
+    constraints: assembly.Constraints,
+) -> assembly.Assemblies:
+    "Assemblies of the level 0 parts a user has access to into a backbone."
+    inserts = crud.get_parts(database, user=user, level=VectorLevel.LEVEL0)
+    return assembly.enumerate_assemblies(
+        backbone, [assembly.Part(*part) for part in inserts], constraints
+    )
+
+
+def _as_part(vector: Vector) -> Optional[assembly.Part]:
+    "A vector as a part for assembly design, None if its overhangs are unknown."
+    (left, right) = (vector.left_overhang, vector.right_overhang)
+    if left is None or right is None:
+        return None
+    return assembly.Part(vector.id, left, right)
+
+
+def _validated_children(
+    new_vec: schemas.VectorIn, database: Session, user: schemas.User
+) -> List[Vector]:
+    """
+    Loads the children of a new level 1 vector (inserts followed by the
+    backbone) with their features in a fixed number of queries and checks
+    that they form a valid assembly.
+
+    Raises:
+        HTTPException: HTTP_400_BAD_REQUEST describing the first problem.
+    """
+
+    def invalid(detail: str) -> HTTPException:
+        return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+    found = {
+        vec.id: vec
+        for vec in crud.get_vectors_by_ids(
+            database=database, ids=new_vec.children, user=user, with_features=True
+        )
+    }
+    if missing := [str(ch_id) for ch_id in new_vec.children if ch_id not in found]:
+        raise invalid(f"Unknown child vector(s): {', '.join(missing)}")
+
+    children = [found[ch_id] for ch_id in new_vec.children]
+    if not children or children[-1].level != VectorLevel.BACKBONE:
+        raise invalid("The last child must be a backbone")
+    if wrong := [str(ch.id) for ch in children[:-1] if ch.level != VectorLevel.LEVEL0]:
+        raise invalid(f"Inserts must be level 0 vectors: {', '.join(wrong)}")
+    parts = []
+    unknown = []
+    for child in children:
+        if (part := _as_part(child)) is None:
+            unknown.append(str(child.id))
+        else:
+            parts.append(part)
+    if unknown:
+        raise invalid(f"Unknown overhangs for vector(s): {', '.join(unknown)}")
+
+    try:
+        assembly.validate_order(parts[-1], parts[:-1])
+    except ValueError as err:
+        raise invalid(str(err))  # pylint: disable=raise-missing-from
+
+    return children
+
+
 @router.post("/submit/vector/", response_model=schemas.VectorOut)
 def add_leveln(
     new_vec: schemas.VectorIn,
@@ -135,50 +448,29 @@ def add_leveln(
     Returns:
         schemas.VectorOut: Returns the Vector posted by the UI.
     """
-    # TODO: It is possible to _incorrectly_ add invalid inserts
-    # Get sequence information
-    # TODO: We trust the client to submit children in the correct order
-    # This should be validated
-    features: List[schemas.Feature] = []
-    sequence = ""
-
-    # Setting feature_position to 0
-    feature_position_shift: int = 0
+    children = _validated_children(new_vec, database=database, user=current_user)
 
-    for ch_id in new_vec.children:
-        if (
-            child := crud.get_vector_by_id(
-                database=database, id=ch_id, user=current_user
-            )
-        ) is not None:
-            adj_features = []
-            for feature in child.features:
-                adj_feat = Feature(
-                    id=feature.id,
-                    type=feature.type,
-                    start_pos=feature.start_pos + feature_position_shift,
-                    end_pos=feature.end_pos + feature_position_shift,
-                    strand=feature.strand,
-                    vector=feature.vector,
-                    qualifiers=feature.qualifiers,
-                )
-
-                adj_features.append(adj_feat)
-
-            sequence += child.sequence
-            features += adj_features
-            feature_position_shift = feature_position_shift + len(child.sequence)
+    # Each child's features are shifted by the length of the preceding children
+    offsets = accumulate((len(child.sequence) for child in children), initial=0)
+    features = FeatureTable.concat(
+        [FeatureTable.from_vector(child) for child in children], offsets
+    )
+    sequence = "".join(child.sequence for child in children)
 
     genbank = schemas.GenbankData(
         sequence=sequence,
-        features=features,
+        features=[],
         annotations=new_vec.annotations,
         references=new_vec.references,
     )
 
     if (
         inserted := crud.add_vector(
-            database=database, vector=new_vec, genbank=genbank, user=current_user
+            database=database,
+            vector=new_vec,
+            genbank=genbank,
+            user=current_user,
+            features=features,
         )
     ) is not None:
         return vector_to_world(inserted)
@@ -193,7 +485,7 @@ def get_level1_genbank(
     vector_id: int,
     database: Session = Depends(deps.get_db),
     current_user: schemas.User = Depends(deps.get_current_user),
-) -> str:
+) -> Response:
     """
     This functione handles a request for a vector to
     be serialized to GenBank format.
@@ -204,19 +496,118 @@ def get_level1_genbank(
         database=database, id=vector_id, user=current_user
     )
 
-    # Parse the vector, using the genbank.convert_LevelN_to_genbank function
-    if vec_from_db is not None:
-        gbk_str = serialize_to_genbank(vector=vec_from_db)
-    else:
+    if vec_from_db is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Could not retrieve the vector from the database. No genbank could be generated!",
         )
 
-    if gbk_str is not None:
-        return gbk_str
-    else:
+    # Backbones and level 0's are served as submitted
+    if vec_from_db.level != VectorLevel.LEVEL1 and vec_from_db.genbank:
+        return PlainTextResponse(vec_from_db.genbank)
+
+    # Generated files are cached until the vector changes
+    if (gbk_str := crud.get_cached_genbank(vec_from_db)) is not None:
+        return PlainTextResponse(gbk_str)
+
+    # The header is written before streaming starts, so that errors
+    # can still be reported
+    chunks = write_genbank(vec_from_db)
+    try:
+        header = next(chunks)
+    except ValueError as err:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Could not generate genbank file!",
+            detail=f"Could not generate genbank file! {err}",
+        ) from err
+
+    return StreamingResponse(
+        _cached_while_streaming(database, vec_from_db, chain([header], chunks)),
+        media_type="text/plain",
+    )
+
+
+def _cached_while_streaming(
+    database: Session, vector: Vector, chunks: Iterator[str]
+) -> Iterator[str]:
+    """
+    Passes chunks through, and caches the whole text once all were sent.
+    Caching needs the text in memory: files larger than
+    GENBANK_CACHE_MAX_SIZE are streamed without being kept or cached.
+    """
+    sent = []
+    size = 0
+    for chunk in chunks:
+        size += len(chunk)
+        if size <= settings.GENBANK_CACHE_MAX_SIZE:
+            sent.append(chunk)
+        else:
+            sent.clear()
+        yield chunk
+
+    if size <= settings.GENBANK_CACHE_MAX_SIZE:
+        crud.cache_genbank(database, vector=vector, genbank="".join(sent))
+
+
+@router.post("/export")
+def export_vectors(
+    request: schemas.ExportRequest,
+    format: Optional[str] = None,  # pylint: disable=redefined-builtin
+    accept: Optional[str] = Header(None),
+    database: Session = Depends(deps.get_db),
+    current_user: schemas.User = Depends(deps.get_current_user),
+) -> StreamingResponse:
+    """
+    Exports many vectors in one streamed response: a single document, or
+    (with archive=true) a ZIP archive with one file per vector.
+    Without IDs, every vector accessible by this user that matches the
+    level and group filter is exported.
+    The format (genbank, fasta, json or sbol) is given by `?format=`,
+    or else by the Accept header. GenBank is the default.
+    """
+    if format is not None:
+        if (fmt := export.SERIALIZERS.get(format)) is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown format, use one of: {', '.join(export.SERIALIZERS)}",
+            )
+    elif request.archive:
+        fmt = export.SERIALIZERS["genbank"]
+    elif (fmt := export.negotiate(accept)) is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail="Available media types: "
+            + ", ".join(found.media_type for found in export.SERIALIZERS.values()),
         )
+
+    ids = crud.get_vector_ids(
+        database,
+        user=current_user,
+        ids=request.vectors,
+        level=request.level,
+        group=request.group,
+    )
+    if request.vectors is not None:
+        if unknown := sorted(set(request.vectors) - set(ids)):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Unknown vector(s): {', '.join(map(str, unknown))}",
+            )
+        # Exported in the requested order
+        ids = list(dict.fromkeys(request.vectors))
+
+    vectors = export.batched_vectors(database, ids, sequence_only=fmt.sequence_only)
+    if request.archive:
+        return StreamingResponse(
+            export.zip_archive(vectors, fmt),
+            media_type="application/zip",
+            headers={"Content-Disposition": 'attachment; filename="vectors.zip"'},
+        )
+
+    return StreamingResponse(
+        export.document(vectors, fmt),
+        media_type=fmt.media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="vectors.{fmt.extension}"'
+        },
+    )
@@ -0,0 +1,95 @@
+"""
+Throughput of the export formats (app.export.SERIALIZERS).
+
+Level 1 records are generated, as they would be on a cold export cache.
+BioPython's writer (serialize_to_genbank) is included for reference.
+
+Usage: python -m benchmarks.bench_export [genbank file]
+(defaults to the level 1 constructs in core/Genbank Files)
+"""
+
+from typing import Callable, Iterable, List
+from pathlib import Path
+from types import SimpleNamespace
+import sys
+import timeit
+
+from Bio import SeqIO
+
+from app.export import SERIALIZERS, document
+from app.genbank import serialize_to_genbank
+from app.level import VectorLevel
+
+DEFAULT_FILE = (
+    Path(__file__).parents[2] / "core" / "Genbank Files" / "level1 constructs.gbk"
+)
+
+
+def load(path: Path) -> List[SimpleNamespace]:
+    "Records shaped like model.Vector rows of generated level 1 vectors."
+    return [
+        SimpleNamespace(
+            id=index,
+            name=record.name,
+            level=VectorLevel.LEVEL1,
+            location=index,
+            group="bench",
+            date=None,
+            left_overhang=None,
+            right_overhang=None,
+            sequence=str(record.seq),
+            genbank=None,
+            revision=1,
+            export_revision=None,
+            export_cache=None,
+            features_blob=None,
+            annotations=[
+                SimpleNamespace(key=key, value=str(value))
+                for (key, value) in record.annotations.items()
+                if key != "references"
+            ],
+            references=[],
+            features=[
+                SimpleNamespace(
+                    type=feature.type,
+                    start_pos=int(feature.location.start),
+                    end_pos=int(feature.location.end),
+                    strand=feature.location.strand,
+                    qualifiers=[
+                        SimpleNamespace(key=key, value=str(value))
+                        for (key, value) in feature.qualifiers.items()
+                    ],
+                )
+                for feature in record.features
+            ],
+        )
+        for (index, record) in enumerate(SeqIO.parse(path, "genbank"))
+    ]
+
+
+def report(name: str, func: Callable[[], Iterable], records: int) -> None:
+    "Print the best throughput of an export."
+    size = sum(len(chunk) for chunk in func())
+    best = min(timeit.repeat(lambda: sum(1 for _ in func()), number=1, repeat=5))
+    print(
+        f"{name:<20} {best * 1000:9.2f} ms {records / best:10.0f} records/s "
+        f"{size / best / 1e6:8.1f} MB/s"
+    )
+
+
+def main(path: Path) -> None:
+    "Run the export of every record of a (multi-record) GenBank file."
+    vectors = load(path)
+    print(f"{len(vectors)} records from {path}")
+
+    for (name, fmt) in SERIALIZERS.items():
+        report(name, lambda fmt=fmt: document(vectors, fmt), len(vectors))
+    report(
+        "genbank/biopython",
+        lambda: [serialize_to_genbank(vector).encode() for vector in vectors],
+        len(vectors),
+    )
+
+
+if __name__ == "__main__":
+    main(Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_FILE)
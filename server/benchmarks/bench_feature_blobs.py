@@ -0,0 +1,146 @@
+"""
+Reading the features of one vector from the features and qualifiers
+tables against reading them from the vector's features blob
+(settings.FEATURE_BLOBS), with the number of rows each layout uses.
+
+The records of a GenBank file are stored in a new SQLite database both
+ways; every read uses a new session, as a request would.
+
+Usage: python -m benchmarks.bench_feature_blobs [genbank file]
+(defaults to the level 1 constructs in core/Genbank Files)
+"""
+
+from typing import Callable, List
+from pathlib import Path
+import sys
+import tempfile
+import timeit
+
+from Bio import SeqIO
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import crud, model
+from app.database import Base
+from app.features import NO_STRAND, FeatureTable, vector_features
+from app.level import VectorLevel
+
+DEFAULT_FILE = (
+    Path(__file__).parents[2] / "core" / "Genbank Files" / "level1 constructs.gbk"
+)
+
+
+def store(database: Session, path: Path) -> List[int]:
+    "Stores the records of a file, with feature rows and blobs, returns their IDs."
+    ids = []
+    for (index, record) in enumerate(SeqIO.parse(path, "genbank")):
+        table = FeatureTable.from_seqrecord(record)
+        terms = crud.intern_terms(
+            database,
+            [(qual.key, qual.value) for quals in table.qualifiers for qual in quals],
+        )
+        features = [
+            model.Feature(
+                type=table.types[code],
+                start_pos=start,
+                end_pos=end,
+                strand=None if strand == NO_STRAND else strand,
+                qualifiers=[
+                    model.Qualifier(**crud.term_columns(terms, qual.key, qual.value))
+                    for qual in table.qualifiers[row]
+                ],
+            )
+            for (start, end, strand, code, row) in zip(
+                table.starts.tolist(),
+                table.ends.tolist(),
+                table.strands.tolist(),
+                table.type_codes.tolist(),
+                table.rows.tolist(),
+            )
+        ]
+        vector = model.Vector(
+            location=index,
+            name=f"vector {index}",
+            bacterial_strain="",
+            responsible="",
+            group="bench",
+            level=VectorLevel.LEVEL1,
+            sequence=str(record.seq),
+            features=features,
+        )
+        database.add(vector)
+        database.flush()
+        ids.append(vector.id)
+    database.commit()
+
+    # As 'ggwc reindex' does with FEATURE_BLOBS on
+    for vector in database.query(model.Vector):
+        crud.set_features_blob(database, vector)
+    return ids
+
+
+def read_rows(database: Session, vector_id: int) -> int:
+    "Features and qualifiers through the relationships."
+    vector = database.get(model.Vector, vector_id)
+    return sum(len(feature.qualifiers) for feature in vector.features)
+
+
+def read_blob(database: Session, vector_id: int) -> int:
+    "Features and qualifiers decoded from the blob."
+    vector = database.get(model.Vector, vector_id)
+    return sum(len(feature.qualifiers) for feature in vector_features(vector))
+
+
+def report(
+    name: str, sessions: sessionmaker, ids: List[int], read: Callable[..., int]
+) -> None:
+    "Print the best mean read time per vector."
+
+    def read_all() -> None:
+        for vector_id in ids:
+            with sessions() as database:
+                read(database, vector_id)
+
+    best = min(timeit.repeat(read_all, number=1, repeat=5))
+    print(f"{name:<8} {best / len(ids) * 1e6:9.0f} us/vector")
+
+
+def main(path: Path) -> None:
+    "Store the records of a (multi-record) GenBank file and read them back."
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/bench.sqlite")
+        Base.metadata.create_all(
+            engine,
+            tables=[
+                model.Term.__table__,
+                model.Vector.__table__,
+                model.Feature.__table__,
+                model.Qualifier.__table__,
+            ],
+        )
+        # As created by the migrations, read by crud.touch_vector
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    "CREATE TABLE vector_hierarchy (id INTEGER, parent INTEGER, child INTEGER)"
+                )
+            )
+        sessions = sessionmaker(bind=engine)
+        with sessions() as database:
+            ids = store(database, path)
+            features = database.query(func.count(model.Feature.id)).scalar()
+            qualifiers = database.query(func.count(model.Qualifier.id)).scalar()
+            size = database.query(
+                func.sum(func.length(model.Vector.features_blob))
+            ).scalar()
+
+        print(f"{len(ids)} vectors from {path}")
+        print(f"rows     {features + qualifiers:9d} features and qualifiers")
+        print(f"blob     {len(ids):9d} vectors, {size / len(ids):.0f} bytes/vector")
+        report("rows", sessions, ids, read_rows)
+        report("blob", sessions, ids, read_blob)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main(Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_FILE)
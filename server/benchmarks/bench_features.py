@@ -0,0 +1,103 @@
+"""
+Benchmark of per-object versus columnar (FeatureTable) feature handling.
+
+Usage: python -m benchmarks.bench_features [genbank file]
+(defaults to the level 1 constructs in core/Genbank Files)
+"""
+
+from typing import Callable, List
+from pathlib import Path
+import sys
+import timeit
+
+from Bio import SeqIO
+
+from app.features import FeatureTable
+from app.level import VectorLevel
+from app.schemas import Feature, Qualifier
+
+DEFAULT_FILE = (
+    Path(__file__).parents[2] / "core" / "Genbank Files" / "level1 constructs.gbk"
+)
+
+
+def load(path: Path) -> List[List[Feature]]:
+    "Features per record, as produced on ingest."
+    return [
+        [
+            Feature(
+                type=feature.type,
+                qualifiers=[
+                    Qualifier(key=key, value=str(value))
+                    for key, value in feature.qualifiers.items()
+                ],
+                start_pos=int(feature.location.start),
+                end_pos=int(feature.location.end),
+                strand=feature.location.strand or 0,
+            )
+            for feature in record.features
+        ]
+        for record in SeqIO.parse(path, "genbank")
+    ]
+
+
+def per_object_reposition(records: List[List[Feature]]) -> None:
+    "Backbone repositioning, one new Feature per feature."
+    for features in records:
+        for feature in features:
+            shift = -1000 if feature.start_pos >= 1000 else 4000
+            Feature(
+                type=feature.type,
+                qualifiers=feature.qualifiers,
+                start_pos=feature.start_pos + shift,
+                end_pos=feature.end_pos + shift,
+                strand=feature.strand,
+            )
+
+
+def columnar_reposition(tables: List[FeatureTable]) -> None:
+    "Backbone repositioning, one array operation per record."
+    for table in tables:
+        table.repositioned(500, 1000, 5000, VectorLevel.BACKBONE)
+
+
+def per_object_concat(records: List[List[Feature]]) -> None:
+    "Concatenation of all records as in add_leveln, one Feature per feature."
+    shift = 0
+    for features in records:
+        for feature in features:
+            Feature(
+                type=feature.type,
+                qualifiers=feature.qualifiers,
+                start_pos=feature.start_pos + shift,
+                end_pos=feature.end_pos + shift,
+                strand=feature.strand,
+            )
+        shift += 10_000
+
+
+def columnar_concat(tables: List[FeatureTable]) -> None:
+    "Concatenation of all records in one FeatureTable."
+    FeatureTable.concat(tables, range(0, 10_000 * len(tables), 10_000))
+
+
+def report(name: str, func: Callable[[], None], number: int = 5) -> None:
+    "Print the best time of a benchmark."
+    best = min(timeit.repeat(func, number=1, repeat=number))
+    print(f"{name:<24} {best * 1000:9.2f} ms")
+
+
+def main(path: Path) -> None:
+    "Run all benchmarks on a (multi-record) GenBank file."
+    records = load(path)
+    tables = [FeatureTable.from_features(features) for features in records]
+    print(f"{len(records)} records, {sum(map(len, records))} features from {path}")
+
+    report("reposition/per-object", lambda: per_object_reposition(records))
+    report("reposition/columnar", lambda: columnar_reposition(tables))
+    report("concat/per-object", lambda: per_object_concat(records))
+    report("concat/columnar", lambda: columnar_concat(tables))
+
+
+if __name__ == "__main__":
+    main(Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_FILE)
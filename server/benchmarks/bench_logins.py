@@ -0,0 +1,128 @@
+"""
+Concurrent logins against the database through the blocking crud
+functions and through app.async_crud, as app.auth.verify_authorization
+runs them.
+
+Each login looks up its identity provider, waits for the identity
+provider (simulated), then looks up its user and creates it on first
+login. A ticker task measures how late the event loop runs it, which is
+how long other requests are held up.
+
+Usage: python -m benchmarks.bench_logins [logins] [identity provider ms]
+(defaults to 200 concurrent logins and 20 ms)
+"""
+
+from typing import Awaitable, Callable, List
+import asyncio
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import async_crud, crud, model, schemas
+from app.database import Base, create_async_database_engine
+
+
+def blocking_login(sessions: sessionmaker, idp_delay: float):
+    "A login through the blocking crud functions."
+
+    async def login(index: int) -> None:
+        database: Session
+        with sessions() as database:
+            provider = crud.get_provider_by_id(database, 1)
+            await asyncio.sleep(idp_delay)
+            if crud.get_user_by_identity(database, provider.issuer, str(index)) is None:
+                crud.create_user(
+                    database, schemas.UserCreate(iss=provider.issuer, sub=str(index))
+                )
+
+    return login
+
+
+def async_login(sessions: sessionmaker, idp_delay: float):
+    "A login through app.async_crud."
+
+    async def login(index: int) -> None:
+        database: AsyncSession
+        async with sessions() as database:
+            provider = await async_crud.get_provider_by_id(database, 1)
+            await asyncio.sleep(idp_delay)
+            if (
+                await async_crud.get_user_by_identity(
+                    database, provider.issuer, str(index)
+                )
+                is None
+            ):
+                await async_crud.create_user(
+                    database, schemas.UserCreate(iss=provider.issuer, sub=str(index))
+                )
+
+    return login
+
+
+async def run(name: str, login: Callable[[int], Awaitable[None]], logins: int) -> None:
+    "Print the time all logins take and the worst event loop delay."
+    lags: List[float] = []
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - start - 0.001)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*[login(index) for index in range(logins)])
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick
+
+    lags.sort()
+    print(
+        f"{name:<9} {elapsed * 1000:8.1f} ms "
+        f"{logins / elapsed:8.0f} logins/s, event loop delay "
+        f"p50 {lags[len(lags) // 2] * 1000:6.2f} ms max {lags[-1] * 1000:6.2f} ms"
+    )
+
+
+def main(logins: int, idp_delay: float) -> None:
+    "Run the logins both ways, each on a new SQLite database."
+    print(f"{logins} concurrent logins, {idp_delay * 1000:.0f} ms identity provider")
+    for (name, login) in (("blocking", blocking_login), ("async", async_login)):
+        with tempfile.TemporaryDirectory() as directory:
+            url = f"sqlite:///{directory}/{name}.sqlite"
+            engine = create_engine(url)
+            Base.metadata.create_all(
+                engine, tables=[model.User.__table__, model.IdentityProvider.__table__]
+            )
+            with Session(engine) as database:
+                database.add(
+                    model.IdentityProvider(
+                        name="bench", issuer="bench", clientid="", secret=""
+                    )
+                )
+                database.commit()
+
+            if login is blocking_login:
+                asyncio.run(
+                    run(name, login(sessionmaker(bind=engine), idp_delay), logins)
+                )
+            else:
+                async_engine = create_async_database_engine(url)
+                sessions = sessionmaker(
+                    bind=async_engine, class_=AsyncSession, expire_on_commit=False
+                )
+                asyncio.run(run(name, login(sessions, idp_delay), logins))
+                asyncio.run(async_engine.dispose())
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+        (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000,
+    )
@@ -0,0 +1,82 @@
+"""
+Throughput of concurrent requests at different connection pool sizes
+(settings.DB_POOL_SIZE, with no overflow).
+
+Each request holds a session for a query and some simulated work, as the
+(threaded) sync endpoints do. Requests that wait longer than
+settings.DB_POOL_TIMEOUT for a connection are counted as timed out.
+
+Usage: python -m benchmarks.bench_pool [database URL] [threads] [work ms]
+(defaults to a new SQLite database, 32 threads and 5 ms; the PostgreSQL
+database of docker-compose.yml needs to have the schema)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import model
+from app.config import settings
+from app.database import Base, engine_options
+
+POOL_SIZES = [1, 2, 5, 10, 20]
+REQUESTS = 2000
+
+
+def request(sessions: sessionmaker, work: float) -> bool:
+    "Count the users, then work while holding the connection."
+    database: Session
+    try:
+        with sessions() as database:
+            database.query(func.count(model.User.id)).scalar()
+            time.sleep(work)
+    except PoolTimeout:
+        return False
+    return True
+
+
+def run(url: str, pool_size: int, threads: int, work: float) -> None:
+    "Print the throughput and failures of REQUESTS requests."
+    settings.DB_POOL_SIZE = pool_size
+    settings.DB_MAX_OVERFLOW = 0
+    engine = create_engine(url, **engine_options(url))
+    sessions = sessionmaker(bind=engine)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        results: List[bool] = list(
+            executor.map(lambda _: request(sessions, work), range(REQUESTS))
+        )
+    elapsed = time.perf_counter() - start
+    engine.dispose()
+    print(
+        f"pool {pool_size:3d} {REQUESTS / elapsed:8.0f} requests/s "
+        f"{results.count(False):5d} timed out"
+    )
+
+
+def main(url: str, threads: int, work: float) -> None:
+    "Run the requests at every pool size."
+    print(f"{REQUESTS} requests, {threads} threads, {work * 1000:.0f} ms work")
+    for pool_size in POOL_SIZES:
+        run(url, pool_size, threads, work)
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        if len(sys.argv) > 1:
+            URL = sys.argv[1]
+        else:
+            URL = f"sqlite:///{directory}/bench.sqlite"
+            Base.metadata.create_all(create_engine(URL), tables=[model.User.__table__])
+        main(
+            URL,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 32,
+            (float(sys.argv[3]) if len(sys.argv) > 3 else 5) / 1000,
+        )
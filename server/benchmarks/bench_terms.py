@@ -0,0 +1,124 @@
+"""
+Qualifiers stored with their key and value strings against keys and
+short values stored once in the terms table (crud.intern_terms): size
+of the database and time of scans over the qualifiers.
+
+The qualifiers of all the sample files are stored in new SQLite
+databases, repeated to get a catalog of a realistic size.
+
+Usage: python -m benchmarks.bench_terms [copies]
+(copies of the sample qualifiers, 20 by default)
+"""
+
+from typing import List, Tuple
+from pathlib import Path
+import os
+import sys
+import tempfile
+import timeit
+
+from Bio import SeqIO
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, text
+from sqlalchemy.orm import Session
+
+from app import crud, model
+from app.features import FeatureTable
+
+SAMPLES = Path(__file__).parents[2] / "core" / "Genbank Files"
+
+_PLAIN = MetaData()
+plain_qualifiers = Table(
+    "qualifiers",
+    _PLAIN,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("key", String, nullable=False),
+    Column("value", String),
+    Column("feature", Integer, nullable=False),
+)
+
+# The same scans over both layouts
+SCANS = {
+    "count by key": (
+        "SELECT key, count(*) FROM qualifiers GROUP BY key",
+        "SELECT terms.text, count(*) FROM qualifiers "
+        "JOIN terms ON terms.id = qualifiers.key_id GROUP BY qualifiers.key_id",
+    ),
+    "find labels": (
+        "SELECT count(*) FROM qualifiers WHERE key = 'label' AND value = '[''ampR'']'",
+        "SELECT count(*) FROM qualifiers "
+        "WHERE key_id = (SELECT id FROM terms WHERE text = 'label') "
+        "AND value_id = (SELECT id FROM terms WHERE text = '[''ampR'']')",
+    ),
+}
+
+
+def load() -> List[Tuple[int, str, str]]:
+    "(feature, key, value) of the qualifiers of all sample records."
+    qualifiers = []
+    for path in sorted(SAMPLES.rglob("*")):
+        if not path.is_file() or path.suffix in (".csv", ".xlsx"):
+            continue
+        for record in SeqIO.parse(path, "genbank"):
+            for quals in FeatureTable.from_seqrecord(record).qualifiers:
+                feature = len(qualifiers)
+                qualifiers.extend((feature, qual.key, qual.value) for qual in quals)
+    return qualifiers
+
+
+def size(path: str) -> float:
+    "Size of a database file in MB."
+    return os.path.getsize(path) / 1e6
+
+
+def main(copies: int) -> None:
+    "Store the sample qualifiers both ways and scan them."
+    qualifiers = load() * copies
+    print(f"{len(qualifiers)} qualifiers")
+
+    with tempfile.TemporaryDirectory() as directory:
+        engines = []
+        for name in ("plain", "terms"):
+            engine = create_engine(f"sqlite:///{directory}/{name}.sqlite")
+            engines.append(engine)
+            with Session(engine) as database:
+                if name == "plain":
+                    _PLAIN.create_all(engine)
+                    rows = [
+                        {"key": key, "value": value, "feature": feature}
+                        for (feature, key, value) in qualifiers
+                    ]
+                    database.execute(plain_qualifiers.insert(), rows)
+                else:
+                    model.Base.metadata.create_all(
+                        engine, tables=[model.Term.__table__, model.Qualifier.__table__]
+                    )
+                    terms = crud.intern_terms(
+                        database, [(key, value) for (_, key, value) in qualifiers]
+                    )
+                    rows = [
+                        {**crud.term_columns(terms, key, value), "feature": feature}
+                        for (feature, key, value) in qualifiers
+                    ]
+                    database.execute(model.Qualifier.__table__.insert(), rows)
+                database.commit()
+            with engine.connect() as connection:
+                connection.execute(text("VACUUM"))
+            print(f"{name:<8} {size(f'{directory}/{name}.sqlite'):9.2f} MB")
+
+        for (scan, queries) in SCANS.items():
+            for (name, engine, query) in zip(("plain", "terms"), engines, queries):
+                with engine.connect() as connection:
+                    best = min(
+                        timeit.repeat(
+                            lambda: connection.execute(text(query)).all(),
+                            number=1,
+                            repeat=5,
+                        )
+                    )
+                print(f"{scan:<14} {name:<8} {best * 1000:9.2f} ms")
+        for engine in engines:
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
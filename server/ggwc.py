@@ -16,10 +16,17 @@ import httpx
 from Bio import SeqIO
 from sqlalchemy.exc import SQLAlchemyError
 
+from app.config import settings
 from app.database import SessionLocal
 from app.level import VectorLevel
-from app import model, crud, oidc, schemas
-from app.genbank import convert_gbk_to_vector
+from app import model, crud, minhash, oidc, schemas
+from app.features import FeatureTable
+from app.genbank import (
+    convert_gbk_to_vector,
+    digest_overhangs,
+    origin_sequence,
+    record_annotations,
+)
 
 
 @click.group()
@@ -188,47 +195,12 @@ def import_data(csv_path, gbk_path, user):
         if loc[0] in [VectorLevel.LEVEL0, VectorLevel.BACKBONE]:
             genbank_data = convert_gbk_to_vector(gbk_file_path, loc[0])
         else:
-            # Convert raw data to GenBank Record
             record = SeqIO.read(gbk_file_path, "genbank")
-            # Getting the annotations
-            annotations = []
-            references = []
-            for key, value in record.annotations.items():
-                # All annotations are strings, integers or list of them
-                # but references are a special case.
-                # References are objects that can be deconstructed to
-                # an author and a title, both strings.
-                if key == "references":
-                    for reference in record.annotations["references"]:
-                        references.append(
-                            schemas.VectorReference(
-                                authors=reference.authors, title=reference.title
-                            )
-                        )
-                else:
-                    annotations.append(schemas.Annotation(key=key, value=str(value)))
-
-            # Getting the features:
-            features = []
-            for feature in record.features:
-                # Getting the qualifiers of each feature
-                new_qualifiers = []
-                for key, value in feature.qualifiers.items():
-                    new_qualifiers.append(schemas.Qualifier(key=key, value=str(value)))
-                features.append(
-                    schemas.Feature(
-                        type=feature.type,
-                        qualifiers=new_qualifiers,
-                        start_pos=feature.location.nofuzzy_start,
-                        end_pos=feature.location.nofuzzy_end,
-                        strand=feature.location.strand,
-                    )
-                )
-
+            (annotations, references) = record_annotations(record)
             genbank_data = schemas.GenbankData(
                 sequence=str(record.seq),
                 annotations=annotations,
-                features=features,
+                features=FeatureTable.from_seqrecord(record).to_features(),
                 references=references,
             )
 
@@ -268,5 +240,69 @@ def import_data(csv_path, gbk_path, user):
                 click.echo(f"Vector '{vec.name}' added.")
 
 
+@cli.command()
+def reindex():
+    """
+    (Re)compute the derived indexes (restriction sites, sequence search,
+    sketches, overhangs, feature blobs if FEATURE_BLOBS is on) for every
+    vector in the database
+    """
+    with SessionLocal() as database:
+        for vector in crud.get_all_vectors(database, limit=None):
+            found = crud.reindex_restriction_sites(database, vector)
+            click.echo(f"Vector '{vector.name}': {found} restriction sites")
+            found = crud.reindex_sequence_kmers(database, vector)
+            click.echo(f"Vector '{vector.name}': {found} k-mers indexed")
+            crud.set_vector_sketch(database, vector)
+            if settings.FEATURE_BLOBS:
+                crud.set_features_blob(database, vector)
+
+            if vector.level == VectorLevel.LEVEL1 or not vector.genbank:
+                continue
+            try:
+                overhangs = digest_overhangs(
+                    vector.level, origin_sequence(vector.genbank)
+                )
+            except ValueError as err:
+                click.echo(f"Vector '{vector.name}': no overhangs ({err})", err=True)
+            else:
+                crud.set_vector_overhangs(database, vector, overhangs)
+                click.echo(f"Vector '{vector.name}': overhangs {overhangs}")
+
+
+@cli.command()
+@click.option(
+    "--threshold",
+    default=settings.DUPLICATE_THRESHOLD,
+    show_default=True,
+    help="Estimated share of k-mers above which vectors are reported",
+)
+def dedupe_report(threshold):
+    """
+    List the pairs of vectors of the same level with (near) identical
+    sequences, most similar first. Run 'reindex' first to sketch vectors
+    added before sketches existed.
+    """
+    with SessionLocal() as database:
+        sketches = crud.get_sketches(database)
+        levels = {vector_id: level for (vector_id, level, _) in sketches}
+        by_id = {vector_id: sketch for (vector_id, _, sketch) in sketches}
+
+        pairs = []
+        for (first, second) in minhash.candidate_pairs(by_id):
+            if levels[first] != levels[second]:
+                continue
+            (score,) = minhash.similarities(by_id[first], [by_id[second]])
+            if score >= threshold:
+                pairs.append((score, first, second))
+
+        names = dict(database.query(model.Vector.id, model.Vector.name).all())
+        for (score, first, second) in sorted(pairs, key=lambda pair: -pair[0]):
+            click.echo(
+                f"{score:.0%}\t{first}\t{names[first]}\t{second}\t{names[second]}"
+            )
+        click.echo(f"{len(pairs)} similar pairs in {len(sketches)} vectors", err=True)
+
+
 if __name__ == "__main__":
     cli()
@@ -4,6 +4,8 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 import app.router as ggw
+from app.database import async_engine
+from app.deps import create_http_client
 
 app = FastAPI()
 
@@ -16,3 +18,21 @@ app.add_middleware(
 )
 
 app.include_router(ggw.router)
+
+
+@app.on_event("startup")
+async def open_http_client() -> None:
+    "Open the HTTP client shared by all requests."
+    app.state.http_client = create_http_client()
+
+
+@app.on_event("shutdown")
+async def close_http_client() -> None:
+    "Close the shared HTTP client and its connections."
+    await app.state.http_client.aclose()
+
+
+@app.on_event("shutdown")
+async def close_async_engine() -> None:
+    "Close the connections of the asyncio database engine."
+    await async_engine.dispose()
@@ -0,0 +1,125 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+import pytest
+
+from app import crud, model
+from app.assembly import Constraints, Part, enumerate_assemblies, validate_order
+
+BACKBONE = Part(0, "GGGG", "AAAA")
+
+INSERTS = [
+    Part(1, "AAAA", "BBBB"),
+    Part(2, "BBBB", "GGGG"),
+    Part(3, "AAAA", "GGGG"),
+    Part(4, "BBBB", "CCCC"),
+    Part(5, "CCCC", "GGGG"),
+    Part(6, "CCCC", "AAAA"),  # would loop back
+    Part(7, "DDDD", "GGGG"),  # unreachable
+]
+
+
+def test_enumerate_assemblies():
+    assert enumerate_assemblies(BACKBONE, INSERTS).assemblies == [
+        (1, 2),
+        (1, 4, 5),
+        (3,),
+    ]
+
+
+def test_enumerate_assemblies_max_inserts():
+    assert enumerate_assemblies(
+        BACKBONE, INSERTS, Constraints(max_inserts=2)
+    ).assemblies == [(1, 2), (3,)]
+
+
+def test_enumerate_assemblies_include_exclude():
+    assert enumerate_assemblies(
+        BACKBONE, INSERTS, Constraints(include=frozenset({4}))
+    ).assemblies == [(1, 4, 5)]
+    assert enumerate_assemblies(
+        BACKBONE, INSERTS, Constraints(exclude=frozenset({1}))
+    ).assemblies == [(3,)]
+
+
+def test_enumerate_assemblies_unusable_include():
+    with pytest.raises(ValueError, match="cannot be reached"):
+        enumerate_assemblies(BACKBONE, INSERTS, Constraints(include=frozenset({7})))
+    with pytest.raises(ValueError, match="Unknown or excluded"):
+        enumerate_assemblies(
+            BACKBONE,
+            INSERTS,
+            Constraints(include=frozenset({1}), exclude=frozenset({1})),
+        )
+    with pytest.raises(ValueError, match="same overhang"):
+        enumerate_assemblies(BACKBONE, INSERTS, Constraints(include=frozenset({1, 3})))
+
+
+def test_enumerate_assemblies_prunes_passed_include():
+    # 12 parallel parts per step from A to G, and a required part on a side
+    # branch: paths that pass its overhang without taking it are pruned
+    overhangs = ["AAAA", "BBBB", "CCCC", "DDDD", "EEEE", "FFFF", "GGGG"]
+    inserts = [
+        Part(step * 12 + copy, left, right)
+        for (step, (left, right)) in enumerate(zip(overhangs, overhangs[1:]))
+        for copy in range(12)
+    ]
+    side = [Part(1000, "BBBB", "HHHH"), Part(1001, "HHHH", "CCCC")]
+    result = enumerate_assemblies(
+        BACKBONE, inserts + side, Constraints(include=frozenset({1001}))
+    )
+    assert len(result.assemblies) == 10_000
+    assert all(1000 in found and 1001 in found for found in result.assemblies)
+
+    # Without the way into the side branch, the request is rejected at once
+    with pytest.raises(ValueError, match="cannot be reached"):
+        enumerate_assemblies(
+            BACKBONE, inserts + side[1:], Constraints(include=frozenset({1001}))
+        )
+
+
+def test_enumerate_assemblies_max_steps():
+    overhangs = ["AAAA", "BBBB", "CCCC", "DDDD", "EEEE", "FFFF", "GGGG"]
+    inserts = [
+        Part(step * 12 + copy, left, right)
+        for (step, (left, right)) in enumerate(zip(overhangs, overhangs[1:]))
+        for copy in range(12)
+    ]
+    result = enumerate_assemblies(BACKBONE, inserts, max_steps=100)
+    assert result.truncated
+    assert len(result.assemblies) < 100
+
+
+def test_enumerate_assemblies_limit():
+    result = enumerate_assemblies(BACKBONE, INSERTS, limit=2)
+    assert result.assemblies == [(1, 2), (1, 4, 5)]
+    assert result.truncated
+
+
+def test_validate_order():
+    validate_order(BACKBONE, [INSERTS[0], INSERTS[3], INSERTS[4]])
+
+
+def test_validate_order_wrong_order():
+    with pytest.raises(ValueError, match="Insert 1"):
+        validate_order(BACKBONE, [INSERTS[1], INSERTS[0]])
+
+
+def test_validate_order_not_closed():
+    with pytest.raises(ValueError, match="does not close"):
+        validate_order(BACKBONE, [INSERTS[0], INSERTS[3]])
+
+
+def test_validate_order_repeated_overhang():
+    with pytest.raises(ValueError, match="more than once"):
+        validate_order(BACKBONE, [INSERTS[0], INSERTS[3], INSERTS[5], INSERTS[2]])
+
+
+def test_catalog_version():
+    engine = create_engine("sqlite://")
+    model.Catalog.__table__.create(engine)
+    with Session(engine) as database:
+        assert crud.get_catalog_version(database) == 0
+        crud.bump_catalog_version(database)
+        crud.bump_catalog_version(database)
+        database.commit()
+        assert crud.get_catalog_version(database) == 2
@@ -0,0 +1,86 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+import pytest
+
+from app import async_crud, crud, model, schemas
+from app.database import Base, async_url, create_async_database_engine
+
+
+@pytest.fixture(name="sessions")
+def fixture_sessions(tmp_path):
+    engine = create_async_database_engine(f"sqlite:///{tmp_path}/test.sqlite")
+
+    async def create():
+        async with engine.begin() as connection:
+            await connection.run_sync(
+                Base.metadata.create_all,
+                tables=[model.User.__table__, model.IdentityProvider.__table__],
+            )
+
+    asyncio.run(create())
+    yield sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+def test_async_url():
+    assert str(async_url("sqlite:///ggw.sqlite")) == "sqlite+aiosqlite:///ggw.sqlite"
+    assert (
+        str(async_url("postgresql://user@host/ggw"))
+        == "postgresql+asyncpg://user@host/ggw"
+    )
+
+
+def test_providers(sessions):
+    async def scenario():
+        async with sessions() as database:
+            assert await async_crud.get_identity_providers(database) == []
+            database.add(
+                model.IdentityProvider(
+                    name="name", issuer="issuer", clientid="id", secret="secret"
+                )
+            )
+            await database.commit()
+
+            (provider,) = await async_crud.get_identity_providers(database)
+            assert (
+                await async_crud.get_provider_by_id(database, provider.id) is provider
+            )
+            assert await async_crud.get_provider_by_id(database, None) is None
+            assert await async_crud.get_provider_by_id(database, 2) is None
+
+    asyncio.run(scenario())
+
+
+def test_users(sessions):
+    crud.user_cache.set(1, "stale")
+
+    async def scenario():
+        async with sessions() as database:
+            assert await async_crud.get_user_by_identity(database, "iss", "sub") is None
+            user = await async_crud.create_user(
+                database, schemas.UserCreate(name="name", iss="iss", sub="sub")
+            )
+            assert schemas.User.from_orm(user) == schemas.User(id=1, name="name")
+            assert await async_crud.get_user_by_identity(database, "iss", "sub") is user
+            return user
+
+    user = asyncio.run(scenario())
+    assert crud.user_cache.get(user.id) is None
+
+
+def test_concurrent_sessions(sessions):
+    async def login(index):
+        async with sessions() as database:
+            await async_crud.create_user(
+                database, schemas.UserCreate(iss="iss", sub=str(index))
+            )
+            return await async_crud.get_user_by_identity(database, "iss", str(index))
+
+    async def logins():
+        return await asyncio.gather(*[login(index) for index in range(10)])
+
+    assert sorted(user.sub for user in asyncio.run(logins())) == [
+        str(index) for index in range(10)
+    ]
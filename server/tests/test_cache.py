@@ -0,0 +1,60 @@
+from app.cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_fresh_then_stale_then_gone():
+    clock = Clock()
+    cache = TTLCache(ttl=10, max_stale=5, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 9.9
+    assert cache.get("a") == 1
+
+    clock.now = 10
+    assert cache.get("a") is None
+    entry = cache.entry("a")
+    assert entry.value == 1 and not cache.is_fresh(entry)
+
+    clock.now = 15
+    assert cache.entry("a") is None
+    assert len(cache) == 0
+
+
+def test_ttl_per_entry():
+    clock = Clock()
+    cache = TTLCache(ttl=10, clock=clock)
+    cache.set("short", 1, ttl=1)
+    cache.set("long", 2)
+
+    clock.now = 5
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+
+
+def test_maxsize_drops_oldest():
+    cache = TTLCache(ttl=10, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 3)
+    cache.set("c", 4)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (3, 4)
+
+
+def test_pop_and_clear():
+    cache = TTLCache(ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.pop("a") == 1
+    assert cache.pop("a") is None
+    cache.clear()
+    assert cache.get("b") is None
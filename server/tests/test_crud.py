@@ -0,0 +1,139 @@
+from datetime import datetime
+import random
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+import pytest
+
+from app import crud, model, schemas
+from app.features import vector_features
+from app.level import VectorLevel
+
+
+@pytest.fixture(name="database")
+def fixture_database():
+    engine = create_engine("sqlite://")
+    for table in (
+        model.Vector,
+        model.Feature,
+        model.Term,
+        model.Qualifier,
+        model.Annotation,
+        model.VectorReference,
+        model.Catalog,
+        model.User,
+        model.UserVectorMapping,
+        model.SketchBand,
+    ):
+        table.__table__.create(engine)
+    # As created by the migrations: SQLite has no autoincrement in composite keys
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE vector_hierarchy (id INTEGER, parent INTEGER, child INTEGER)"
+            )
+        )
+    with sessionmaker(bind=engine)() as database:
+        yield database
+
+
+def new_vector(database, name, level, location, sequence="ACGT"):
+    vector = model.Vector(
+        name=name,
+        level=level,
+        location=location,
+        bacterial_strain="DH5a",
+        responsible="someone",
+        group="group",
+        date=datetime(2022, 1, 1),
+        sequence=sequence,
+    )
+    database.add(vector)
+    database.commit()
+    return vector
+
+
+def test_genbank_cache_follows_revisions(database):
+    child = new_vector(database, "child", VectorLevel.LEVEL0, 1)
+    parent = new_vector(database, "parent", VectorLevel.LEVEL1, 1)
+    database.add(model.VectorHierarchy(child=child.id, parent=parent.id))
+    database.commit()
+
+    crud.cache_genbank(database, parent, "LOCUS parent")
+    crud.cache_genbank(database, child, "LOCUS child")
+    assert crud.get_cached_genbank(parent) == "LOCUS parent"
+
+    # Changing a child also invalidates the vectors built from it
+    crud.set_vector_overhangs(database, child, ("AAAA", "CCCC"))
+    database.refresh(parent)
+    assert crud.get_cached_genbank(child) is None
+    assert crud.get_cached_genbank(parent) is None
+
+    crud.cache_genbank(database, parent, "LOCUS parent 2")
+    crud.set_features_blob(database, parent)
+    assert crud.get_cached_genbank(parent) is None
+
+
+def test_genbank_cache_write_is_best_effort(database, monkeypatch):
+    vector = new_vector(database, "vector", VectorLevel.LEVEL0, 1)
+
+    def failing_commit():
+        raise OperationalError("UPDATE", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(database, "commit", failing_commit)
+    crud.cache_genbank(database, vector, "LOCUS vector")
+    monkeypatch.undo()
+
+    database.refresh(vector)
+    assert crud.get_cached_genbank(vector) is None
+
+
+def test_export_queries_do_not_grow_with_vectors(database):
+    ids = []
+    for index in range(20):
+        vector = new_vector(database, f"vector {index}", VectorLevel.LEVEL0, index)
+        database.add(
+            model.Feature(type="CDS", start_pos=0, end_pos=4, vector=vector.id)
+        )
+        ids.append(vector.id)
+    database.commit()
+    database.expunge_all()
+
+    queries = []
+    event.listen(database.bind, "before_cursor_execute", lambda *_: queries.append(1))
+    vectors = crud.get_vectors_for_export(database, ids)
+    assert sum(len(vector_features(vector)) for vector in vectors) == 20
+    # Vectors, then annotations, references, features and qualifiers
+    assert len(queries) == 5
+
+
+def test_similar_vectors_found_through_band_keys(database):
+    user = crud.create_user(
+        database, schemas.UserCreate(name="name", role="user", iss="iss", sub="sub")
+    )
+    random.seed(1)
+    sequence = "".join(random.choice("ACGT") for _ in range(3000))
+    vectors = [
+        new_vector(database, name, VectorLevel.LEVEL0, location, text)
+        for (location, (name, text)) in enumerate(
+            [
+                ("original", sequence),
+                ("copy", sequence[:1500] + "T" + sequence[1501:]),
+                ("unindexed copy", sequence),
+                ("other", sequence[::-1]),
+            ]
+        )
+    ]
+    for vector in vectors:
+        database.add(model.UserVectorMapping(user=user.id, vector=vector.id))
+    for vector in vectors[:2] + vectors[3:]:
+        crud.set_vector_sketch(database, vector)
+    # Sketched, but without band keys (as before 'ggwc reindex')
+    vectors[2].sketch = vectors[0].sketch
+    database.commit()
+
+    similar = crud.get_similar_vectors(
+        database, user=schemas.User.from_orm(user), vector=vectors[0], threshold=0.9
+    )
+    assert [(found.name, score > 0.9) for (found, score) in similar] == [("copy", True)]
@@ -0,0 +1,60 @@
+import logging
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app import database
+from app.config import settings
+
+
+def test_in_memory_sqlite_not_pooled():
+    assert database.engine_options("sqlite://") == {"echo": settings.DB_ECHO}
+    assert database.engine_options("sqlite:///:memory:", asyncio=True) == {
+        "echo": settings.DB_ECHO
+    }
+
+
+def test_sqlite_file_pooled():
+    options = database.engine_options("sqlite:///ggw.sqlite")
+    assert options["poolclass"] is QueuePool
+    assert options["pool_size"] == settings.DB_POOL_SIZE
+    assert options["connect_args"] == {"check_same_thread": False}
+
+    options = database.engine_options("sqlite:///ggw.sqlite", asyncio=True)
+    assert options["poolclass"] is AsyncAdaptedQueuePool
+    assert "connect_args" not in options
+
+
+def test_postgresql_options(monkeypatch):
+    url = "postgresql://user@host/ggw"
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT", 0)
+    options = database.engine_options(url)
+    assert "poolclass" not in options and "connect_args" not in options
+    assert options["pool_pre_ping"] == settings.DB_POOL_PRE_PING
+    assert options["pool_recycle"] == settings.DB_POOL_RECYCLE
+    assert options["max_overflow"] == settings.DB_MAX_OVERFLOW
+
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT", 1500)
+    assert database.engine_options(url)["connect_args"] == {
+        "options": "-c statement_timeout=1500"
+    }
+    assert database.engine_options(url, asyncio=True)["connect_args"] == {
+        "server_settings": {"statement_timeout": "1500"}
+    }
+
+
+def test_slow_queries_logged(caplog):
+    engine = create_engine("sqlite://")
+    database.log_slow_queries(engine, threshold=0)
+    with caplog.at_level(logging.WARNING, logger="app.database"):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 42"))
+    assert "SELECT 42" in caplog.text
+
+    caplog.clear()
+    engine = create_engine("sqlite://")
+    database.log_slow_queries(engine, threshold=60_000)
+    with caplog.at_level(logging.WARNING, logger="app.database"):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 42"))
+    assert caplog.text == ""
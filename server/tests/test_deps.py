@@ -0,0 +1,113 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from jose import jwt
+from jose.exceptions import JWTError
+import httpx
+import pytest
+
+from app import crud, deps, oidc, schemas
+from app.config import settings
+from main import app
+
+
+def test_http_client_open_for_app_lifetime():
+    with TestClient(app):
+        client = app.state.http_client
+        assert not client.is_closed
+    assert client.is_closed
+
+
+def test_http_client_shared_by_requests():
+    shared = FastAPI()
+    shared.state.http_client = deps.create_http_client()
+
+    @shared.get("/client")
+    def client_id(client: httpx.AsyncClient = Depends(deps.get_http_client)):
+        return id(client)
+
+    with TestClient(shared) as client:
+        first = client.get("/client").json()
+        assert client.get("/client").json() == first == id(shared.state.http_client)
+
+        shared.dependency_overrides[deps.get_http_client] = lambda: None
+        assert client.get("/client").json() == id(None)
+    asyncio.run(shared.state.http_client.aclose())
+
+
+def test_http_client_settings():
+    client = deps.create_http_client()
+    assert client.timeout == httpx.Timeout(
+        settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT
+    )
+    asyncio.run(client.aclose())
+
+
+@pytest.fixture(name="caches")
+def fixture_caches():
+    deps.token_cache.clear()
+    crud.user_cache.clear()
+    yield
+    deps.token_cache.clear()
+    crud.user_cache.clear()
+
+
+def api_token(claims):
+    return jwt.encode(claims, settings.API_SECRET, settings.API_JWT_ALGORITHM)
+
+
+def test_token_verified_once(caches, monkeypatch):
+    user = schemas.User(id=1, name="name")
+    token = oidc.create_access_token(data=user)
+    decodes = []
+    decode = jwt.decode
+    monkeypatch.setattr(
+        deps.jwt, "decode", lambda *args: decodes.append(1) or decode(*args)
+    )
+
+    assert deps.verify_token(token).user == user
+    assert deps.verify_token(token).user == user
+    assert len(decodes) == 1
+
+    crud.user_cache.set(1, user)
+    assert deps.get_current_user(None, f"Bearer {token}") == user
+    assert len(decodes) == 1
+
+
+def test_tampered_token_not_verified(caches):
+    token = oidc.create_access_token(data=schemas.User(id=1))
+    deps.verify_token(token)
+    (header, payload, signature) = token.split(".")
+    with pytest.raises(JWTError):
+        deps.verify_token(f"{header}.{payload}.{signature[:-2]}AA")
+
+
+def test_token_without_expiry_rejected(caches):
+    with pytest.raises(JWTError):
+        deps.verify_token(api_token({"id": 1}))
+    with pytest.raises(JWTError):
+        deps.verify_token(api_token({"name": "no id", "exp": 2**40}))
+    assert len(deps.token_cache) == 0
+
+
+def test_expired_token_rejected(caches):
+    expired = datetime.now(timezone.utc) - timedelta(minutes=1)
+    token = api_token({"id": 1, "role": "user", "exp": expired})
+    crud.user_cache.set(1, schemas.User(id=1))
+    with pytest.raises(HTTPException) as err:
+        deps.get_current_user(None, f"Bearer {token}")
+    assert err.value.status_code == 401
+    assert len(deps.token_cache) == 0
+
+
+def test_cached_token_rejected_after_expiry(caches, monkeypatch):
+    token = oidc.create_access_token(data=schemas.User(id=1))
+    crud.user_cache.set(1, schemas.User(id=1))
+    verified = deps.verify_token(token)
+    later = verified.expires + 1
+    monkeypatch.setattr(deps.time, "time", lambda: later)
+    with pytest.raises(HTTPException) as err:
+        deps.get_current_user(None, f"Bearer {token}")
+    assert err.value.status_code == 401
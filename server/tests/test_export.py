@@ -0,0 +1,92 @@
+import io
+import json
+import zipfile
+from xml.etree import ElementTree
+from types import SimpleNamespace
+
+from app.export import SERIALIZERS, document, file_name, negotiate, zip_archive
+from app.level import VectorLevel
+
+
+def part(vector_id, name):
+    return SimpleNamespace(
+        id=vector_id,
+        name=name,
+        level=VectorLevel.LEVEL0,
+        location=vector_id,
+        group="lab",
+        left_overhang="GGAG",
+        right_overhang="TACT",
+        sequence="ACGT" * 20,
+        genbank=f"LOCUS       {name}\n//",
+        annotations=[],
+        references=[],
+        features_blob=None,
+        features=[
+            SimpleNamespace(
+                type="promoter",
+                start_pos=0,
+                end_pos=12,
+                strand=-1,
+                qualifiers=[SimpleNamespace(key="label", value="P<1>")],
+            )
+        ],
+    )
+
+
+def test_file_name():
+    assert file_name(part(3, "pGGA EF1a/B")) == "3_pGGA_EF1a_B.gbk"
+
+
+def test_multi_record_genbank():
+    text = b"".join(document([part(1, "a"), part(2, "b")]))
+    assert text == b"LOCUS       a\n//\nLOCUS       b\n//\n"
+
+
+def test_zip_archive():
+    data = b"".join(zip_archive(part(i, f"p{i}") for i in range(3)))
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.namelist() == ["0_p0.gbk", "1_p1.gbk", "2_p2.gbk"]
+        assert archive.read("1_p1.gbk") == b"LOCUS       p1\n//\n"
+
+
+def test_fasta():
+    text = b"".join(document([part(1, "a b")], SERIALIZERS["fasta"])).decode()
+    assert text.splitlines() == [
+        ">a_b id=1 level=LEVEL0 length=80",
+        "ACGT" * 15,
+        "ACGT" * 5,
+    ]
+
+
+def test_json():
+    (first, second) = json.loads(
+        b"".join(document([part(1, "a"), part(2, "b")], SERIALIZERS["json"]))
+    )
+    assert (first["name"], second["name"]) == ("a", "b")
+    assert first["level"] == VectorLevel.LEVEL0.value == 2
+    assert first["features"][0]["qualifiers"] == [{"key": "label", "value": "P<1>"}]
+
+
+def test_sbol():
+    text = b"".join(document([part(1, "a"), part(2, "b")], SERIALIZERS["sbol"]))
+    root = ElementTree.fromstring(text)
+    sbol = "{http://sbols.org/v2#}"
+    assert len(root.findall(f"{sbol}ComponentDefinition")) == 2
+    assert root.find(f".//{sbol}Range/{sbol}start").text == "1"
+    assert root.find(f".//{sbol}elements").text == "acgt" * 20
+
+
+def test_zip_archive_format():
+    data = b"".join(zip_archive([part(4, "p")], SERIALIZERS["json"]))
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.namelist() == ["4_p.json"]
+        assert json.loads(archive.read("4_p.json"))[0]["id"] == 4
+
+
+def test_negotiate():
+    assert negotiate(None).name == "genbank"
+    assert negotiate("text/x-fasta").name == "fasta"
+    assert negotiate("application/json;q=0.5, application/rdf+xml").name == "sbol"
+    assert negotiate("application/json, */*;q=0.1").name == "json"
+    assert negotiate("image/png") is None
@@ -0,0 +1,142 @@
+from types import SimpleNamespace
+import io
+
+from Bio import SeqIO
+import numpy as np
+
+from app.config import settings
+from app.features import (
+    NO_STRAND,
+    FeatureTable,
+    decode_features,
+    encode_features,
+    vector_features,
+)
+from app.level import VectorLevel
+from app.schemas import Feature, Qualifier
+
+
+def feature(start, end, type="misc_feature", strand=1, label=None):
+    return Feature(
+        type=type,
+        qualifiers=[] if label is None else [Qualifier(key="label", value=label)],
+        start_pos=start,
+        end_pos=end,
+        strand=strand,
+    )
+
+
+def test_round_trip():
+    features = [feature(10, 20, label="a"), feature(5, 8, type="CDS", strand=-1)]
+    assert FeatureTable.from_features(features).to_features() == features
+
+
+RECORD = """\
+LOCUS       pTEST                     30 bp    DNA     circular SYN 01-JAN-2020
+FEATURES             Location/Qualifiers
+     promoter        1..10
+                     /label="P"
+     CDS             complement(11..20)
+                     /codon_start=1
+                     /pseudo
+     misc_feature    join(1..5,complement(25..30))
+ORIGIN
+        1 acgtacgtac gtacgtacgt acgtacgtac
+//
+"""
+
+
+def test_from_seqrecord():
+    table = FeatureTable.from_seqrecord(SeqIO.read(io.StringIO(RECORD), "genbank"))
+    assert table.starts.tolist() == [0, 10, 0]
+    assert table.ends.tolist() == [10, 20, 30]
+    assert table.strands.tolist() == [1, -1, NO_STRAND]
+    assert [table.types[code] for code in table.type_codes] == [
+        "promoter",
+        "CDS",
+        "misc_feature",
+    ]
+    assert [(qual.key, qual.value) for quals in table.qualifiers for qual in quals] == [
+        ("label", "['P']"),
+        ("codon_start", "['1']"),
+        ("pseudo", "['']"),
+    ]
+
+
+def test_take_and_reposition_backbone():
+    table = FeatureTable.from_features(
+        [feature(100, 200, label="a"), feature(3825, 3925, label="b")]
+    )
+    assert table.take(np.array([1])).repositioned(
+        1520, 3760, 6250, VectorLevel.BACKBONE
+    ).to_features() == [feature(65, 165, label="b")]
+
+
+def test_concat_shifts_each_table():
+    first = FeatureTable.from_features([feature(0, 4, type="CDS", label="a")])
+    second = FeatureTable.from_features(
+        [feature(1, 3, label="b"), feature(2, 5, type="CDS", strand=-1)]
+    )
+    assert FeatureTable.concat([first, second], [0, 10]).to_features() == [
+        feature(0, 4, type="CDS", label="a"),
+        feature(11, 13, label="b"),
+        feature(12, 15, type="CDS", strand=-1),
+    ]
+
+
+def test_concat_nothing():
+    assert FeatureTable.concat([], []).to_features() == []
+
+
+def test_blob_round_trip():
+    features = [
+        feature(10, 20, label='a "quoted" label'),
+        feature(5, 8, type="CDS", strand=-1),
+        feature(0, 3, label="b"),
+    ]
+    features[2].qualifiers.append(Qualifier(key="note", value="['x', 'y']"))
+    assert decode_features(encode_features(features)) == features
+    assert decode_features(encode_features([])) == []
+
+
+def test_vector_features_prefers_the_blob(monkeypatch):
+    rows = [feature(1, 2, label="row")]
+    blob = encode_features([feature(3, 4, label="blob")])
+
+    # The blob is not read unless blobs are on
+    assert vector_features(SimpleNamespace(features=rows)) == rows
+
+    monkeypatch.setattr(settings, "FEATURE_BLOBS", True)
+    assert vector_features(SimpleNamespace(features_blob=None, features=rows)) == rows
+    assert vector_features(SimpleNamespace(features_blob=blob, features=rows)) == [
+        feature(3, 4, label="blob")
+    ]
+
+
+def test_untyped_features():
+    features = [feature(0, 4, type=None, strand=None), feature(1, 3, label="a")]
+    table = FeatureTable.from_features(features)
+    assert table.types == ["misc_feature", None]
+    assert table.to_features() == features
+    assert FeatureTable.concat([table, table], [0, 10]).types == ["misc_feature", None]
+    assert decode_features(encode_features(table)) == features
+
+
+def test_table_from_vector(monkeypatch):
+    rows = [feature(1, 2, label="row")]
+    blob = encode_features([feature(3, 4, type="CDS", label="blob")])
+
+    assert (
+        FeatureTable.from_vector(SimpleNamespace(features=rows)).to_features() == rows
+    )
+
+    monkeypatch.setattr(settings, "FEATURE_BLOBS", True)
+    assert (
+        FeatureTable.from_vector(
+            SimpleNamespace(features_blob=None, features=rows)
+        ).to_features()
+        == rows
+    )
+    assert FeatureTable.from_vector(
+        SimpleNamespace(features_blob=blob, features=rows)
+    ).to_features() == [feature(3, 4, type="CDS", label="blob")]
@@ -0,0 +1,62 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from Bio import SeqIO
+
+from app.genbank import serialize_to_genbank, write_genbank
+
+pytestmark = pytest.mark.filterwarnings("ignore::Bio.BiopythonWarning")
+
+SAMPLES = Path(__file__).parents[2] / "core" / "Genbank Files"
+
+
+def sample_vectors():
+    "The sample records as stored by 'ggwc import' (level 1 path)."
+    for path in sorted(SAMPLES.rglob("*")):
+        if not path.is_file() or path.suffix in (".csv", ".xlsx"):
+            continue
+        for (index, record) in enumerate(SeqIO.parse(path, "genbank")):
+            yield SimpleNamespace(
+                name=f"{record.name} copy",
+                location=index,
+                date=None,
+                sequence=str(record.seq),
+                features_blob=None,
+                annotations=[
+                    SimpleNamespace(key=key, value=str(value))
+                    for (key, value) in record.annotations.items()
+                    if key != "references"
+                ],
+                references=[
+                    SimpleNamespace(authors=ref.authors, title=ref.title)
+                    for ref in record.annotations.get("references", [])
+                ],
+                features=[
+                    SimpleNamespace(
+                        type=feature.type,
+                        start_pos=int(feature.location.start),
+                        end_pos=int(feature.location.end),
+                        strand=feature.location.strand,
+                        qualifiers=[
+                            SimpleNamespace(key=key, value=str(value))
+                            for (key, value) in feature.qualifiers.items()
+                        ],
+                    )
+                    for feature in record.features
+                ],
+            )
+
+
+VECTORS = list(sample_vectors())
+
+
+def test_samples_found():
+    assert len(VECTORS) > 300
+
+
+@pytest.mark.parametrize("vector", VECTORS, ids=lambda vector: vector.name)
+def test_same_output_as_biopython(vector):
+    assert "".join(write_genbank(vector, lines_per_chunk=7)) == serialize_to_genbank(
+        vector
+    )
@@ -0,0 +1,20 @@
+from app.intervals import IntervalIndex
+
+# [start, end) pairs, deliberately not sorted
+STARTS = [50, 0, 10, 30, 90]
+ENDS = [60, 100, 20, 45, 95]
+
+
+def test_within():
+    assert list(IntervalIndex(STARTS, ENDS).within(10, 60)) == [0, 2, 3]
+
+
+def test_outside():
+    assert list(IntervalIndex(STARTS, ENDS).outside(25, 55)) == [2, 4]
+
+
+def test_empty_index():
+    index = IntervalIndex([], [])
+    assert len(index) == 0
+    assert list(index.within(0, 10)) == []
+    assert list(index.outside(0, 10)) == []
@@ -0,0 +1,52 @@
+import random
+
+from app.minhash import (
+    BANDS,
+    NUM_HASHES,
+    band_keys,
+    candidate_pairs,
+    sketch,
+    similarities,
+)
+from app.sequence import reverse_complement
+
+random.seed(42)
+SEQUENCE = "".join(random.choice("ACGT") for _ in range(2000))
+OTHER = "".join(random.choice("ACGT") for _ in range(2000))
+
+
+def test_sketch_size():
+    assert len(sketch(SEQUENCE)) == NUM_HASHES * 4
+    assert sketch("ACGT") is None
+
+
+def test_sketch_independent_of_strand():
+    assert sketch(SEQUENCE) == sketch(reverse_complement(SEQUENCE))
+
+
+def test_sketch_independent_of_origin_when_circular():
+    rotated = SEQUENCE[700:] + SEQUENCE[:700]
+    assert sketch(SEQUENCE, circular=True) == sketch(rotated, circular=True)
+
+
+def test_similarities():
+    mutated = SEQUENCE[:1000] + OTHER[:100] + SEQUENCE[1100:]
+    (same, close, unrelated) = similarities(
+        sketch(SEQUENCE), [sketch(SEQUENCE), sketch(mutated), sketch(OTHER)]
+    )
+    assert same == 1
+    assert 0.7 < close < 1
+    assert unrelated < 0.1
+
+
+def test_candidate_pairs():
+    mutated = SEQUENCE[:1000] + OTHER[:100] + SEQUENCE[1100:]
+    sketches = {1: sketch(SEQUENCE), 2: sketch(OTHER), 3: sketch(mutated)}
+    assert candidate_pairs(sketches) == {(1, 3)}
+
+
+def test_band_keys():
+    keys = band_keys(sketch(SEQUENCE))
+    assert len(set(keys)) == BANDS
+    assert all(0 <= key < 2**63 for key in keys)
+    assert not set(keys) & set(band_keys(sketch(OTHER)))
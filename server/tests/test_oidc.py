@@ -0,0 +1,415 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+import asyncio
+import json
+import socket
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+import httpx
+import pytest
+
+from app import deps, model, oidc, schemas
+from app.database import Base, create_async_database_engine
+from main import app
+
+
+class StubProvider(ThreadingHTTPServer):
+    "A local identity provider serving its well-known configuration and keys."
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+        self.config = {
+            "authorization_endpoint": f"{self.url}/auth",
+            "jwks_uri": f"{self.url}/jwks",
+        }
+        self.jwks = {"keys": [{"kid": "one", "kty": "oct", "k": "a2V5"}]}
+        self.status = 200
+        self.requests = 0
+        self.delay = 0.0
+
+    def handle_error(self, request, client_address):
+        "Clients gone after a timeout are expected."
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server: StubProvider
+
+    def do_GET(self):
+        self.server.requests += 1
+        time.sleep(self.server.delay)
+        documents = {
+            "/.well-known/openid-configuration": self.server.config,
+            "/jwks": self.server.jwks,
+        }
+        if self.path not in documents:
+            self.send_error(404)
+            return
+        body = json.dumps(documents[self.path]).encode()
+        self.send_response(self.server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(name="provider")
+def fixture_provider():
+    provider = StubProvider()
+    Thread(
+        target=provider.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    ).start()
+    yield provider
+    provider.shutdown()
+    provider.server_close()
+
+
+@pytest.fixture(name="refused")
+def fixture_refused():
+    "The URL of a port nothing listens on."
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+async def refreshed(cache):
+    await asyncio.gather(*cache._refreshes.values())
+
+
+def test_fresh_configuration_fetched_once(provider):
+    cache = oidc.DiscoveryCache(ttl=60, max_stale=60)
+
+    async def logins():
+        async with httpx.AsyncClient() as client:
+            return await asyncio.gather(
+                *[cache.get(client, provider.url) for _ in range(3)]
+            ) + [await cache.get(client, provider.url)]
+
+    configs = asyncio.run(logins())
+    assert configs == [provider.config] * 4
+    # Concurrent first requests may all miss, later ones do not
+    assert 1 <= provider.requests <= 3
+
+
+def test_stale_configuration_served_while_refreshed(provider):
+    clock = Clock()
+    cache = oidc.DiscoveryCache(ttl=60, max_stale=600, clock=clock)
+    old = dict(provider.config)
+
+    async def scenario():
+        async with httpx.AsyncClient() as client:
+            assert await cache.get(client, provider.url) == old
+
+            provider.config = {**old, "authorization_endpoint": "elsewhere"}
+            clock.now = 61
+            # Served stale, refreshed once in the background
+            assert await cache.get(client, provider.url) == old
+            assert await cache.get(client, provider.url) == old
+            await refreshed(cache)
+            assert provider.requests == 2
+            assert await cache.get(client, provider.url) == provider.config
+
+    asyncio.run(scenario())
+
+
+def test_refresh_uses_the_shared_client(provider):
+    clock = Clock()
+    cache = oidc.DiscoveryCache(ttl=60, max_stale=600, clock=clock)
+    sent = []
+
+    async def record(request):
+        sent.append(request.url)
+
+    async def scenario():
+        async with httpx.AsyncClient(event_hooks={"request": [record]}) as client:
+            await cache.get(client, provider.url)
+            clock.now = 61
+            await cache.get(client, provider.url)
+            await refreshed(cache)
+
+    asyncio.run(scenario())
+    assert len(sent) == provider.requests == 2
+
+
+def test_stale_configuration_kept_when_refresh_fails(provider):
+    clock = Clock()
+    cache = oidc.DiscoveryCache(ttl=60, max_stale=600, clock=clock)
+
+    async def scenario():
+        async with httpx.AsyncClient() as client:
+            config = await cache.get(client, provider.url)
+
+            provider.status = 500
+            clock.now = 100
+            assert await cache.get(client, provider.url) == config
+            await refreshed(cache)
+            # Still stale, so refreshed again
+            assert await cache.get(client, provider.url) == config
+            await refreshed(cache)
+            assert provider.requests == 3
+
+            # Too old to be served
+            clock.now = 661
+            assert await cache.get(client, provider.url) is None
+            assert provider.requests == 4
+
+    asyncio.run(scenario())
+
+
+def test_unreachable_provider_during_refresh(provider):
+    clock = Clock()
+    cache = oidc.DiscoveryCache(ttl=60, max_stale=600, clock=clock)
+
+    async def scenario():
+        async with httpx.AsyncClient() as client:
+            config = await cache.get(client, provider.url)
+
+            provider.shutdown()
+            provider.server_close()
+            clock.now = 100
+            assert await cache.get(client, provider.url) == config
+            await refreshed(cache)
+            assert await cache.get(client, provider.url) == config
+
+    asyncio.run(scenario())
+
+
+def test_keys_fetched_once(provider):
+    cache = oidc.KeyCache(ttl=60, min_refetch=10)
+
+    async def logins():
+        async with httpx.AsyncClient() as client:
+            return [await cache.get(client, provider.config, "one") for _ in range(3)]
+
+    assert asyncio.run(logins()) == [provider.jwks] * 3
+    assert provider.requests == 1
+
+
+def test_keys_indexed_by_kid(provider):
+    cache = oidc.KeyCache(ttl=60, min_refetch=10)
+    two = {"kid": "two", "kty": "oct", "k": "b3RoZXI="}
+    provider.jwks = {"keys": [*provider.jwks["keys"], two]}
+
+    async def scenario():
+        async with httpx.AsyncClient() as client:
+            assert await cache.get(client, provider.config, "two") == {"keys": [two]}
+            # No key ID, every key is tried
+            assert await cache.get(client, provider.config, None) == provider.jwks
+
+    asyncio.run(scenario())
+    assert provider.requests == 1
+
+
+def test_keys_refetched_on_unknown_kid(provider):
+    clock = Clock()
+    cache = oidc.KeyCache(ttl=600, min_refetch=10, clock=clock)
+    rotated = {"keys": [{"kid": "two", "kty": "oct", "k": "b3RoZXI="}]}
+
+    async def scenario():
+        async with httpx.AsyncClient() as client:
+            await cache.get(client, provider.config, "one")
+
+            # Rotated too soon after the last fetch
+            provider.jwks = rotated
+            clock.now = 5
+            assert await cache.get(client, provider.config, "two") != rotated
+            assert provider.requests == 1
+
+            clock.now = 15
+            assert await cache.get(client, provider.config, "two") == rotated
+            assert provider.requests == 2
+
+            # Unknown key IDs are rate limited
+            for _ in range(3):
+                await cache.get(client, provider.config, "made up")
+            assert provider.requests == 2
+
+    asyncio.run(scenario())
+
+
+def test_keys_refetched_when_expired(provider):
+    clock = Clock()
+    cache = oidc.KeyCache(ttl=60, min_refetch=10, clock=clock)
+
+    async def scenario():
+        async with httpx.AsyncClient() as client:
+            await cache.get(client, provider.config, "one")
+            clock.now = 61
+            await cache.get(client, provider.config, "one")
+
+    asyncio.run(scenario())
+    assert provider.requests == 2
+
+
+def test_empty_key_set_not_cached(provider):
+    clock = Clock()
+    cache = oidc.KeyCache(ttl=60, min_refetch=10, clock=clock)
+    keys = provider.jwks
+    provider.jwks = {}
+
+    async def scenario():
+        async with httpx.AsyncClient() as client:
+            assert await cache.get(client, provider.config, "one") == {"keys": []}
+            provider.jwks = keys
+            assert await cache.get(client, provider.config, "one") == keys
+
+    asyncio.run(scenario())
+    assert provider.requests == 2
+
+
+def test_breaker_opens_after_failures(refused):
+    clock = Clock()
+    breaker = oidc.CircuitBreaker(threshold=2, cooldown=30, timeout=1, clock=clock)
+
+    async def scenario():
+        async with httpx.AsyncClient() as client:
+            for _ in range(2):
+                assert breaker.state(refused) == breaker.CLOSED
+                with pytest.raises(oidc.ProviderUnavailable):
+                    await breaker.call(refused, oidc.configuration(client, refused))
+            assert breaker.state(refused) == breaker.OPEN
+
+            # Skipped without a connection attempt
+            with pytest.raises(oidc.ProviderUnavailable):
+                await breaker.call(refused, oidc.configuration(client, refused))
+
+    asyncio.run(scenario())
+    assert breaker.metrics() == [
+        {"issuer": refused, "state": "open", "failures": 2, "opened": 1, "skipped": 1}
+    ]
+
+
+def test_breaker_half_open(provider):
+    clock = Clock()
+    breaker = oidc.CircuitBreaker(threshold=1, cooldown=30, timeout=1, clock=clock)
+    provider.delay = 0.3
+
+    async def scenario():
+        async with httpx.AsyncClient() as client:
+
+            def call():
+                return breaker.call(
+                    provider.url, oidc.configuration(client, provider.url)
+                )
+
+            breaker.timeout = 0.1
+            with pytest.raises(oidc.ProviderUnavailable):
+                await call()
+            assert breaker.state(provider.url) == breaker.OPEN
+
+            # One trial call after the cooldown, failing opens again
+            clock.now = 31
+            assert breaker.state(provider.url) == breaker.HALF_OPEN
+            with pytest.raises(oidc.ProviderUnavailable):
+                await call()
+            assert breaker.state(provider.url) == breaker.OPEN
+
+            clock.now = 62
+            breaker.timeout = 1
+            (trial, concurrent) = await asyncio.gather(
+                call(), call(), return_exceptions=True
+            )
+            assert trial == provider.config
+            assert isinstance(concurrent, oidc.ProviderUnavailable)
+            assert breaker.state(provider.url) == breaker.CLOSED
+
+    asyncio.run(scenario())
+    assert provider.requests == 3
+
+
+def test_slow_configuration_times_out(provider):
+    provider.delay = 0.5
+    breaker = oidc.CircuitBreaker(threshold=1, cooldown=30, timeout=0.1)
+    cache = oidc.DiscoveryCache(ttl=60, max_stale=60, circuits=breaker)
+
+    async def scenario():
+        async with httpx.AsyncClient() as client:
+            start = time.monotonic()
+            assert await cache.get(client, provider.url) is None
+            assert await cache.get(client, provider.url) is None
+            return time.monotonic() - start
+
+    assert asyncio.run(scenario()) < 0.4
+    assert provider.requests == 1
+
+
+@pytest.fixture(name="database")
+def fixture_database(tmp_path):
+    engine = create_async_database_engine(f"sqlite:///{tmp_path}/test.sqlite")
+    sessions = sessionmaker(bind=engine, class_=AsyncSession)
+
+    async def create():
+        async with engine.begin() as connection:
+            await connection.run_sync(
+                Base.metadata.create_all, tables=[model.IdentityProvider.__table__]
+            )
+
+    async def get_async_db():
+        async with sessions() as database:
+            yield database
+
+    asyncio.run(create())
+    app.dependency_overrides[deps.get_async_db] = get_async_db
+    yield sessions
+    del app.dependency_overrides[deps.get_async_db]
+    asyncio.run(engine.dispose())
+
+
+def test_login_urls_of_available_providers(database, provider, refused, monkeypatch):
+    slow = StubProvider()
+    slow.delay = 0.5
+    Thread(
+        target=slow.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    ).start()
+    monkeypatch.setattr(oidc.breaker, "timeout", 0.2)
+
+    async def add():
+        async with database() as session:
+            for (name, issuer) in (
+                ("up", provider.url),
+                ("slow", slow.url),
+                ("down", refused),
+            ):
+                session.add(
+                    model.IdentityProvider(
+                        name=name, issuer=issuer, clientid="id", secret="secret"
+                    )
+                )
+            await session.commit()
+
+    asyncio.run(add())
+    app.dependency_overrides[deps.get_current_admin] = lambda: schemas.User(id=1)
+    try:
+        with TestClient(app) as client:
+            start = time.monotonic()
+            response = client.get("/login")
+            assert time.monotonic() - start < 0.45
+            assert [url["name"] for url in response.json()] == ["up"]
+
+            statuses = {
+                status["issuer"]: status
+                for status in client.get("/admin/providers").json()["data"]
+            }
+    finally:
+        del app.dependency_overrides[deps.get_current_admin]
+        slow.shutdown()
+        slow.server_close()
+
+    assert statuses[provider.url]["failures"] == 0
+    assert statuses[slow.url]["failures"] == 1
+    assert statuses[refused]["failures"] == 1
@@ -0,0 +1,72 @@
+import hashlib
+
+from app import restriction
+from app.restriction import ENZYMES, Site, find_sites, virtual_digest
+from app.sequence import reverse_complement
+
+
+def test_reverse_complement():
+    assert reverse_complement("GGTCTCN") == "NGAGACC"
+
+
+def test_find_sites_both_strands():
+    bsai = ENZYMES["BsaI"]
+    assert find_sites("AGGTCTCAAAAGAGACCA", enzymes=[bsai]) == [
+        Site(enzyme="BsaI", position=1, strand=1),
+        Site(enzyme="BsaI", position=11, strand=-1),
+    ]
+
+
+def test_find_sites_palindromic_reported_once():
+    assert find_sites("TTGAATTCTT", enzymes=[ENZYMES["EcoRI"]]) == [
+        Site(enzyme="EcoRI", position=2, strand=None)
+    ]
+
+
+def test_find_sites_lowercase():
+    assert find_sites("ttgaattctt", enzymes=[ENZYMES["EcoRI"]]) == [
+        Site(enzyme="EcoRI", position=2, strand=None)
+    ]
+
+
+def test_find_sites_spanning_origin():
+    sequence = "TCTCAAAAAAGG"
+    bsai = ENZYMES["BsaI"]
+    assert find_sites(sequence, enzymes=[bsai]) == []
+    assert find_sites(sequence, enzymes=[bsai], circular=True) == [
+        Site(enzyme="BsaI", position=10, strand=1)
+    ]
+
+
+def test_virtual_digest_uncut():
+    assert virtual_digest("A" * 100, ["EcoRI"]) == (100,)
+
+
+def test_virtual_digest_circular():
+    # EcoRI cuts G^AATTC: after positions 11 and 61 of 106
+    sequence = "A" * 10 + "GAATTC" + "A" * 44 + "GAATTC" + "A" * 40
+    assert virtual_digest(sequence, ["EcoRI"]) == (56, 50)
+
+
+def test_virtual_digest_type_iis_reverse_strand():
+    # BsaI GGTCTC(1/5) cuts downstream of the site on its own strand,
+    # so the reverse site GAGACC cuts 5 bases upstream of itself.
+    sequence = "GGTCTC" + "A" * 20 + "GAGACC" + "A" * 68
+    assert virtual_digest(sequence, ["BsaI"]) == (86, 14)
+
+
+def test_virtual_digest_enzyme_order_irrelevant():
+    sequence = "GGATCC" + "A" * 30 + "GAATTC" + "A" * 64
+    assert virtual_digest(sequence, ["EcoRI", "BamHI"]) == virtual_digest(
+        sequence, ["BamHI", "EcoRI", "BamHI"]
+    )
+
+
+def test_virtual_digest_cache_keyed_by_digest():
+    sequence = "A" * 10 + "GAATTC" + "A" * 84
+    restriction._digests.clear()
+    assert virtual_digest(sequence.lower(), ["EcoRI"]) == (100,)
+    assert virtual_digest(sequence, ["EcoRI"]) == (100,)
+    assert list(restriction._digests) == [
+        (hashlib.sha1(sequence.encode()).digest(), ("EcoRI",))
+    ]
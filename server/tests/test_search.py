@@ -0,0 +1,59 @@
+from app.search import (
+    K,
+    candidates,
+    index_kmers,
+    is_valid_query,
+    kmer_codes,
+    matches_at,
+    patterns,
+    probes,
+)
+
+
+def test_kmer_codes():
+    assert kmer_codes("A" * K).tolist() == [0]
+    assert kmer_codes("A" * (K - 1) + "T").tolist() == [3]
+    assert kmer_codes("c" + "A" * (K - 1)).tolist() == [4 ** (K - 1)]
+    assert kmer_codes("A" * (K - 1)).tolist() == []
+
+
+def test_kmer_codes_skip_ambiguous_bases():
+    assert kmer_codes("N" + "A" * K).tolist() == [-1, 0]
+
+
+def test_index_kmers_circular():
+    sequence = "ACGTACGTACGTTT"
+    (linear, _) = index_kmers(sequence)
+    (circular, positions) = index_kmers(sequence, circular=True)
+    assert len(linear) == len(sequence) - K + 1
+    assert positions.tolist() == list(range(len(sequence)))
+    assert circular[-1] == kmer_codes((sequence + sequence)[len(sequence) - 1 :])[0]
+
+
+def test_valid_queries():
+    assert is_valid_query("acgt" * 3)
+    assert not is_valid_query("ACGT")
+    assert not is_valid_query("ACGTNACGTACGT")
+
+
+def test_patterns_both_strands():
+    assert patterns("aaaaaaaaaaaC") == [("AAAAAAAAAAAC", 1), ("GTTTTTTTTTTT", -1)]
+    assert patterns("GAATTCGAATTC") == [("GAATTCGAATTC", None)]
+
+
+def test_candidates_intersect_probes():
+    pattern = "ACGTACGTACGTAA"
+    ((_, first), (offset, last)) = probes(pattern)
+    assert offset == 2
+    assert (first, last) == (kmer_codes(pattern)[0], kmer_codes(pattern)[2])
+
+    first_hits = [(1, 5, 100), (2, 0, 100), (3, 98, 100)]
+    last_hits = [(1, 7, 100), (2, 40, 100), (3, 0, 100)]
+    # Vector 3 only matches if the pattern wraps around the origin
+    assert candidates(pattern, [first_hits, last_hits]) == [(1, 5), (3, 98)]
+
+
+def test_matches_at_spanning_origin():
+    sequence = "GGGGCCCCAAAATTTT"
+    assert matches_at(sequence, "TTTTGGGG", 12, circular=True)
+    assert not matches_at(sequence, "TTTTGGGG", 12, circular=False)
@@ -1,7 +1,7 @@
 import pytest
 
 from app import __version__
-from app.genbank import digest_sequence, reposition_features
+from app.genbank import digest_overhangs, digest_sequence, reposition_features
 from app.level import VectorLevel
 from app.schemas import Feature
 
@@ -290,3 +290,22 @@ def test_reposition_features_backbone_case4():
         )
         == adjusted_feature
     )
+
+
+def test_overhangs_level0():
+    assert digest_overhangs(
+        VectorLevel.LEVEL0, "GGTCTCXAAAAGENE_OF_INTERESTBBBBXGAGACC"
+    ) == ("AAAA", "BBBB")
+
+
+def test_overhangs_reverse_level0():
+    assert digest_overhangs(
+        VectorLevel.LEVEL0, "GENE_BBBBXGAGACCNOT_OF_INTERESTGGTCTCXAAAAOF_INTEREST"
+    ) == ("AAAA", "BBBB")
+
+
+def test_overhangs_backbone():
+    assert digest_overhangs(
+        VectorLevel.BACKBONE,
+        "REGION2_REMAINSAAAAXGAGACCREGION_CUT_OUTGGTCTCXGGGGREGION1",
+    ) == ("GGGG", "AAAA")
@@ -0,0 +1,53 @@
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+import pytest
+
+from app import crud, model, schemas
+
+
+@pytest.fixture(name="database")
+def fixture_database():
+    engine = create_engine("sqlite://")
+    model.User.__table__.create(engine)
+    engine.queries = 0
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(*_):
+        engine.queries += 1
+
+    crud.user_cache.clear()
+    with sessionmaker(bind=engine)() as database:
+        yield database
+    crud.user_cache.clear()
+
+
+def new_user(database, role="user"):
+    return crud.create_user(
+        database, schemas.UserCreate(name="name", role=role, iss="iss", sub="sub")
+    )
+
+
+def test_user_read_once(database):
+    user = new_user(database)
+    queries = database.bind.queries
+    expires = time.time() + 3600
+    for _ in range(3):
+        cached = crud.get_cached_user(database, user.id, expires=expires)
+        assert cached == schemas.User.from_orm(user)
+    assert database.bind.queries == queries + 1
+
+
+def test_user_not_cached_after_token_expiry(database):
+    user = new_user(database)
+    queries = database.bind.queries
+    for _ in range(2):
+        assert crud.get_cached_user(database, user.id, expires=time.time() - 1)
+    assert database.bind.queries == queries + 2
+
+
+def test_unknown_user_not_cached(database):
+    assert crud.get_cached_user(database, 1, expires=time.time() + 3600) is None
+    user = new_user(database)
+    assert crud.get_cached_user(database, 1, expires=time.time() + 3600).id == user.id